@@ -1,24 +1,119 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 from flask_socketio import SocketIO
+from sqlalchemy.orm import scoped_session
+import hashlib
+import json
 import os
-from models import create_database, Repository, Contributor, Commit, CommitFile, MetricSnapshot
-from git_analyzer import GitAnalyzer
-from metrics_calculator import MetricsCalculator
-from datetime import datetime
+from models import create_database, create_read_only_database, Repository, Contributor, Commit, CommitFile, FilePath, MetricSnapshot, RefWatermark, AnalysisJob, DailyRollup, BranchBitmap, ClassificationRuleSet
+from git_analyzer import GitAnalyzer, is_git_repository
+from metrics_calculator import MetricsCalculator, DASHBOARD_PANELS
+from downsampling import GRANULARITIES
+from jobs import JobManager, ACTIVE_STATUSES
+from rollups import backfill_daily_rollups
+from metrics_cache import CachedMetricsCalculator, data_versions
+from frames import FrameMetricsCalculator, FrameStore
+from classifiers import load_rules, parse_rules, rules_to_dict, DEFAULT_RULES
+from serialization import create_json_provider
+from compression import init_compression, available_encodings
+from datetime import datetime, time, timezone
+import config
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'commit-tracker-secret-key'
 CORS(app)
+app.json = create_json_provider(app)
+# Registered ahead of the ETag hook below so it runs after it and sees the ETag
+init_compression(app)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Initialize database
-engine, Session = create_database()
-session = Session()
+engine, Session = create_database(
+    config.DATABASE_PATH,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW
+)
+
+# Metric queries get their own read-only pool, so dashboards keep serving while analysis writes
+read_engine, ReadSession = create_read_only_database(
+    config.DATABASE_PATH,
+    pool_size=config.DB_READ_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW
+)
+
+# Thread-local sessions: each request, SocketIO handler and clone thread gets its own,
+# removed again when the request (or thread) ends
+session = scoped_session(Session)
+read_session = scoped_session(ReadSession)
+
+# Databases created before the rollup table existed get their rollups built once
+backfill_daily_rollups(session)
+session.remove()
 
 # Initialize analyzers
-git_analyzer = GitAnalyzer(session, socketio)
-metrics_calculator = MetricsCalculator(session)
+git_analyzer = GitAnalyzer(session_factory=session, socketio=socketio)
+# Metric results are cached until the repository's data version changes; the 'frames' engine
+# also keeps each repository's commits in memory and refreshes them on the same version bumps.
+# Frames are shared with branch-filtered requests, which always use them
+frame_store = FrameStore()
+if config.METRICS_ENGINE == 'frames':
+    metrics_calculator = CachedMetricsCalculator(FrameMetricsCalculator(session_factory=read_session, frames=frame_store))
+else:
+    metrics_calculator = CachedMetricsCalculator(MetricsCalculator(session_factory=read_session))
+
+# Background analysis and reclassification jobs, each job runs with its own session
+job_manager = JobManager(Session, socketio, frames=frame_store)
+
+# Read endpoints whose responses only change with the repository's data version (or the day)
+CONDITIONAL_GET_PREFIXES = ('/api/metrics/', '/api/charts/', '/api/contributors', '/api/dashboard')
+
+@app.before_request
+def check_conditional_get():
+    """Answer unchanged reads with 304 before any metrics are computed"""
+    if request.method != 'GET' or not request.path.startswith(CONDITIONAL_GET_PREFIXES):
+        return None
+    repo_id = request.args.get('repository_id', type=int)
+    if not repo_id:
+        return None
+    
+    # Windows are resolved against the current day, so a new day is a new representation
+    today = datetime.utcnow().date()
+    validator = f'{data_versions.instance}:{repo_id}:{data_versions.get(repo_id)}:{today}:{request.full_path}'
+    etag = hashlib.sha1(validator.encode()).hexdigest()
+    last_modified = max(data_versions.last_modified(repo_id), datetime.combine(today, time.min))
+    g.validators = (etag, last_modified)
+    
+    if request.if_none_match:
+        # Compressed responses carry the ETag with their coding appended
+        variants = [etag] + [f'{etag}-{encoding}' for encoding in available_encodings()]
+        matched = next((tag for tag in variants if request.if_none_match.contains(tag)), None)
+        if matched:
+            g.validators = (matched, last_modified)
+        not_modified = matched is not None
+    else:
+        since = request.if_modified_since
+        not_modified = since is not None and since >= last_modified.replace(tzinfo=timezone.utc)
+    if not_modified:
+        return app.response_class(status=304)
+    return None
+
+@app.after_request
+def add_validators(response):
+    """Tag conditional-GET responses with their ETag and Last-Modified date"""
+    validators = g.pop('validators', None)
+    if validators and response.status_code in (200, 304):
+        etag, last_modified = validators
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        # Let clients keep the response but revalidate it on every use
+        response.cache_control.no_cache = True
+    return response
+
+@app.teardown_appcontext
+def remove_session(exception=None):
+    """Roll back anything left open and return the request's connections to their pools"""
+    session.remove()
+    read_session.remove()
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -59,7 +154,7 @@ def add_repository():
     final_path = local_path
     
     # Scenario 1: Local path provided and exists
-    if local_path and os.path.exists(local_path) and os.path.exists(os.path.join(local_path, '.git')):
+    if local_path and os.path.exists(local_path) and is_git_repository(local_path):
         final_path = local_path
     
     # Scenario 2: Git URL provided, need to clone
@@ -92,8 +187,11 @@ def add_repository():
         session.add(repo)
         session.commit()
         
-        # Start async clone operation
-        clone_thread = git_analyzer.clone_repository_async(git_url, final_path)
+        # Start async clone operation; 'mirror' overrides CODETIDE_CLONE_MODE for this repository
+        mirror = data.get('mirror')
+        clone_thread = git_analyzer.clone_repository_async(
+            git_url, final_path, mirror=bool(mirror) if mirror is not None else None
+        )
         
         # Return immediately with clone started status
         return jsonify({
@@ -111,7 +209,7 @@ def add_repository():
         return jsonify({'error': 'Either a valid local path or git URL must be provided'}), 400
     
     # Final validation of the repository (for local repos only)
-    if not os.path.exists(final_path) or not os.path.exists(os.path.join(final_path, '.git')):
+    if not os.path.exists(final_path) or not is_git_repository(final_path):
         return jsonify({'error': 'Final repository path is not a valid git repository'}), 400
     
     # Create repository record (for local repos)
@@ -134,26 +232,99 @@ def add_repository():
     }), 201
 
 @app.route('/api/repositories/<int:repo_id>/analyze', methods=['POST'])
-def analyze_repository(repo_id):
-    """Analyze repository and extract commit data"""
+@app.route('/api/repositories/<int:repo_id>/jobs', methods=['POST'])
+def submit_analysis_job(repo_id):
+    """Queue a background analysis job for a repository, follow it through /api/jobs/<id>"""
     repo = session.query(Repository).get(repo_id)
     if not repo:
         return jsonify({'error': 'Repository not found'}), 404
     
-    try:
-        commits_processed = git_analyzer.analyze_repository(repo.path, repo_id)
-        
-        # Update last analyzed timestamp
-        repo.last_analyzed = datetime.utcnow()
-        session.commit()
-        
-        return jsonify({
-            'message': f'Analysis complete. Processed {commits_processed} commits.',
-            'commits_processed': commits_processed
-        })
+    data = request.get_json(silent=True) or {}
+    workers = data.get('workers')
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        return jsonify({'error': 'workers must be a positive integer'}), 400
     
-    except Exception as e:
-        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+    job, created = job_manager.submit(repo_id, workers=workers)
+    if not created:
+        return jsonify({'error': 'An analysis job is already active for this repository', 'job': job}), 409
+    
+    return jsonify(job), 202
+
+@app.route('/api/repositories/<int:repo_id>/jobs', methods=['GET'])
+def get_repository_jobs(repo_id):
+    """Get recent analysis jobs for a repository"""
+    return jsonify(job_manager.list_for_repository(repo_id))
+
+@app.route('/api/repositories/<int:repo_id>/classification-rules', methods=['GET'])
+def get_classification_rules(repo_id):
+    """Get the commit type keywords and test path patterns applied to a repository"""
+    rules = load_rules(session, repo_id)
+    return jsonify(dict(rules_to_dict(rules), is_default=rules == DEFAULT_RULES))
+
+@app.route('/api/repositories/<int:repo_id>/classification-rules', methods=['PUT'])
+def update_classification_rules(repo_id):
+    """Store a repository's classification rules; new commits use them, stored ones after /reclassify"""
+    repo = session.query(Repository).get(repo_id)
+    if not repo:
+        return jsonify({'error': 'Repository not found'}), 404
+    
+    rules, error = parse_rules(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    
+    data = rules_to_dict(rules)
+    row = session.query(ClassificationRuleSet).filter_by(repository_id=repo_id).first()
+    if row is None:
+        row = ClassificationRuleSet(repository_id=repo_id)
+        session.add(row)
+    row.commit_types = json.dumps(data['commit_types'])
+    row.default_commit_type = data['default_commit_type']
+    row.test_path_patterns = json.dumps(data['test_path_patterns'])
+    row.updated_at = datetime.utcnow()
+    session.commit()
+    
+    return jsonify(dict(data, is_default=rules == DEFAULT_RULES))
+
+@app.route('/api/repositories/<int:repo_id>/reclassify', methods=['POST'])
+def submit_reclassification_job(repo_id):
+    """Queue a job applying the repository's current classification rules to its stored commits"""
+    repo = session.query(Repository).get(repo_id)
+    if not repo:
+        return jsonify({'error': 'Repository not found'}), 404
+    
+    job, created = job_manager.submit(repo_id, kind='reclassify')
+    if not created:
+        return jsonify({'error': 'A job is already active for this repository', 'job': job}), 409
+    
+    return jsonify(job), 202
+
+@app.route('/api/repositories/<int:repo_id>/branches', methods=['GET'])
+def get_repository_branches(repo_id):
+    """List the branches metrics can be filtered on, with their analyzed tip and commit count"""
+    branches = session.query(BranchBitmap).filter_by(repository_id=repo_id).order_by(BranchBitmap.branch_name).all()
+    return jsonify([{
+        'name': branch.branch_name,
+        'ref_name': branch.ref_name,
+        'tip_sha': branch.tip_sha,
+        'commit_count': branch.commit_count,
+        'updated_at': branch.updated_at.isoformat() if branch.updated_at else None
+    } for branch in branches])
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Get analysis job status"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_analysis_job(job_id):
+    """Cancel a queued or running analysis job"""
+    job = job_manager.cancel(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
 
 @app.route('/api/repositories/<int:repo_id>/pull', methods=['POST'])
 def pull_repository(repo_id):
@@ -162,11 +333,8 @@ def pull_repository(repo_id):
         return jsonify({'error': 'Repository not found'}), 404
     
     try:
-        # Initialize analyzer with socketio for progress tracking
-        analyzer = GitAnalyzer(session, socketio)
-        
         # Pull latest changes
-        success, message, commits_pulled = analyzer.pull_repository(repo.path)
+        success, message, commits_pulled = git_analyzer.pull_repository(repo.path)
         
         if success:
             return jsonify({
@@ -190,23 +358,39 @@ def delete_repository(repo_id):
     if not repo:
         return jsonify({'error': 'Repository not found'}), 404
     
+    # Don't pull data out from under a background analysis
+    active_job = session.query(AnalysisJob).filter(
+        AnalysisJob.repository_id == repo_id,
+        AnalysisJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+    if active_job:
+        return jsonify({'error': 'Repository has an active analysis job, cancel it first', 'job_id': active_job.id}), 409
+    
     try:
-        # Delete associated commit files first
-        commit_ids = session.query(Commit.id).filter_by(repository_id=repo_id).all()
-        commit_ids = [c.id for c in commit_ids]
-        
-        if commit_ids:
-            session.query(CommitFile).filter(CommitFile.commit_id.in_(commit_ids)).delete(synchronize_session=False)
+        # Delete associated commit files first (subquery, the id list can exceed SQLite's variable limit)
+        repository_commit_ids = session.query(Commit.id).filter_by(repository_id=repo_id).scalar_subquery()
+        session.query(CommitFile).filter(
+            CommitFile.commit_id.in_(repository_commit_ids)
+        ).delete(synchronize_session=False)
+        session.query(FilePath).filter_by(repository_id=repo_id).delete()
         
         # Delete commits
         session.query(Commit).filter_by(repository_id=repo_id).delete()
         
-        # Delete metric snapshots
+        # Delete metric snapshots and daily rollups
         session.query(MetricSnapshot).filter_by(repository_id=repo_id).delete()
+        session.query(DailyRollup).filter_by(repository_id=repo_id).delete()
+        
+        # Delete ref watermarks so a re-added repository is analyzed from scratch
+        session.query(RefWatermark).filter_by(repository_id=repo_id).delete()
+        session.query(BranchBitmap).filter_by(repository_id=repo_id).delete()
+        session.query(ClassificationRuleSet).filter_by(repository_id=repo_id).delete()
+        session.query(AnalysisJob).filter_by(repository_id=repo_id).delete()
         
         # Delete repository
         session.delete(repo)
         session.commit()
+        data_versions.bump(repo_id)
         
         return jsonify({
             'message': f'Repository "{repo.name}" and all associated data deleted successfully'
@@ -215,6 +399,40 @@ def delete_repository(repo_id):
         session.rollback()
         return jsonify({'error': f'Failed to delete repository: {str(e)}'}), 500
 
+def parse_series_args(values):
+    """Read granularity and max_points of a time-series request; returns (granularity, max_points, error)"""
+    granularity = values.get('granularity') or 'day'
+    if granularity not in GRANULARITIES:
+        return None, None, f"granularity must be one of {', '.join(GRANULARITIES)}"
+    
+    max_points = values.get('max_points')
+    if max_points in (None, ''):
+        return granularity, None, None
+    try:
+        max_points = int(max_points)
+    except (TypeError, ValueError):
+        return None, None, 'max_points must be an integer'
+    if max_points < 3:
+        return None, None, 'max_points must be at least 3'
+    return granularity, max_points, None
+
+def calculator_for(repo_id, branch):
+    """Calculator for a metrics request, limited to a branch when one is given; returns (calculator, error)
+    
+    Branch filters are answered from in-memory branch frames, cut from the repository frame with
+    the branch's membership bitmap, so no query has to join commits to branches.
+    """
+    if not branch:
+        return metrics_calculator, None
+    known = read_session.query(BranchBitmap.id).filter_by(repository_id=repo_id, branch_name=branch).first()
+    if not known:
+        return None, f'Unknown branch: {branch}'
+    return CachedMetricsCalculator(
+        FrameMetricsCalculator(session_factory=read_session, frames=frame_store, branch=branch),
+        cache=metrics_calculator.cache,
+        scope=('branch', branch)
+    ), None
+
 @app.route('/api/metrics/velocity', methods=['GET'])
 def get_velocity_metrics():
     """Get commit velocity metrics"""
@@ -225,7 +443,11 @@ def get_velocity_metrics():
     if not repo_id:
         return jsonify({'error': 'repository_id is required'}), 400
     
-    velocity = metrics_calculator.get_commit_velocity(repo_id, days, contributor_id)
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    velocity = calculator.get_commit_velocity(repo_id, days, contributor_id)
     return jsonify({'velocity': velocity, 'period_days': days})
 
 @app.route('/api/metrics/churn', methods=['GET'])
@@ -238,7 +460,11 @@ def get_churn_metrics():
     if not repo_id:
         return jsonify({'error': 'repository_id is required'}), 400
     
-    churn = metrics_calculator.get_code_churn(repo_id, days, contributor_id)
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    churn = calculator.get_code_churn(repo_id, days, contributor_id)
     return jsonify(churn)
 
 @app.route('/api/metrics/test-coverage', methods=['GET'])
@@ -251,7 +477,11 @@ def get_test_coverage_metrics():
     if not repo_id:
         return jsonify({'error': 'repository_id is required'}), 400
     
-    coverage = metrics_calculator.get_test_coverage_impact(repo_id, days, contributor_id)
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    coverage = calculator.get_test_coverage_impact(repo_id, days, contributor_id)
     return jsonify(coverage)
 
 @app.route('/api/metrics/contributors', methods=['GET'])
@@ -263,7 +493,11 @@ def get_contributor_metrics():
     if not repo_id:
         return jsonify({'error': 'repository_id is required'}), 400
     
-    stats = metrics_calculator.get_contributor_stats(repo_id, days)
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    stats = calculator.get_contributor_stats(repo_id, days)
     return jsonify(stats)
 
 @app.route('/api/charts/daily-activity', methods=['GET'])
@@ -275,7 +509,15 @@ def get_daily_activity_chart():
     if not repo_id:
         return jsonify({'error': 'repository_id is required'}), 400
     
-    activity = metrics_calculator.get_daily_activity(repo_id, days)
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    granularity, max_points, error = parse_series_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    activity = calculator.get_daily_activity(repo_id, days, granularity, max_points)
     return jsonify(activity)
 
 @app.route('/api/charts/commit-types', methods=['GET'])
@@ -287,7 +529,11 @@ def get_commit_types_chart():
     if not repo_id:
         return jsonify({'error': 'repository_id is required'}), 400
     
-    distribution = metrics_calculator.get_commit_type_distribution(repo_id, days)
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    distribution = calculator.get_commit_type_distribution(repo_id, days)
     return jsonify(distribution)
 
 @app.route('/api/charts/team-comparison', methods=['GET'])
@@ -299,9 +545,44 @@ def get_team_comparison_chart():
     if not repo_id:
         return jsonify({'error': 'repository_id is required'}), 400
     
-    comparison = metrics_calculator.get_team_comparison(repo_id, days)
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    comparison = calculator.get_team_comparison(repo_id, days)
     return jsonify(comparison)
 
+@app.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    """Get every dashboard panel, or the comma-separated ?panels= subset, in one response"""
+    repo_id = request.args.get('repository_id', type=int)
+    days = request.args.get('days', 30, type=int)
+    
+    if not repo_id:
+        return jsonify({'error': 'repository_id is required'}), 400
+    
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    panels = None
+    if request.args.get('panels'):
+        requested = {panel.strip() for panel in request.args['panels'].split(',') if panel.strip()}
+        unknown = requested - set(DASHBOARD_PANELS)
+        if unknown:
+            return jsonify({
+                'error': f"Unknown panels: {', '.join(sorted(unknown))}",
+                'panels': list(DASHBOARD_PANELS)
+            }), 400
+        panels = [panel for panel in DASHBOARD_PANELS if panel in requested]
+    
+    granularity, max_points, error = parse_series_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    dashboard = calculator.get_dashboard(repo_id, days, panels, granularity, max_points)
+    return jsonify(dashboard)
+
 @app.route('/api/contributors/<int:contributor_id>', methods=['PUT'])
 def update_contributor(contributor_id):
     """Update contributor information"""
@@ -321,6 +602,13 @@ def update_contributor(contributor_id):
     
     session.commit()
     
+    # Team and role feed into cached metrics of every repository the contributor committed to
+    repository_ids = session.query(DailyRollup.repository_id).filter(
+        DailyRollup.contributor_id == contributor_id
+    ).distinct().all()
+    for (repository_id,) in repository_ids:
+        data_versions.bump(repository_id)
+    
     return jsonify({
         'id': contributor.id,
         'name': contributor.name,
@@ -363,11 +651,16 @@ def get_contributor_detailed_metrics(contributor_id):
     if not repo_id:
         return jsonify({'error': 'repository_id is required'}), 400
     
-    metrics = metrics_calculator.get_contributor_detailed_metrics(contributor_id, repo_id, days)
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
     
-    # Add contributor info
+    metrics = calculator.get_contributor_detailed_metrics(contributor_id, repo_id, days)
+    
+    # Add contributor info (to a copy, the cached result is shared)
     contributor = session.query(Contributor).get(contributor_id)
     if contributor:
+        metrics = dict(metrics)
         metrics.update({
             'name': contributor.name,
             'email': contributor.email,
@@ -387,7 +680,15 @@ def get_contributor_activity_timeline(contributor_id):
     if not repo_id:
         return jsonify({'error': 'repository_id is required'}), 400
     
-    timeline = metrics_calculator.get_contributor_activity_timeline(contributor_id, repo_id, days)
+    calculator, error = calculator_for(repo_id, request.args.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    granularity, max_points, error = parse_series_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    timeline = calculator.get_contributor_activity_timeline(contributor_id, repo_id, days, granularity, max_points)
     return jsonify(timeline)
 
 @app.route('/api/contributors/compare', methods=['POST'])
@@ -405,9 +706,46 @@ def compare_contributors():
     if not isinstance(contributor_ids, list) or len(contributor_ids) == 0:
         return jsonify({'error': 'contributor_ids must be a non-empty list'}), 400
     
-    comparison = metrics_calculator.compare_contributors(contributor_ids, repo_id, days)
+    calculator, error = calculator_for(repo_id, data.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    comparison = calculator.compare_contributors(contributor_ids, repo_id, days)
     return jsonify(comparison)
 
+@app.route('/api/contributors/bulk-metrics', methods=['POST'])
+def get_contributors_bulk_metrics():
+    """Get detailed metrics and activity timelines for several contributors in one request"""
+    data = request.get_json()
+    
+    if not data or 'contributor_ids' not in data or 'repository_id' not in data:
+        return jsonify({'error': 'contributor_ids and repository_id are required'}), 400
+    
+    contributor_ids = data['contributor_ids']
+    repo_id = data['repository_id']
+    days = data.get('days', 30)
+    
+    if not isinstance(contributor_ids, list) or len(contributor_ids) == 0:
+        return jsonify({'error': 'contributor_ids must be a non-empty list'}), 400
+    
+    calculator, error = calculator_for(repo_id, data.get('branch'))
+    if error:
+        return jsonify({'error': error}), 404
+    
+    granularity, max_points, error = parse_series_args(data)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    bulk_metrics = calculator.get_contributors_bulk_metrics(
+        contributor_ids, repo_id, days, granularity, max_points
+    )
+    return jsonify(bulk_metrics)
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Get metrics cache hit/miss counters and memory usage"""
+    return jsonify(metrics_calculator.stats())
+
 @socketio.on('connect')
 def handle_connect():
     print('Client connected')
@@ -424,10 +762,24 @@ if __name__ == '__main__':
     print("- GET  /api/repositories")
     print("- POST /api/repositories")
     print("- POST /api/repositories/<id>/analyze")
+    print("- POST /api/repositories/<id>/jobs")
+    print("- GET  /api/jobs/<id>")
+    print("- POST /api/jobs/<id>/cancel")
+    print("- GET  /api/repositories/<id>/classification-rules")
+    print("- PUT  /api/repositories/<id>/classification-rules")
+    print("- POST /api/repositories/<id>/reclassify")
     print("- GET  /api/metrics/velocity")
     print("- GET  /api/metrics/churn")
     print("- GET  /api/metrics/contributors")
     print("- GET  /api/charts/daily-activity")
     print("- GET  /api/charts/commit-types")
+    print("- GET  /api/cache/stats")
+    
+    # Every serving process resumes; only the debug reloader's watcher (parent) process serves nothing
+    app.debug = config.DEBUG
+    if not (app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'):
+        resumed = job_manager.resume_incomplete()
+        if resumed:
+            print(f"Resumed {resumed} interrupted analysis job(s)")
     
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
+    socketio.run(app, debug=config.DEBUG, host='0.0.0.0', port=5000)
@@ -0,0 +1,111 @@
+"""
+Benchmark: commit message and file path classification throughput
+
+Generates a million commit messages and file paths (paths drawn from a pool the
+size of a large repository, so they repeat like they do across commits) and
+reports the time per million for the original implementations (lowercased
+keyword lists scanned with any(), nine uncompiled re.search calls per path)
+and the classifiers module: substring containment over precomputed keyword tuples, the Aho-Corasick
+automaton (used for large keyword sets) when pyahocorasick is installed, the single path alternation, and
+the path alternation behind the LRU memo.
+
+Usage:
+    cd backend
+    python benchmarks/bench_classifiers.py
+    python benchmarks/bench_classifiers.py --count 200000 --distinct-paths 50000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import classifiers
+from classifiers import KeywordMatcher, COMMIT_TYPE_KEYWORDS, DEFAULT_COMMIT_TYPE, is_test_path, classify_path
+
+SUBJECTS = ['feat: add', 'fix: bug in', 'Refactor', 'docs: update', 'test: cover', 'chore: bump', 'Merge branch',
+            'Implement', 'Optimize', 'Revert', 'Update']
+TOPICS = ['login flow', 'the parser', 'README', 'payment service', 'CI config', 'dependency versions',
+          'error handling', 'user settings page', 'cache invalidation', 'release notes']
+DIRECTORIES = ['src', 'src/core', 'src/components', 'tests', 'tests/unit', 'docs', 'lib/utils', 'app/models',
+               'packages/web/src', 'services/api/internal']
+EXTENSIONS = ['.py', '.js', '.ts', '.java', '.go', '.md', '.json', '.test.js', '.spec.ts', 'Test.java']
+
+
+def legacy_commit_type(message):
+    message_lower = message.lower()
+    if any(keyword in message_lower for keyword in ['test', 'spec', 'unit test', 'integration test']):
+        return 'test'
+    elif any(keyword in message_lower for keyword in ['fix', 'bug', 'hotfix', 'patch']):
+        return 'bugfix'
+    elif any(keyword in message_lower for keyword in ['refactor', 'cleanup', 'optimize']):
+        return 'refactor'
+    elif any(keyword in message_lower for keyword in ['doc', 'readme', 'comment']):
+        return 'documentation'
+    elif any(keyword in message_lower for keyword in ['feat', 'feature', 'add', 'implement']):
+        return 'feature'
+    return 'other'
+
+
+def legacy_is_test_file(file_path):
+    test_patterns = [r'\.test\.', r'\.spec\.', r'/test/', r'/tests/', r'_test\.', r'test_.*\.py$',
+                     r'.*Test\.java$', r'.*\.test\.js$', r'.*\.spec\.ts$']
+    for pattern in test_patterns:
+        if re.search(pattern, file_path, re.IGNORECASE):
+            return True
+    return False
+
+
+def generate(count, distinct_paths, seed=42):
+    rng = random.Random(seed)
+    messages = [
+        f'{rng.choice(SUBJECTS)} {rng.choice(TOPICS)}\n\n' + ' '.join(rng.choice(TOPICS) for _ in range(rng.randint(0, 12)))
+        for _ in range(count)
+    ]
+    pool = [
+        f'{rng.choice(DIRECTORIES)}/module_{index}{rng.choice(EXTENSIONS)}' for index in range(distinct_paths)
+    ]
+    # Recently touched files are touched again, like in real histories
+    paths = [pool[min(int(rng.expovariate(1 / (distinct_paths / 20))), distinct_paths - 1)] for _ in range(count)]
+    return messages, paths
+
+
+def measure(label, function, items):
+    started = time.perf_counter()
+    for item in items:
+        function(item)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<48} {elapsed * 1000000 / len(items):>8.2f} s per million {len(items) / elapsed / 1000000:>8.2f} M/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--distinct-paths', type=int, default=100000)
+    args = parser.parse_args()
+
+    messages, paths = generate(args.count, args.distinct_paths)
+    print(f"{args.count} messages, {args.count} paths ({len(set(paths))} distinct)\n")
+
+    measure('messages: keyword lists with any() (original)', legacy_commit_type, messages)
+    matcher = KeywordMatcher(COMMIT_TYPE_KEYWORDS, DEFAULT_COMMIT_TYPE, use_automaton=False)
+    measure('messages: keyword tuples, no any() generator', lambda message: matcher.match(message.lower()), messages)
+    if classifiers.ahocorasick:
+        automaton = KeywordMatcher(COMMIT_TYPE_KEYWORDS, DEFAULT_COMMIT_TYPE, use_automaton=True)
+        measure('messages: Aho-Corasick automaton', lambda message: automaton.match(message.lower()), messages)
+    else:
+        print('messages: Aho-Corasick automaton                 skipped, pyahocorasick not installed')
+
+    measure('paths: nine re.search calls (original)', legacy_is_test_file, paths)
+    measure('paths: single compiled alternation', is_test_path, paths)
+    classify_path.cache_clear()
+    measure('paths: alternation + extension behind LRU memo', classify_path, paths)
+    info = classify_path.cache_info()
+    print(f"memo: {info.hits} hits, {info.misses} misses, maxsize {info.maxsize}")
+
+
+if __name__ == '__main__':
+    main()
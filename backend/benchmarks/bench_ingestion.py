@@ -0,0 +1,136 @@
+"""
+Benchmark: streaming git log ingestion vs. GitPython per-commit stats
+
+Generates a synthetic repository with git fast-import, ingests it with both
+backends into fresh SQLite databases and compares time, peak Python memory
+and the resulting rows.
+
+Usage:
+    cd backend
+    python benchmarks/bench_ingestion.py --commits 5000 --files 200
+    python benchmarks/bench_ingestion.py --commits 20000 --workers 8 --skip-gitpython
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models import create_database, Commit, CommitFile, FilePath
+from git_analyzer import GitAnalyzer
+
+
+def generate_repository(path, commit_count, file_count, seed=42):
+    """Create a repository with commit_count commits touching a pool of file_count files"""
+    rng = random.Random(seed)
+    subprocess.run(['git', 'init', '-q', path], check=True)
+
+    authors = [(f'Dev {i}', f'dev{i}@example.com') for i in range(20)]
+    prefixes = ['feat: add', 'fix: bug in', 'refactor', 'docs: update', 'test: cover', 'chore']
+    directories = ['src', 'src/core', 'tests', 'docs', 'lib/utils']
+    files = [f'{rng.choice(directories)}/module_{i}.py' for i in range(file_count)]
+
+    lines = []
+    timestamp = 1600000000
+    for index in range(commit_count):
+        name, email = rng.choice(authors)
+        timestamp += rng.randint(60, 7200)
+        message = f'{rng.choice(prefixes)} change {index}\n'.encode()
+        lines.append(b'commit refs/heads/main\n')
+        lines.append(f'mark :{index + 1}\n'.encode())
+        lines.append(f'committer {name} <{email}> {timestamp} +0000\n'.encode())
+        lines.append(f'data {len(message)}\n'.encode() + message)
+        if index > 0:
+            lines.append(f'from :{index}\n'.encode())
+        for file_path in rng.sample(files, rng.randint(1, 5)):
+            content = ('\n'.join(str(rng.random()) for _ in range(rng.randint(1, 30))) + '\n').encode()
+            lines.append(f'M 100644 inline {file_path}\n'.encode())
+            lines.append(f'data {len(content)}\n'.encode() + content)
+        lines.append(b'\n')
+
+    subprocess.run(['git', 'fast-import', '--quiet'], cwd=path, input=b''.join(lines), check=True)
+    subprocess.run(['git', 'checkout', '-q', 'main'], cwd=path, check=True)
+
+
+def run_backend(repo_path, backend, db_path, workers=1):
+    """Ingest the repository with one backend and return timing, memory and row summary"""
+    engine, Session = create_database(db_path)
+    session = Session()
+    analyzer = GitAnalyzer(session)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    processed = analyzer.analyze_repository(repo_path, 1, backend=backend, workers=workers)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    commits = session.query(
+        Commit.sha, Commit.files_changed, Commit.lines_added, Commit.lines_deleted, Commit.commit_type
+    ).order_by(Commit.sha).all()
+    files = session.query(
+        Commit.sha, FilePath.path, CommitFile.lines_added, CommitFile.lines_deleted
+    ).join(Commit, Commit.id == CommitFile.commit_id).join(
+        FilePath, FilePath.id == CommitFile.path_id
+    ).order_by(Commit.sha, FilePath.path).all()
+    session.close()
+    engine.dispose()
+
+    return {
+        'processed': processed,
+        'seconds': elapsed,
+        'peak_mb': peak / (1024 * 1024),
+        'rows': ([tuple(row) for row in commits], [tuple(row) for row in files])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commits', type=int, default=2000)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--skip-gitpython', action='store_true', help='only run the streaming backend')
+    parser.add_argument('--workers', type=int, default=1, help='also run the streaming backend with N worker processes')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='codetide-bench-')
+    try:
+        repo_path = os.path.join(work_dir, 'repo')
+        print(f"Generating repository with {args.commits} commits...")
+        generate_repository(repo_path, args.commits, args.files)
+
+        runs = [('log', 'log', 1)]
+        if args.workers > 1:
+            runs.append((f'log x{args.workers}', 'log', args.workers))
+        if not args.skip_gitpython:
+            runs.append(('gitpython', 'gitpython', 1))
+        
+        results = {}
+        for label, backend, workers in runs:
+            db_path = os.path.join(work_dir, f'{backend}-{workers}.db')
+            results[label] = run_backend(repo_path, backend, db_path, workers)
+            result = results[label]
+            print(f"{label:>10}: {result['processed']} commits in {result['seconds']:.2f}s "
+                  f"({result['processed'] / max(result['seconds'], 1e-9):.0f} commits/s), "
+                  f"peak Python memory {result['peak_mb']:.1f} MB")
+
+        if args.workers > 1:
+            parallel = results[f'log x{args.workers}']
+            print(f"Parallel rows identical: {parallel['rows'] == results['log']['rows']}")
+        
+        if 'gitpython' in results:
+            identical = results['log']['rows'] == results['gitpython']['rows']
+            speedup = results['gitpython']['seconds'] / max(results['log']['seconds'], 1e-9)
+            print(f"Rows identical: {identical}")
+            print(f"Speedup: {speedup:.1f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
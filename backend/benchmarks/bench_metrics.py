@@ -0,0 +1,209 @@
+"""
+Benchmark: aggregate-only metrics engine vs. loading Commit rows into Python
+
+Fills a SQLite database with synthetic commits (1M by default), then measures
+latency and peak Python memory of every MetricsCalculator method for lifetime,
+30-day and year-to-date windows. The row-materializing implementations the
+engine replaced are kept here as a baseline for the two methods that used them.
+
+Usage:
+    cd backend
+    python benchmarks/bench_metrics.py --commits 1000000
+    python benchmarks/bench_metrics.py --commits 200000 --db /tmp/metrics_bench.db --reuse
+    python benchmarks/bench_metrics.py --db /tmp/metrics_bench.db --reuse --engine frames --skip-legacy
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import insert, and_, func
+from models import create_database, Repository, Contributor, Commit, CommitFile, FilePath
+from metrics_calculator import MetricsCalculator
+from frames import FrameMetricsCalculator
+from rollups import rebuild_daily_rollups
+from path_index import intern_paths
+
+INSERT_CHUNK_SIZE = 50000
+COMMIT_TYPES = ['feature', 'bugfix', 'refactor', 'test', 'documentation', 'other']
+FILE_TYPES = ['.py', '.js', '.ts', '.md', '.json']
+
+
+def populate(session, commit_count, contributor_count, seed=42):
+    """Insert commit_count commits spread over ~3 years, with 1-3 files each"""
+    rng = random.Random(seed)
+    session.add(Repository(id=1, name='bench', path='/tmp/bench'))
+    session.add_all([
+        Contributor(id=i, name=f'Dev {i}', email=f'dev{i}@example.com', team=f'Team {i % 8}')
+        for i in range(1, contributor_count + 1)
+    ])
+    session.commit()
+
+    # A pool of paths, each with its own type and test flag, shared by all commits
+    path_pool = []
+    for index in range(5001):
+        file_type = rng.choice(FILE_TYPES)
+        path_pool.append((f'src/module_{index}{file_type}', file_type, rng.random() < 0.25))
+    path_ids = intern_paths(session, 1, path_pool)
+    pool_ids = [path_ids[path] for path, _, _ in path_pool]
+
+    now = datetime.utcnow()
+    span_minutes = 3 * 365 * 24 * 60
+    commit_rows, file_rows = [], []
+    for index in range(commit_count):
+        commit_id = index + 1
+        file_total = rng.randint(1, 3)
+        added = deleted = 0
+        for file_index in range(file_total):
+            lines_added, lines_deleted = rng.randint(0, 80), rng.randint(0, 30)
+            added += lines_added
+            deleted += lines_deleted
+            file_rows.append({
+                'commit_id': commit_id,
+                'path_id': pool_ids[rng.randint(0, 5000)],
+                'lines_added': lines_added,
+                'lines_deleted': lines_deleted
+            })
+        commit_rows.append({
+            'id': commit_id,
+            'sha': f'{index:040x}',
+            'repository_id': 1,
+            'contributor_id': rng.randint(1, contributor_count),
+            'message': f'{rng.choice(COMMIT_TYPES)}: synthetic change {index} ' + 'x' * rng.randint(20, 200),
+            'commit_date': now - timedelta(minutes=rng.randint(0, span_minutes)),
+            'files_changed': file_total,
+            'lines_added': added,
+            'lines_deleted': deleted,
+            'commit_type': rng.choice(COMMIT_TYPES),
+            'branch_name': 'main'
+        })
+
+        if len(commit_rows) >= INSERT_CHUNK_SIZE:
+            session.execute(insert(Commit.__table__), commit_rows)
+            session.execute(insert(CommitFile.__table__), file_rows)
+            commit_rows, file_rows = [], []
+            print(f"  inserted {index + 1} commits")
+    if commit_rows:
+        session.execute(insert(Commit.__table__), commit_rows)
+        session.execute(insert(CommitFile.__table__), file_rows)
+
+    rebuild_daily_rollups(session, 1)
+    session.commit()
+
+
+def legacy_commit_velocity(session, repository_id, days):
+    """Previous implementation: load every Commit row, count and min() in Python"""
+    end_date = datetime.utcnow()
+    query = session.query(Commit).filter(Commit.repository_id == repository_id)
+    if days:
+        start_date = datetime(end_date.year, 1, 1) if days == 365 else end_date - timedelta(days=days)
+        query = query.filter(Commit.commit_date >= start_date, Commit.commit_date <= end_date)
+    commits = query.all()
+    if not commits:
+        return 0
+    if days == 0:
+        first_commit = min(commits, key=lambda c: c.commit_date)
+        return len(commits) / max((end_date - first_commit.commit_date).days, 1)
+    return len(commits) / max(days, 1)
+
+
+def legacy_contributor_detailed_metrics(session, contributor_id, repository_id, days):
+    """Previous implementation: load the contributor's Commit rows and build histograms in Python"""
+    end_date = datetime.utcnow()
+    conditions = [Commit.contributor_id == contributor_id, Commit.repository_id == repository_id]
+    if days:
+        start_date = datetime(end_date.year, 1, 1) if days == 365 else end_date - timedelta(days=days)
+        conditions += [Commit.commit_date >= start_date, Commit.commit_date <= end_date]
+    commits = session.query(Commit).filter(and_(*conditions)).all()
+
+    commit_types, activity_pattern = {}, {}
+    for commit in commits:
+        commit_types[commit.commit_type or 'other'] = commit_types.get(commit.commit_type or 'other', 0) + 1
+        activity_pattern[commit.commit_date.hour] = activity_pattern.get(commit.commit_date.hour, 0) + 1
+    commit_ids = [c.id for c in commits]
+    file_types = session.query(
+        FilePath.file_type, func.count(CommitFile.id)
+    ).join(FilePath, FilePath.id == CommitFile.path_id).filter(
+        CommitFile.commit_id.in_(commit_ids)
+    ).group_by(FilePath.file_type).all() if commit_ids else []
+    return len(commits), commit_types, activity_pattern, file_types
+
+
+def measure(label, function, repeat):
+    """Best-of-repeat latency and peak traced memory of one call"""
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"{label:<55} {min(timings) * 1000:>10.1f} ms {peak / 1024 / 1024:>10.2f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commits', type=int, default=1000000)
+    parser.add_argument('--contributors', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--db', help='Database file (default: a temporary file)')
+    parser.add_argument('--reuse', action='store_true', help='Reuse an already populated --db')
+    parser.add_argument('--skip-legacy', action='store_true', help='Skip the row-materializing baselines')
+    parser.add_argument('--engine', choices=('sql', 'frames'), default='sql', help='Metrics engine to measure')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'metrics_bench.db')
+    engine, Session = create_database(db_path)
+    session = Session()
+    if not (args.reuse and session.query(Commit.id).first()):
+        print(f"Populating {db_path} with {args.commits} commits...")
+        started = time.perf_counter()
+        populate(session, args.commits, args.contributors)
+        print(f"Populated in {time.perf_counter() - started:.1f}s")
+
+    if args.engine == 'frames':
+        calculator = FrameMetricsCalculator(session)
+        # The first call loads the repository frame, later calls only read it
+        measure('frame load', lambda: (calculator.frames.clear(), calculator.get_commit_velocity(1, 0)), 1)
+        print(f"Frame size: {calculator.frames.stats()['bytes'] / 1024 / 1024:.1f} MiB")
+    else:
+        calculator = MetricsCalculator(session)
+    busiest = session.query(Commit.contributor_id).group_by(Commit.contributor_id).order_by(
+        func.count(Commit.id).desc()
+    ).first()[0]
+
+    print(f"\n{'call':<55} {'latency':>13} {'peak memory':>14}")
+    for days in (0, 30, 365):
+        print(f"-- days={days}")
+        measure('get_commit_velocity', lambda: calculator.get_commit_velocity(1, days), args.repeat)
+        measure('get_code_churn', lambda: calculator.get_code_churn(1, days), args.repeat)
+        measure('get_test_coverage_impact', lambda: calculator.get_test_coverage_impact(1, days), args.repeat)
+        measure('get_contributor_stats', lambda: calculator.get_contributor_stats(1, days), args.repeat)
+        measure('get_commit_type_distribution', lambda: calculator.get_commit_type_distribution(1, days), args.repeat)
+        measure('get_daily_activity', lambda: calculator.get_daily_activity(1, days), args.repeat)
+        measure('get_team_comparison', lambda: calculator.get_team_comparison(1, days), args.repeat)
+        measure('get_contributor_detailed_metrics',
+                lambda: calculator.get_contributor_detailed_metrics(busiest, 1, days), args.repeat)
+        measure('get_contributor_activity_timeline',
+                lambda: calculator.get_contributor_activity_timeline(busiest, 1, days), args.repeat)
+        if not args.skip_legacy:
+            measure('  legacy commit velocity (ORM rows)',
+                    lambda: legacy_commit_velocity(session, 1, days), 1)
+            measure('  legacy contributor detailed metrics (ORM rows)',
+                    lambda: legacy_contributor_detailed_metrics(session, busiest, 1, days), 1)
+            session.expunge_all()
+
+    session.close()
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
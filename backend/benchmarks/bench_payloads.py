@@ -0,0 +1,101 @@
+"""
+Benchmark: serialization and transfer of the largest API payloads
+
+Builds the lifetime daily activity, dashboard, contributor stats and bulk
+contributor metrics/timelines payloads from a synthetic database, then reports
+for each serializer (Flask's json provider vs orjson) and content coding
+(identity, gzip, brotli) the encode time, body size and the estimated time to
+send it over a link of --mbps.
+
+Usage:
+    cd backend
+    python benchmarks/bench_payloads.py --commits 200000
+    python benchmarks/bench_payloads.py --db /tmp/metrics_bench.db --reuse --mbps 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import func
+from models import create_database, Commit
+from metrics_calculator import MetricsCalculator
+from serialization import OrjsonProvider, orjson
+from compression import compress, brotli
+from bench_metrics import populate
+
+
+def best_of(function, repeat):
+    """Best-of-repeat wall time of one call, and its result"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commits', type=int, default=200000)
+    parser.add_argument('--contributors', type=int, default=200)
+    parser.add_argument('--timelines', type=int, default=25, help='Contributors in the bulk metrics payload')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--mbps', type=float, default=20.0, help='Link speed for the transfer estimate')
+    parser.add_argument('--db', help='Database file (default: a temporary file)')
+    parser.add_argument('--reuse', action='store_true', help='Reuse an already populated --db')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'payload_bench.db')
+    engine, Session = create_database(db_path)
+    session = Session()
+    if not (args.reuse and session.query(Commit.id).first()):
+        print(f"Populating {db_path} with {args.commits} commits...")
+        populate(session, args.commits, args.contributors)
+
+    calculator = MetricsCalculator(session)
+    top_contributors = [row[0] for row in session.query(Commit.contributor_id).group_by(
+        Commit.contributor_id
+    ).order_by(func.count(Commit.id).desc()).limit(args.timelines)]
+    payloads = {
+        'daily-activity (lifetime)': calculator.get_daily_activity(1, 0),
+        'dashboard (lifetime)': calculator.get_dashboard(1, 0),
+        'contributor stats (lifetime)': calculator.get_contributor_stats(1, 0),
+        f'bulk metrics x{len(top_contributors)} (lifetime)': calculator.get_contributors_bulk_metrics(top_contributors, 1, 0)
+    }
+
+    app = Flask(__name__)
+    serializers = {'json': DefaultJSONProvider(app)}
+    if orjson:
+        serializers['orjson'] = OrjsonProvider(app)
+    encodings = ['identity', 'gzip'] + (['br'] if brotli else [])
+    bytes_per_second = args.mbps * 1000 * 1000 / 8
+
+    print(f"\n{'payload':<34} {'serializer':<8} {'coding':<9} {'encode':>10} {'size':>12} {'transfer':>10} {'total':>10}")
+    for label, payload in payloads.items():
+        for name, provider in serializers.items():
+            with app.app_context():
+                serialize_time, response = best_of(lambda: provider.response(payload), args.repeat)
+            body = response.get_data()
+            for encoding in encodings:
+                if encoding == 'identity':
+                    compress_time, data = 0.0, body
+                else:
+                    compress_time, data = best_of(lambda: compress(body, encoding), args.repeat)
+                encode_time = serialize_time + compress_time
+                transfer_time = len(data) / bytes_per_second
+                print(f"{label:<34} {name:<8} {encoding:<9} {encode_time * 1000:>7.1f} ms "
+                      f"{len(data) / 1024:>9.1f} KiB {transfer_time * 1000:>7.1f} ms "
+                      f"{(encode_time + transfer_time) * 1000:>7.1f} ms")
+
+    session.close()
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
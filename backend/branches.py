@@ -0,0 +1,186 @@
+"""
+Branch membership as compressed bitsets over commit ids, from one reachability walk over the branch tips
+"""
+import zlib
+from datetime import datetime
+import numpy as np
+from sqlalchemy import update, bindparam
+from models import Commit, BranchBitmap
+from git_log_reader import iter_rev_list_parents, is_ancestor
+
+# Refs that are branches; the branch name is the ref name without the prefix
+BRANCH_REF_PREFIXES = ('refs/heads/', 'refs/remotes/')
+
+# SHAs per IN (...) lookup, below SQLite's bound variable limit
+SHA_LOOKUP_CHUNK_SIZE = 500
+
+
+def branch_tips(ref_tips):
+    """{branch_name: (ref_name, tip_sha)} of the branch refs among ref_tips, remote HEAD aliases skipped"""
+    branches = {}
+    for ref_name, sha in ref_tips.items():
+        for prefix in BRANCH_REF_PREFIXES:
+            if ref_name.startswith(prefix) and not ref_name.endswith('/HEAD'):
+                branches[ref_name[len(prefix):]] = (ref_name, sha)
+    return branches
+
+
+def encode_members(commit_ids):
+    """zlib-compressed bitset with the bits of commit_ids set; long runs of either value compress to almost nothing"""
+    commit_ids = np.asarray(commit_ids, dtype=np.int64)
+    bits = np.zeros(int(commit_ids.max()) + 1 if len(commit_ids) else 0, dtype=bool)
+    bits[commit_ids] = True
+    return zlib.compress(np.packbits(bits, bitorder='little').tobytes())
+
+
+def decode_members(members):
+    """Sorted commit ids of a bitset made by encode_members"""
+    packed = np.frombuffer(zlib.decompress(members), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(packed, bitorder='little'))
+
+
+def reachable_ids(repo_path, tips, commit_ids):
+    """Stored commit ids reachable from each tip, for all tips with a single walk
+
+    Every commit's mask of the tips reaching it is final once git lists it (topological order puts
+    children first) and is passed on to its parents. Commits are then grouped by mask, there are
+    only as many distinct masks as the branch topology allows, and each group is handed to the
+    branches in its mask. commit_ids maps SHAs to ids; commits not stored are skipped.
+    """
+    pending = {}
+    for position, sha in enumerate(tips):
+        pending[sha] = pending.get(sha, 0) | (1 << position)
+
+    groups = {}
+    for sha, parents in iter_rev_list_parents(repo_path, sorted(set(tips))):
+        mask = pending.pop(sha, 0)
+        for parent in parents:
+            pending[parent] = pending.get(parent, 0) | mask
+        commit_id = commit_ids.get(sha)
+        if commit_id is not None:
+            groups.setdefault(mask, []).append(commit_id)
+
+    parts = [[] for _ in tips]
+    for mask, ids in groups.items():
+        ids = np.array(ids, dtype=np.int64)
+        position = 0
+        while mask:
+            if mask & 1:
+                parts[position].append(ids)
+            mask >>= 1
+            position += 1
+    return [np.sort(np.concatenate(part)) if part else np.zeros(0, dtype=np.int64) for part in parts]
+
+
+def _ids_by_sha(session, repository_id, shas):
+    """Ids of the stored commits among shas"""
+    ids = []
+    for start in range(0, len(shas), SHA_LOOKUP_CHUNK_SIZE):
+        ids.extend(commit_id for (commit_id,) in session.query(Commit.id).filter(
+            Commit.repository_id == repository_id,
+            Commit.sha.in_(shas[start:start + SHA_LOOKUP_CHUNK_SIZE])
+        ))
+    return np.array(sorted(ids), dtype=np.int64)
+
+
+def get_branch_members(session, repository_id, branch_name):
+    """Sorted commit ids of a branch, or None when the repository has no such branch"""
+    members = session.query(BranchBitmap.members).filter_by(
+        repository_id=repository_id, branch_name=branch_name
+    ).scalar()
+    return None if members is None else decode_members(members)
+
+
+def update_branch_bitmaps(session, repo_path, repository_id, ref_tips, default_branch=None):
+    """Bring the stored branch bitmaps up to ref_tips, returns the names of the branches that changed
+
+    Branches whose tip didn't move are left alone, fast-forwarded ones only walk old_tip..new_tip,
+    new and rewritten branches share one reachability walk. Commits newly reached by a branch get
+    their branch_name relabelled, see label_commit_branches.
+    """
+    branches = branch_tips(ref_tips)
+    stored = {row.branch_name: row for row in session.query(BranchBitmap).filter_by(repository_id=repository_id)}
+    for branch_name, row in stored.items():
+        if branch_name not in branches:
+            session.delete(row)
+
+    members = {}
+    added = []
+    rebuild = []
+    for branch_name, (ref_name, tip_sha) in branches.items():
+        row = stored.get(branch_name)
+        if row is not None and row.tip_sha == tip_sha:
+            continue
+        if row is not None and is_ancestor(repo_path, row.tip_sha, tip_sha):
+            new_shas = [sha for sha, _ in iter_rev_list_parents(repo_path, [tip_sha, f'^{row.tip_sha}'])]
+            new_ids = _ids_by_sha(session, repository_id, new_shas)
+            members[branch_name] = np.union1d(decode_members(row.members), new_ids)
+            added.append(new_ids)
+        else:
+            rebuild.append(branch_name)
+
+    if rebuild:
+        commit_ids = dict(session.query(Commit.sha, Commit.id).filter(Commit.repository_id == repository_id))
+        tips = [branches[branch_name][1] for branch_name in rebuild]
+        for branch_name, ids in zip(rebuild, reachable_ids(repo_path, tips, commit_ids)):
+            members[branch_name] = ids
+            added.append(ids)
+
+    now = datetime.utcnow()
+    for branch_name, ids in members.items():
+        ref_name, tip_sha = branches[branch_name]
+        row = stored.get(branch_name) or BranchBitmap(repository_id=repository_id, branch_name=branch_name)
+        row.ref_name = ref_name
+        row.tip_sha = tip_sha
+        row.commit_count = len(ids)
+        row.members = encode_members(ids)
+        row.updated_at = now
+        session.add(row)
+
+    if added:
+        bitmaps = {
+            branch_name: members[branch_name] if branch_name in members else decode_members(stored[branch_name].members)
+            for branch_name in branches
+        }
+        label_commit_branches(
+            session, repository_id, np.unique(np.concatenate(added)), bitmaps,
+            {branch_name: ref_name for branch_name, (ref_name, _) in branches.items()}, default_branch
+        )
+    return sorted(members)
+
+
+def label_commit_branches(session, repository_id, commit_ids, bitmaps, ref_names, default_branch=None):
+    """Set Commit.branch_name of commit_ids to the first branch containing them, returns rows changed
+
+    Branches are tried default branch first, then local branches, then remote-tracking ones, each
+    by name. Commits no branch reaches (only tags or a detached HEAD) keep their label.
+    """
+    order = sorted(bitmaps, key=lambda branch_name: (
+        branch_name != default_branch, not ref_names[branch_name].startswith('refs/heads/'), branch_name
+    ))
+    labels = {}
+    remaining = commit_ids
+    for branch_name in order:
+        reached = np.isin(remaining, bitmaps[branch_name])
+        labels.update(dict.fromkeys(remaining[reached].tolist(), branch_name))
+        remaining = remaining[~reached]
+
+    if not labels:
+        return 0
+    # New commits have the highest ids, so this only reads the tail of an incrementally updated repository
+    current = session.query(Commit.id, Commit.branch_name).filter(
+        Commit.repository_id == repository_id,
+        Commit.id >= int(commit_ids[0])
+    )
+    changes = [
+        {'commit_id': commit_id, 'label': labels[commit_id]}
+        for commit_id, branch_name in current
+        if commit_id in labels and labels[commit_id] != branch_name
+    ]
+    if changes:
+        table = Commit.__table__
+        session.execute(
+            update(table).where(table.c.id == bindparam('commit_id')).values(branch_name=bindparam('label')),
+            changes
+        )
+    return len(changes)
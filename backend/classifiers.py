@@ -0,0 +1,199 @@
+"""
+Commit message and file path classifiers: precompiled matchers plus a memo for repeated paths
+
+The built-in rules below apply unless a repository has its own rule set stored, see load_rules.
+"""
+import json
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+from models import ClassificationRuleSet
+import config
+
+try:
+    import ahocorasick
+except ImportError:  # optional dependency
+    ahocorasick = None
+
+# Checked in order, the first type with a keyword anywhere in the lowercased message wins
+COMMIT_TYPE_KEYWORDS = (
+    ('test', ('test', 'spec', 'unit test', 'integration test')),
+    ('bugfix', ('fix', 'bug', 'hotfix', 'patch')),
+    ('refactor', ('refactor', 'cleanup', 'optimize')),
+    ('documentation', ('doc', 'readme', 'comment')),
+    ('feature', ('feat', 'feature', 'add', 'implement'))
+)
+DEFAULT_COMMIT_TYPE = 'other'
+
+# Keyword count from which the Aho-Corasick automaton (when installed) beats substring checks;
+# for the built-in twenty keywords the Python-level loop over automaton hits costs more
+AUTOMATON_MIN_KEYWORDS = 64
+
+# A path matching any of these (case-insensitively) is a test file. Searches may start anywhere,
+# so no pattern needs a leading .* (which would rescan the rest of the path at every position)
+TEST_PATH_PATTERNS = (
+    r'\.test\.',
+    r'\.spec\.',
+    r'/test/',
+    r'/tests/',
+    r'_test\.',
+    r'test_.*\.py$',
+    r'Test\.java$',
+    r'\.test\.js$',
+    r'\.spec\.ts$'
+)
+
+# Hashable (and picklable, worker processes get it) description of a rule set
+Rules = namedtuple('Rules', ['commit_types', 'default_commit_type', 'test_path_patterns'])
+DEFAULT_RULES = Rules(COMMIT_TYPE_KEYWORDS, DEFAULT_COMMIT_TYPE, TEST_PATH_PATTERNS)
+
+
+def compile_test_path_patterns(patterns):
+    """One case-insensitive alternation of all patterns, a path is tested with a single search"""
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+
+
+TEST_PATH_RE = compile_test_path_patterns(TEST_PATH_PATTERNS)
+
+
+class KeywordMatcher:
+    """Finds the first group (by priority) that has a keyword in a text
+
+    For large keyword sets with pyahocorasick installed an Aho-Corasick automaton reports every
+    keyword occurrence in a single pass; otherwise each group's keywords are tested with substring
+    containment in priority order, which for a handful of short literals beats a compiled alternation.
+    """
+
+    def __init__(self, groups, default, use_automaton=None):
+        self.names = [name for name, _ in groups]
+        self.default = default
+        if use_automaton is None:
+            use_automaton = ahocorasick is not None and sum(
+                len(keywords) for _, keywords in groups
+            ) >= AUTOMATON_MIN_KEYWORDS
+        self._automaton = None
+        self._groups = None
+        if use_automaton:
+            automaton = ahocorasick.Automaton()
+            for priority, (_, keywords) in enumerate(groups):
+                for keyword in keywords:
+                    # A keyword listed in several groups counts for the first of them
+                    if keyword not in automaton:
+                        automaton.add_word(keyword, priority)
+            automaton.make_automaton()
+            self._automaton = automaton
+        else:
+            self._groups = [(name, tuple(keywords)) for name, keywords in groups]
+
+    def match(self, text):
+        if self._automaton is not None:
+            best = len(self.names)
+            for _, priority in self._automaton.iter(text):
+                if priority < best:
+                    best = priority
+                    if not best:
+                        break
+            return self.names[best] if best < len(self.names) else self.default
+
+        for name, keywords in self._groups:
+            for keyword in keywords:
+                if keyword in text:
+                    return name
+        return self.default
+
+
+class Classifier:
+    """Commit type and test file classification under one rule set"""
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = rules
+        self.commit_type_matcher = KeywordMatcher(rules.commit_types, rules.default_commit_type)
+        self.test_path_re = compile_test_path_patterns(rules.test_path_patterns)
+        # Per instance, so rule sets never share memoized answers
+        self.classify_path = lru_cache(maxsize=config.PATH_CLASSIFIER_CACHE_SIZE)(self._classify_path)
+
+    def classify_message(self, message):
+        """Commit type of a commit message"""
+        return self.commit_type_matcher.match((message or '').lower())
+
+    def is_test_path(self, file_path):
+        return self.test_path_re.search(file_path) is not None
+
+    def _classify_path(self, file_path):
+        """(file type, is test file) of a path; memoized, the same paths come back in commit after commit"""
+        return os.path.splitext(file_path)[1], self.is_test_path(file_path)
+
+
+default_classifier = Classifier()
+commit_type_matcher = default_classifier.commit_type_matcher
+classify_message = default_classifier.classify_message
+is_test_path = default_classifier.is_test_path
+classify_path = default_classifier.classify_path
+
+
+@lru_cache(maxsize=32)
+def classifier_for(rules):
+    """Shared Classifier of a rule set, so its matchers are compiled once per process"""
+    return default_classifier if rules == DEFAULT_RULES else Classifier(rules)
+
+
+def parse_rules(data):
+    """Rules from the API representation (see rules_to_dict), returns (rules, error)
+
+    Omitted parts keep their built-in value. Keywords are lowercased, messages are matched lowercased.
+    """
+    if not isinstance(data, dict):
+        return None, 'Classification rules must be an object'
+
+    commit_types = COMMIT_TYPE_KEYWORDS
+    if 'commit_types' in data:
+        if not isinstance(data['commit_types'], list):
+            return None, 'commit_types must be a list'
+        commit_types = []
+        for entry in data['commit_types']:
+            if (not isinstance(entry, dict) or not isinstance(entry.get('type'), str) or not entry['type']
+                    or not isinstance(entry.get('keywords'), list)
+                    or not all(isinstance(keyword, str) and keyword for keyword in entry['keywords'])):
+                return None, 'commit_types entries need a type and a list of non-empty keywords'
+            commit_types.append((entry['type'], tuple(keyword.lower() for keyword in entry['keywords'])))
+        commit_types = tuple(commit_types)
+
+    default_commit_type = data.get('default_commit_type', DEFAULT_COMMIT_TYPE)
+    if not isinstance(default_commit_type, str) or not default_commit_type:
+        return None, 'default_commit_type must be a non-empty string'
+    if max([len(default_commit_type)] + [len(name) for name, _ in commit_types]) > 50:
+        return None, 'Commit types are limited to 50 characters'
+
+    test_path_patterns = data.get('test_path_patterns', list(TEST_PATH_PATTERNS))
+    if not isinstance(test_path_patterns, list) or not all(isinstance(pattern, str) and pattern
+                                                           for pattern in test_path_patterns):
+        return None, 'test_path_patterns must be a list of non-empty regular expressions'
+    for pattern in test_path_patterns:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            return None, f'Invalid test path pattern {pattern!r}: {e}'
+
+    return Rules(commit_types, default_commit_type, tuple(test_path_patterns)), None
+
+
+def rules_to_dict(rules):
+    return {
+        'commit_types': [{'type': name, 'keywords': list(keywords)} for name, keywords in rules.commit_types],
+        'default_commit_type': rules.default_commit_type,
+        'test_path_patterns': list(rules.test_path_patterns)
+    }
+
+
+def load_rules(session, repository_id):
+    """Stored rule set of a repository, the built-in rules when it has none"""
+    row = session.query(ClassificationRuleSet).filter_by(repository_id=repository_id).first()
+    if row is None:
+        return DEFAULT_RULES
+    rules, _ = parse_rules({
+        'commit_types': json.loads(row.commit_types),
+        'default_commit_type': row.default_commit_type,
+        'test_path_patterns': json.loads(row.test_path_patterns)
+    })
+    return rules
@@ -0,0 +1,70 @@
+"""
+Negotiated gzip/brotli compression of API responses above a size threshold
+"""
+import gzip
+from flask import request
+import config
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+def available_encodings():
+    """Content codings this process can produce, preferred first"""
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def choose_encoding(accept_encodings):
+    """Pick the preferred coding the client accepts, or None to send the body as is"""
+    for encoding in available_encodings():
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, gzip_level=None, brotli_quality=None):
+    if encoding == 'br':
+        quality = config.BROTLI_QUALITY if brotli_quality is None else brotli_quality
+        return brotli.compress(data, quality=quality)
+    level = config.GZIP_LEVEL if gzip_level is None else gzip_level
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def init_compression(app, min_bytes=None):
+    """Compress app's responses of at least min_bytes for clients that accept it
+
+    Register this before any after_request hook that sets headers the compressed
+    response should keep (ETags), Flask runs after_request hooks last-registered first.
+    """
+    min_bytes = config.COMPRESSION_MIN_BYTES if min_bytes is None else min_bytes
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        # Responses of the same URL differ by coding from here on
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        # A strong ETag names one exact byte sequence, each coding gets its own
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
+        return response
+
+    return compress_response
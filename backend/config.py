@@ -0,0 +1,66 @@
+"""
+Runtime settings for the CodeTide backend, overridable through environment variables
+"""
+import os
+
+# Number of worker processes used to parse and classify commits during analysis (1 = in-process)
+INGEST_WORKERS = int(os.environ.get('CODETIDE_INGEST_WORKERS', '1'))
+
+# Commits handed to a worker process at a time in parallel ingestion
+INGEST_SHARD_SIZE = int(os.environ.get('CODETIDE_INGEST_SHARD_SIZE', '1000'))
+
+# Distinct file paths whose classification (file type, test file) is memoized per process
+PATH_CLASSIFIER_CACHE_SIZE = int(os.environ.get('CODETIDE_PATH_CLASSIFIER_CACHE_SIZE', '65536'))
+
+# Commit id range rewritten per UPDATE (and transaction) when reclassifying stored commits
+RECLASSIFY_CHUNK_SIZE = int(os.environ.get('CODETIDE_RECLASSIFY_CHUNK_SIZE', '50000'))
+
+# How repositories added by URL are cloned: 'checkout' makes a working-tree clone refreshed with
+# git pull, 'mirror' (opt-in) a bare object store without working tree refreshed with git fetch --prune
+CLONE_MODE = os.environ.get('CODETIDE_CLONE_MODE', 'checkout')
+
+# Run the development server with Flask debug mode and its auto-reloader
+DEBUG = os.environ.get('CODETIDE_DEBUG', 'true').lower() in ('1', 'true', 'yes')
+
+# Analysis jobs allowed to run at the same time; further jobs wait in the queue
+JOB_WORKERS = int(os.environ.get('CODETIDE_JOB_WORKERS', '2'))
+
+# Memory budget for cached metric results (approximate, in megabytes)
+METRICS_CACHE_MAX_BYTES = int(float(os.environ.get('CODETIDE_METRICS_CACHE_MB', '64')) * 1024 * 1024)
+
+# SQLite database used by the API and analysis jobs
+DATABASE_PATH = os.environ.get('CODETIDE_DB_PATH', './db/commit_tracker.db')
+
+# Connections kept open for request threads and job workers, plus temporary overflow
+DB_POOL_SIZE = int(os.environ.get('CODETIDE_DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.environ.get('CODETIDE_DB_MAX_OVERFLOW', '20'))
+
+# Connections reserved for metric queries, opened read-only so dashboards never wait on ingestion
+DB_READ_POOL_SIZE = int(os.environ.get('CODETIDE_DB_READ_POOL_SIZE', '10'))
+
+# Applied to every SQLite connection. WAL lets readers run next to the single writer,
+# NORMAL sync is durable in WAL mode except for the last transactions on power loss
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('CODETIDE_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('CODETIDE_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('CODETIDE_SQLITE_MMAP_MB', '256')) * 1024 * 1024,
+    'cache_size': -int(os.environ.get('CODETIDE_SQLITE_CACHE_MB', '64')) * 1024,  # negative = KiB
+    'busy_timeout': int(os.environ.get('CODETIDE_SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'temp_store': 'MEMORY'
+}
+
+# API response serializer: 'auto' uses orjson when installed, 'orjson' requires it, 'json' is Flask's default
+JSON_SERIALIZER = os.environ.get('CODETIDE_JSON_SERIALIZER', 'auto')
+
+# Responses at least this large are gzip/brotli compressed for clients that accept it
+COMPRESSION_MIN_BYTES = int(os.environ.get('CODETIDE_COMPRESSION_MIN_BYTES', '1024'))
+
+# Levels tuned for on-the-fly compression: most of the size reduction at a fraction of the max level's CPU
+GZIP_LEVEL = int(os.environ.get('CODETIDE_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('CODETIDE_BROTLI_QUALITY', '5'))
+
+# Metrics engine: 'sql' queries the database per call, 'frames' answers from in-memory NumPy column frames
+METRICS_ENGINE = os.environ.get('CODETIDE_METRICS_ENGINE', 'sql')
+
+# Memory budget of the 'frames' engine, least recently used repositories are dropped beyond it
+FRAME_CACHE_MAX_BYTES = int(os.environ.get('CODETIDE_FRAME_CACHE_MB', '512')) * 1024 * 1024
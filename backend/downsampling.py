@@ -0,0 +1,100 @@
+"""
+Time-series helpers for chart data: calendar buckets, zero-filling and LTTB downsampling
+"""
+from datetime import date, timedelta
+
+GRANULARITIES = ('day', 'week', 'month', 'auto')
+
+# Series length 'auto' granularity aims for when no max_points is given
+AUTO_TARGET_POINTS = 366
+
+
+def bucket_start(day, granularity):
+    """First day of the day/week (Monday)/month bucket containing day"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def bucket_starts(first_day, last_day, granularity):
+    """Every bucket start from the bucket of first_day through the bucket of last_day"""
+    current = bucket_start(first_day, granularity)
+    last = bucket_start(last_day, granularity)
+    starts = []
+    while current <= last:
+        starts.append(current)
+        if granularity == 'week':
+            current += timedelta(days=7)
+        elif granularity == 'month':
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=1)
+    return starts
+
+
+def choose_granularity(first_day, last_day, max_points=None):
+    """Finest granularity whose series over the span fits in max_points, month if none does"""
+    target = max_points or AUTO_TARGET_POINTS
+    if first_day is None:
+        return 'day'
+    for granularity in ('day', 'week'):
+        # Bucket count without building the list
+        span = (bucket_start(last_day, granularity) - bucket_start(first_day, granularity)).days
+        if span // (7 if granularity == 'week' else 1) + 1 <= target:
+            return granularity
+    return 'month'
+
+
+def zero_filled(points, first_day, last_day, granularity, zero):
+    """Series with one point per bucket, buckets missing from points get a copy of zero
+
+    points maps ISO bucket start dates to point dicts (which already carry 'date').
+    """
+    if first_day is None:
+        return []
+    series = []
+    for start in bucket_starts(first_day, last_day, granularity):
+        key = start.isoformat()
+        series.append(points.get(key) or {'date': key, **zero})
+    return series
+
+
+def lttb(points, max_points, key):
+    """Largest-Triangle-Three-Buckets: keep max_points of points that best preserve the shape of key
+
+    The first and last points are always kept; x is the position in the (evenly bucketed) series.
+    """
+    count = len(points)
+    if max_points is None or max_points >= count or max_points < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (count - 2) / (max_points - 2)
+    selected = 0
+    for index in range(max_points - 2):
+        # Average of the next bucket is the triangle's third corner
+        average_start = int((index + 1) * every) + 1
+        average_end = min(int((index + 2) * every) + 1, count)
+        average_x = (average_start + average_end - 1) / 2
+        average_y = sum(points[j][key] for j in range(average_start, average_end)) / (average_end - average_start)
+
+        selected_x, selected_y = selected, points[selected][key]
+        best_area, best = -1, None
+        for candidate in range(int(index * every) + 1, int((index + 1) * every) + 1):
+            area = abs(
+                (selected_x - average_x) * (points[candidate][key] - selected_y)
+                - (selected_x - candidate) * (average_y - selected_y)
+            )
+            if area > best_area:
+                best_area, best = area, candidate
+        sampled.append(points[best])
+        selected = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def parse_day(value):
+    """Date of an ISO date string or date value"""
+    return value if isinstance(value, date) else date.fromisoformat(value)
@@ -0,0 +1,721 @@
+"""
+Optional in-memory metrics engine: per-repository NumPy column frames and a MetricsCalculator
+whose methods run as vectorized operations on them instead of SQL
+"""
+import calendar
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, func, cast, Integer
+from models import Commit, CommitFile, FilePath, Contributor, EPOCH_DAY
+from metrics_calculator import MetricsCalculator
+from metrics_cache import data_versions
+from branches import get_branch_members
+from downsampling import choose_granularity
+import config
+
+# Same shape as the rows MetricsCalculator._daily_totals returns from SQL
+DayTotals = namedtuple('DayTotals', 'date commit_count lines_added lines_deleted test_files production_files')
+
+# Per-day and per (day, contributor) sums a frame keeps, like the counters of a daily rollup
+DAY_COLUMNS = ('commits', 'lines_added', 'lines_deleted', 'files_changed', 'test_files', 'production_files')
+
+ContributorInfo = namedtuple('ContributorInfo', 'name email role team experience_level')
+
+
+def day_number(day):
+    return (day - EPOCH_DAY).days
+
+
+def from_day_number(number):
+    return EPOCH_DAY + timedelta(days=int(number))
+
+
+def from_month_number(number):
+    number = int(number)
+    return date(1970 + number // 12, number % 12 + 1, 1)
+
+
+def timestamp(moment):
+    """Whole seconds since the epoch of a naive UTC datetime"""
+    return calendar.timegm(moment.timetuple())
+
+
+def from_timestamp(seconds):
+    """Naive UTC datetime of whole seconds since the epoch"""
+    return datetime.utcfromtimestamp(int(seconds))
+
+
+def _factorize(values, missing):
+    """Integer codes and labels of an object column, None becomes the label missing"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    labels = list(uniques)
+    if (codes < 0).any():
+        codes[codes < 0] = len(labels)
+        labels.append(missing)
+    return codes.astype(np.int16 if len(labels) < 2 ** 15 else np.int32), labels
+
+
+class RepositoryFrame:
+    """One repository's commits as column arrays sorted by commit time
+
+    Timestamps are int64 seconds, contributor/type/file type are integer codes into small label
+    arrays, line and file counts are int32. On top of the commit columns the frame keeps:
+
+    - daily_*: per (day, contributor) sums, the in-memory counterpart of the daily rollups that
+      window metrics and series are computed from
+    - day_*: the same summed per day over all contributors
+    - by_contributor/contributor_starts: each contributor's commit rows, in time order
+    - file_*: commit files in commit row order, file_starts[row] is a commit's first file
+    """
+
+    def __init__(self, repository_id, version, commits, files, contributors):
+        self.repository_id = repository_id
+        self.version = version
+
+        order = np.argsort(commits['ts'], kind='stable')
+        self.ids = commits['id'][order]
+        self.ts = commits['ts'][order]
+        self.day = np.floor_divide(self.ts, 86400).astype(np.int32)
+        self.hour = np.floor_divide(np.mod(self.ts, 86400), 3600).astype(np.int8)
+        self.contributor_ids, contributor_codes = np.unique(commits['contributor_id'][order], return_inverse=True)
+        self.contributor = contributor_codes.astype(np.int32)
+        self.type, self.type_labels = _factorize(commits['commit_type'][order], None)
+        self.lines_added = commits['lines_added'][order].astype(np.int32)
+        self.lines_deleted = commits['lines_deleted'][order].astype(np.int32)
+        self.files_changed = commits['files_changed'][order].astype(np.int32)
+        self._index_files(files)
+        self._index_contributors()
+        self._aggregate_days()
+
+        self.contributors = contributors
+        self.max_id = int(self.ids.max()) if len(self.ids) else 0
+
+    def _index_files(self, files):
+        # Map each file to its commit's row, files of commits outside the frame are dropped
+        id_order = np.argsort(self.ids)
+        positions = np.minimum(np.searchsorted(self.ids, files['commit_id'], sorter=id_order), max(len(self.ids) - 1, 0))
+        known = self.ids[id_order[positions]] == files['commit_id'] if len(self.ids) else np.zeros(len(positions), bool)
+        rows = id_order[positions[known]]
+        file_order = np.argsort(rows, kind='stable')
+        self.file_row = rows[file_order].astype(np.int32)
+        self.file_type, self.file_type_labels = _factorize(files['file_type'][known][file_order], None)
+        self.file_changes = files['changes'][known][file_order].astype(np.int32)
+        self.file_starts = np.searchsorted(self.file_row, np.arange(len(self.ids) + 1, dtype=np.int32)).astype(np.int32)
+
+        is_test = files['is_test_file'][known][file_order].astype(bool)
+        self.test_files = np.bincount(self.file_row, weights=is_test, minlength=len(self.ids)).astype(np.int32)
+        self.production_files = (np.diff(self.file_starts) - self.test_files).astype(np.int32)
+        self.file_is_test = is_test
+
+    def _index_contributors(self):
+        self.by_contributor = np.argsort(self.contributor, kind='stable').astype(np.int32)
+        self.contributor_starts = np.searchsorted(
+            self.contributor[self.by_contributor], np.arange(len(self.contributor_ids) + 1, dtype=np.int32)
+        ).astype(np.int32)
+
+    def _aggregate_days(self):
+        size = max(len(self.contributor_ids), 1)
+        keys, groups = np.unique(self.day.astype(np.int64) * size + self.contributor, return_inverse=True)
+        self.daily_day = (keys // size).astype(np.int32)
+        self.daily_contributor = (keys % size).astype(np.int32)
+        self.daily_commits = np.bincount(groups, minlength=len(keys)).astype(np.int64)
+        for column in ('lines_added', 'lines_deleted', 'files_changed', 'test_files', 'production_files'):
+            setattr(self, f'daily_{column}', np.bincount(
+                groups, weights=getattr(self, column), minlength=len(keys)
+            ).astype(np.int64))
+
+        self.day_day, starts = np.unique(self.daily_day, return_index=True)
+        for column in DAY_COLUMNS:
+            daily = getattr(self, f'daily_{column}')
+            setattr(self, f'day_{column}', np.add.reduceat(daily, starts) if len(starts) else daily[:0])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        arrays = [value for value in vars(self).values() if isinstance(value, np.ndarray)]
+        # Labels and contributor profiles are small next to the arrays, counted roughly
+        return sum(array.nbytes for array in arrays) + 200 * (len(self.contributors) + len(self.type_labels))
+
+    def columns(self):
+        """Commit and file columns in the form _read_columns returns them, for appending new rows"""
+        commits = {
+            'id': self.ids,
+            'ts': self.ts,
+            'contributor_id': self.contributor_ids[self.contributor],
+            'commit_type': np.array(self.type_labels, dtype=object)[self.type],
+            'lines_added': self.lines_added,
+            'lines_deleted': self.lines_deleted,
+            'files_changed': self.files_changed
+        }
+        files = {
+            'commit_id': self.ids[self.file_row],
+            'file_type': np.array(self.file_type_labels, dtype=object)[self.file_type],
+            'changes': self.file_changes,
+            'is_test_file': self.file_is_test
+        }
+        return commits, files
+
+    def contributor_code(self, contributor_id):
+        """Code of a contributor id, or None when they have no commits in the repository"""
+        position = np.searchsorted(self.contributor_ids, contributor_id)
+        if position < len(self.contributor_ids) and self.contributor_ids[position] == contributor_id:
+            return int(position)
+        return None
+
+    def subset(self, mask, version):
+        """Frame of the commits where mask (over this frame's rows) is set, with their files"""
+        commits, files = self.columns()
+        file_mask = mask[self.file_row]
+        return RepositoryFrame(
+            self.repository_id, version,
+            {name: column[mask] for name, column in commits.items()},
+            {name: column[file_mask] for name, column in files.items()},
+            self.contributors
+        )
+
+    def contributor_rows(self, code):
+        """Commit rows of one contributor code, in time order"""
+        return self.by_contributor[self.contributor_starts[code]:self.contributor_starts[code + 1]]
+
+
+def _read_columns(session, repository_id, after_id=0):
+    """Commit and commit file columns of a repository, only commits with id > after_id"""
+    connection = session.connection()
+    commits = pd.read_sql(select(
+        Commit.id,
+        cast(func.strftime('%s', Commit.commit_date), Integer).label('ts'),
+        Commit.contributor_id,
+        Commit.commit_type,
+        func.coalesce(Commit.lines_added, 0).label('lines_added'),
+        func.coalesce(Commit.lines_deleted, 0).label('lines_deleted'),
+        func.coalesce(Commit.files_changed, 0).label('files_changed')
+    ).where(Commit.repository_id == repository_id, Commit.id > after_id), connection)
+    files = pd.read_sql(select(
+        CommitFile.commit_id,
+        FilePath.file_type,
+        func.coalesce(CommitFile.lines_added + CommitFile.lines_deleted, 0).label('changes'),
+        func.coalesce(FilePath.is_test_file, False).label('is_test_file')
+    ).join(
+        Commit, Commit.id == CommitFile.commit_id
+    ).join(
+        FilePath, FilePath.id == CommitFile.path_id
+    ).where(Commit.repository_id == repository_id, Commit.id > after_id), connection)
+
+    commit_columns = {
+        'id': commits['id'].to_numpy(np.int64),
+        'ts': commits['ts'].to_numpy(np.int64),
+        'contributor_id': commits['contributor_id'].to_numpy(np.int64),
+        'commit_type': commits['commit_type'].to_numpy(object),
+        'lines_added': commits['lines_added'].to_numpy(np.int32),
+        'lines_deleted': commits['lines_deleted'].to_numpy(np.int32),
+        'files_changed': commits['files_changed'].to_numpy(np.int32)
+    }
+    file_columns = {
+        'commit_id': files['commit_id'].to_numpy(np.int64),
+        'file_type': files['file_type'].to_numpy(object),
+        'changes': files['changes'].to_numpy(np.int32),
+        'is_test_file': files['is_test_file'].to_numpy(bool)
+    }
+    return commit_columns, file_columns
+
+
+def _read_contributors(session, contributor_ids):
+    contributors = {}
+    ids = [int(contributor_id) for contributor_id in contributor_ids]
+    for start in range(0, len(ids), 500):
+        for contributor in session.query(Contributor).filter(Contributor.id.in_(ids[start:start + 500])):
+            contributors[contributor.id] = ContributorInfo(
+                contributor.name, contributor.email, contributor.role, contributor.team, contributor.experience_level
+            )
+    return contributors
+
+
+class FrameStore:
+    """LRU of repository frames under a memory budget, refreshed when a repository's data version changes
+
+    After ingest only commits newer than the frame's highest id are read and merged in; when the
+    commit count no longer adds up (deletes, rewrites) the frame is reloaded. invalidate() forces a
+    reload for changes that keep the count, like reclassified commits. Branch frames are cut from
+    the repository frame with the branch's membership bitmap and cached next to it.
+    """
+
+    def __init__(self, max_bytes=None, versions=None):
+        self.max_bytes = config.FRAME_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.versions = versions if versions is not None else data_versions
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self._repository_locks = {}
+        self.loads = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def get(self, session, repository_id, branch=None):
+        """Frame of a repository, or of one of its branches; ValueError for branches it doesn't have"""
+        key = repository_id if branch is None else (repository_id, branch)
+        version = self.versions.get(repository_id)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None and frame.version == version:
+                self._frames.move_to_end(key)
+                return frame
+            repository_lock = self._repository_locks.setdefault(key, threading.Lock())
+
+        # One loader per frame, other frames keep being served meanwhile
+        with repository_lock:
+            with self._lock:
+                frame = self._frames.get(key)
+            if frame is None or frame.version != version:
+                if branch is None:
+                    frame = self._refresh(session, repository_id, frame, version)
+                else:
+                    frame = self._branch_frame(session, repository_id, branch, version)
+                self._store(key, frame)
+            return frame
+
+    def invalidate(self, repository_id):
+        """Drop the frames of a repository and its branches"""
+        with self._lock:
+            for key in [key for key in self._frames if key == repository_id
+                        or (isinstance(key, tuple) and key[0] == repository_id)]:
+                del self._frames[key]
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'repositories': list(self._frames),
+                'bytes': sum(frame.nbytes for frame in self._frames.values()),
+                'max_bytes': self.max_bytes,
+                'loads': self.loads,
+                'refreshes': self.refreshes,
+                'evictions': self.evictions
+            }
+
+    def _refresh(self, session, repository_id, frame, version):
+        if frame is not None:
+            commits, files = _read_columns(session, repository_id, after_id=frame.max_id)
+            expected = len(frame) + len(commits['id'])
+            if session.query(func.count(Commit.id)).filter(Commit.repository_id == repository_id).scalar() == expected:
+                old_commits, old_files = frame.columns()
+                commits = {name: np.concatenate([old_commits[name], commits[name]]) for name in commits}
+                files = {name: np.concatenate([old_files[name], files[name]]) for name in files}
+                self.refreshes += 1
+                return RepositoryFrame(
+                    repository_id, version, commits, files, _read_contributors(session, np.unique(commits['contributor_id']))
+                )
+
+        commits, files = _read_columns(session, repository_id)
+        self.loads += 1
+        return RepositoryFrame(
+            repository_id, version, commits, files, _read_contributors(session, np.unique(commits['contributor_id']))
+        )
+
+    def _branch_frame(self, session, repository_id, branch, version):
+        members = get_branch_members(session, repository_id, branch)
+        if members is None:
+            raise ValueError(f"Unknown branch: {branch}")
+        frame = self.get(session, repository_id)
+        return frame.subset(np.isin(frame.ids, members), version)
+
+    def _store(self, key, frame):
+        with self._lock:
+            self._frames.pop(key, None)
+            self._frames[key] = frame
+            total = sum(stored.nbytes for stored in self._frames.values())
+            # The frame just loaded stays even when it alone is over the budget
+            while total > self.max_bytes and len(self._frames) > 1:
+                _, evicted = self._frames.popitem(last=False)
+                total -= evicted.nbytes
+                self.evictions += 1
+
+
+class FrameMetricsCalculator(MetricsCalculator):
+    """MetricsCalculator answering from in-memory repository frames; same results as the SQL engine
+
+    Windows are resolved exactly like the SQL engine: rollup-backed metrics sum whole days of the
+    frame's daily sums, commit-level ones (types, detailed metrics) compare commit times. With a
+    branch, every metric only counts commits reachable from that branch.
+    """
+
+    def __init__(self, session=None, session_factory=None, frames=None, branch=None):
+        super().__init__(session=session, session_factory=session_factory)
+        self.frames = frames if frames is not None else FrameStore()
+        self.branch = branch
+
+    def _frame(self, repository_id):
+        return self.frames.get(self.session, repository_id, self.branch)
+
+    def _window(self, values, low, high):
+        """Slice of sorted values within [low, high], all of them when low is None"""
+        if low is None:
+            return slice(0, len(values))
+        # Search with the array's own dtype, a wider needle would make NumPy convert the whole array
+        value = values.dtype.type
+        return slice(
+            int(np.searchsorted(values, value(low), 'left')),
+            int(np.searchsorted(values, value(high), 'right'))
+        )
+
+    def _day_bounds(self, start_date, end_date):
+        if start_date is None:
+            return None, None
+        return day_number(start_date.date()), day_number(end_date.date())
+
+    def _daily_rows(self, frame, start_date, end_date, contributor_ids=None):
+        """Rows of the frame's (day, contributor) sums within the window, only the contributors' when given"""
+        window = self._window(frame.daily_day, *self._day_bounds(start_date, end_date))
+        if contributor_ids is None:
+            return window
+        codes = [code for code in map(frame.contributor_code, contributor_ids) if code is not None]
+        if not codes:
+            return slice(0, 0)
+        contributors = frame.daily_contributor[window]
+        mask = contributors == codes[0] if len(codes) == 1 else np.isin(contributors, codes)
+        return np.flatnonzero(mask) + window.start
+
+    def _window_sums(self, repository_id, days, contributor_id, *columns):
+        """Commit count, first day and column sums over the window, from per-day sums when possible"""
+        start_date, end_date = self._resolve_window(days)
+        frame = self._frame(repository_id)
+        if contributor_id:
+            rows = self._daily_rows(frame, start_date, end_date, [contributor_id])
+            day, commits = frame.daily_day[rows], frame.daily_commits[rows]
+            sums = [int(getattr(frame, f'daily_{column}')[rows].sum()) for column in columns]
+        else:
+            rows = self._window(frame.day_day, *self._day_bounds(start_date, end_date))
+            day, commits = frame.day_day[rows], frame.day_commits[rows]
+            sums = [int(getattr(frame, f'day_{column}')[rows].sum()) for column in columns]
+        first_day = from_day_number(day[0]) if len(day) else None
+        return start_date, end_date, int(commits.sum()), first_day, sums
+
+    def _run_parts(self, parts):
+        # Everything is in memory already, threads would only add overhead
+        return {name: part() for name, part in parts.items()}
+
+    def get_commit_velocity(self, repository_id, days=30, contributor_id=None):
+        """Calculate commits per day over specified period"""
+        start_date, end_date, commit_count, first_day, _ = self._window_sums(repository_id, days, contributor_id)
+        if days == 0:
+            if not commit_count:
+                return 0
+            first_commit_date = min(self._first_commit_dates(
+                repository_id, [first_day], [contributor_id] if contributor_id else None
+            ).values())
+            return commit_count / self._velocity_days(days, start_date, end_date, first_commit_date)
+        return commit_count / self._velocity_days(days, start_date, end_date)
+
+    def _first_commit_dates(self, repository_id, first_days, contributor_ids=None):
+        """Time of each contributor's first commit, their first row since frames are in time order"""
+        frame = self._frame(repository_id)
+        if contributor_ids:
+            codes = [code for code in map(frame.contributor_code, contributor_ids) if code is not None]
+        else:
+            codes = range(len(frame.contributor_ids))
+        return {
+            int(frame.contributor_ids[code]): from_timestamp(frame.ts[frame.contributor_rows(code)[0]])
+            for code in codes
+        }
+
+    def get_code_churn(self, repository_id, days=30, contributor_id=None):
+        """Calculate lines added vs deleted ratio"""
+        _, _, _, _, (total_added, total_deleted) = self._window_sums(
+            repository_id, days, contributor_id, 'lines_added', 'lines_deleted'
+        )
+        return {
+            'lines_added': total_added,
+            'lines_deleted': total_deleted,
+            'churn_ratio': total_added / max(total_deleted, 1)
+        }
+
+    def get_test_coverage_impact(self, repository_id, days=30, contributor_id=None):
+        """Calculate ratio of test files to production files committed"""
+        _, _, _, _, (test_files, production_files) = self._window_sums(
+            repository_id, days, contributor_id, 'test_files', 'production_files'
+        )
+        total_files = test_files + production_files
+
+        if not total_files:
+            return {'test_files': 0, 'production_files': 0, 'test_ratio': 0}
+
+        return {
+            'test_files': test_files,
+            'production_files': production_files,
+            'test_ratio': test_files / total_files
+        }
+
+    def _per_contributor(self, frame, rows, *columns):
+        """Commit count and (day, contributor) column sums per contributor code over daily rows"""
+        codes = frame.daily_contributor[rows]
+        size = len(frame.contributor_ids)
+        counts = np.bincount(codes, weights=frame.daily_commits[rows], minlength=size).astype(np.int64)
+        sums = [np.bincount(
+            codes, weights=getattr(frame, f'daily_{column}')[rows], minlength=size
+        ).astype(np.int64) for column in columns]
+        return codes, counts, sums
+
+    def _contributor_stats(self, repository_id, days, start_date, end_date):
+        frame = self._frame(repository_id)
+        rows = self._daily_rows(frame, start_date, end_date)
+        _, counts, (added, deleted, files) = self._per_contributor(
+            frame, rows, 'lines_added', 'lines_deleted', 'files_changed'
+        )
+        # Lifetime velocity runs from each contributor's own first commit
+        first_commit_dates = self._first_commit_dates(repository_id, None) if days == 0 else {}
+
+        result = []
+        for code in np.flatnonzero(counts):
+            contributor_id = int(frame.contributor_ids[code])
+            info = frame.contributors.get(contributor_id)
+            if info is None:
+                continue
+            commit_count = int(counts[code])
+            velocity = commit_count / self._velocity_days(
+                days, start_date, end_date, first_commit_dates.get(contributor_id)
+            )
+
+            result.append({
+                'contributor_id': contributor_id,
+                'name': info.name,
+                'email': info.email,
+                'role': info.role,
+                'team': info.team,
+                'commit_count': commit_count,
+                'lines_added': int(added[code]),
+                'lines_deleted': int(deleted[code]),
+                'avg_files_per_commit': round(int(files[code]) / commit_count, 2),
+                'velocity': velocity
+            })
+        result.sort(key=lambda stat: (-stat['commit_count'], stat['contributor_id']))
+        return result
+
+    def _time_window(self, frame, start_date, end_date):
+        if start_date is None:
+            return slice(0, len(frame))
+        return self._window(frame.ts, timestamp(start_date), timestamp(end_date))
+
+    def _commit_type_distribution(self, repository_id, start_date, end_date):
+        frame = self._frame(repository_id)
+        counts = np.bincount(frame.type[self._time_window(frame, start_date, end_date)], minlength=len(frame.type_labels))
+        return {frame.type_labels[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+    def _daily_totals(self, repository_id, start_date, end_date):
+        frame = self._frame(repository_id)
+        rows = self._window(frame.day_day, *self._day_bounds(start_date, end_date))
+        return [
+            DayTotals(from_day_number(day), *map(int, sums))
+            for day, *sums in zip(frame.day_day[rows], frame.day_commits[rows], frame.day_lines_added[rows],
+                                  frame.day_lines_deleted[rows], frame.day_test_files[rows],
+                                  frame.day_production_files[rows])
+        ]
+
+    def _buckets(self, days, granularity):
+        """Bucket value of each day number and how to turn one into the bucket's start date"""
+        if granularity == 'week':
+            # Monday of the week, 1970-01-01 was a Thursday
+            return days - (days + 3) % 7, from_day_number
+        if granularity == 'month':
+            return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int32), from_month_number
+        return days, from_day_number
+
+    def _grouped(self, buckets, *columns):
+        """Distinct consecutive bucket values and per-bucket column sums (rows in bucket order)"""
+        if not len(buckets):
+            return buckets, [column[:0] for column in columns]
+        starts = np.concatenate(([0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1))
+        return buckets[starts], [np.add.reduceat(column, starts) for column in columns]
+
+    def _frame_granularity(self, days, granularity, max_points, start_date, end_date):
+        """Resolve 'auto' like the SQL engine, days are the window's day numbers in order"""
+        self._check_series_args(granularity, max_points)
+        if granularity != 'auto':
+            return granularity
+        first_day = start_date.date() if start_date is not None else (from_day_number(days.min()) if len(days) else None)
+        return choose_granularity(first_day, end_date.date(), max_points)
+
+    def get_daily_activity(self, repository_id, days=30, granularity='day', max_points=None):
+        """Get commit activity for charts, one zero-filled point per day, week or month"""
+        start_date, end_date = self._resolve_window(days)
+        frame = self._frame(repository_id)
+        rows = self._window(frame.day_day, *self._day_bounds(start_date, end_date))
+        day = frame.day_day[rows]
+        granularity = self._frame_granularity(day, granularity, max_points, start_date, end_date)
+        buckets, to_date = self._buckets(day, granularity)
+
+        values, (commits, added, deleted) = self._grouped(
+            buckets, frame.day_commits[rows], frame.day_lines_added[rows], frame.day_lines_deleted[rows]
+        )
+        points = {}
+        for value, count, lines_added, lines_deleted in zip(values, commits, added, deleted):
+            key = to_date(value).isoformat()
+            points[key] = {
+                'date': key,
+                'commit_count': int(count),
+                'lines_added': int(lines_added),
+                'lines_deleted': int(lines_deleted)
+            }
+        return self._series(points, start_date, end_date, granularity, max_points,
+                            {'commit_count': 0, 'lines_added': 0, 'lines_deleted': 0}, 'commit_count')
+
+    def get_team_comparison(self, repository_id, days=30):
+        """Compare performance across teams"""
+        start_date, end_date = self._resolve_window(days)
+        frame = self._frame(repository_id)
+        _, counts, (added, deleted) = self._per_contributor(
+            frame, self._daily_rows(frame, start_date, end_date), 'lines_added', 'lines_deleted'
+        )
+
+        teams = {}
+        for code in np.flatnonzero(counts):
+            info = frame.contributors.get(int(frame.contributor_ids[code]))
+            if info is None:
+                continue
+            team = teams.setdefault(info.team, [0, 0, 0, 0])
+            team[0] += int(counts[code])
+            team[1] += int(added[code])
+            team[2] += int(deleted[code])
+            team[3] += 1
+
+        # Same order as SQL's GROUP BY team: NULL first
+        return [{
+            'team': team,
+            'total_commits': total_commits,
+            'total_lines_added': total_added,
+            'total_lines_deleted': total_deleted,
+            'team_size': team_size,
+            'avg_commits_per_member': total_commits / max(team_size, 1)
+        } for team, (total_commits, total_added, total_deleted, team_size)
+            in sorted(teams.items(), key=lambda item: (item[0] is not None, item[0] or ''))]
+
+    def _commit_rows(self, frame, code, start_date, end_date):
+        """One contributor's commit rows within the time window, in time order"""
+        rows = frame.contributor_rows(code)
+        if start_date is None:
+            return rows
+        return rows[self._window(frame.ts[rows], timestamp(start_date), timestamp(end_date))]
+
+    def _file_rows(self, frame, rows):
+        """Indexes into the file columns of every file of the given commit rows"""
+        starts = frame.file_starts[rows]
+        counts = frame.file_starts[rows + 1] - starts
+        # Each commit's run of files: its start repeated, plus the position within the run
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(starts, counts) + offsets
+
+    def _detailed_metrics_by_contributor(self, contributor_ids, repository_id, days):
+        start_date, end_date = self._resolve_window(days)
+        frame = self._frame(repository_id)
+
+        metrics = {contributor_id: {
+            'contributor_id': contributor_id,
+            'total_commits': 0,
+            'lines_added': 0,
+            'lines_deleted': 0,
+            'files_modified': 0,
+            'avg_files_per_commit': 0,
+            'commit_velocity': 0,
+            'code_churn_ratio': 0,
+            'commit_types': {},
+            'activity_pattern': {},
+            'file_expertise': {}
+        } for contributor_id in contributor_ids}
+
+        # Labels in SQL GROUP BY order, so '' and NULL (both 'unknown') resolve the same way
+        file_type_order = sorted(range(len(frame.file_type_labels)), key=lambda code: (
+            frame.file_type_labels[code] is not None, frame.file_type_labels[code] or ''
+        ))
+
+        for contributor_id, contributor_metrics in metrics.items():
+            code = frame.contributor_code(contributor_id)
+            if code is None:
+                continue
+            rows = self._commit_rows(frame, code, start_date, end_date)
+            if not len(rows):
+                continue
+            total_commits = len(rows)
+            total_lines_added = int(frame.lines_added[rows].sum(dtype=np.int64))
+            total_lines_deleted = int(frame.lines_deleted[rows].sum(dtype=np.int64))
+            total_files_modified = int(frame.files_changed[rows].sum(dtype=np.int64))
+            velocity = total_commits / self._velocity_days(days, start_date, end_date, from_timestamp(frame.ts[rows[0]]))
+
+            contributor_metrics.update({
+                'total_commits': total_commits,
+                'lines_added': total_lines_added,
+                'lines_deleted': total_lines_deleted,
+                'files_modified': total_files_modified,
+                'avg_files_per_commit': round(total_files_modified / total_commits, 2),
+                'commit_velocity': round(velocity, 3),
+                'code_churn_ratio': round(total_lines_added / max(total_lines_deleted, 1), 2)
+            })
+
+            types = np.bincount(frame.type[rows], minlength=len(frame.type_labels))
+            commit_types = contributor_metrics['commit_types']
+            for type_code in np.flatnonzero(types):
+                commit_type = frame.type_labels[type_code] or 'other'
+                commit_types[commit_type] = commit_types.get(commit_type, 0) + int(types[type_code])
+
+            hours = np.bincount(frame.hour[rows], minlength=24)
+            contributor_metrics['activity_pattern'] = {int(hour): int(hours[hour]) for hour in np.flatnonzero(hours)}
+
+            file_rows = self._file_rows(frame, rows)
+            file_types = frame.file_type[file_rows]
+            file_counts = np.bincount(file_types, minlength=len(frame.file_type_labels))
+            file_changes = np.bincount(file_types, weights=frame.file_changes[file_rows], minlength=len(frame.file_type_labels))
+            for file_type_code in file_type_order:
+                if file_counts[file_type_code]:
+                    contributor_metrics['file_expertise'][frame.file_type_labels[file_type_code] or 'unknown'] = {
+                        'files_modified': int(file_counts[file_type_code]),
+                        'total_changes': int(file_changes[file_type_code])
+                    }
+        return metrics
+
+    def _activity_timelines_by_contributor(self, contributor_ids, repository_id, days, granularity='day', max_points=None):
+        start_date, end_date = self._resolve_window(days)
+        frame = self._frame(repository_id)
+        rows = self._daily_rows(frame, start_date, end_date, contributor_ids)
+        granularity = self._frame_granularity(frame.daily_day[rows], granularity, max_points, start_date, end_date)
+
+        # Group rows per contributor, a stable sort keeps each group in day order
+        codes = frame.daily_contributor[rows]
+        order = np.argsort(codes, kind='stable')
+        rows, codes = np.arange(len(frame.daily_day))[rows][order], codes[order]
+
+        points = {}
+        first_day = None
+        for contributor_id in contributor_ids:
+            points[contributor_id] = {}
+            code = frame.contributor_code(contributor_id)
+            if code is None:
+                continue
+            contributor_rows = rows[np.searchsorted(codes, code, 'left'):np.searchsorted(codes, code, 'right')]
+            buckets, to_date = self._buckets(frame.daily_day[contributor_rows], granularity)
+            values, (commits, added, deleted, files) = self._grouped(
+                buckets, frame.daily_commits[contributor_rows], frame.daily_lines_added[contributor_rows],
+                frame.daily_lines_deleted[contributor_rows], frame.daily_files_changed[contributor_rows]
+            )
+            for value, count, lines_added, lines_deleted, files_changed in zip(values, commits, added, deleted, files):
+                key = to_date(value).isoformat()
+                points[contributor_id][key] = {
+                    'date': key,
+                    'commits': int(count),
+                    'lines_added': int(lines_added),
+                    'lines_deleted': int(lines_deleted),
+                    'files_changed': int(files_changed)
+                }
+            if len(values):
+                first = to_date(values[0])
+                first_day = first if first_day is None else min(first_day, first)
+
+        zero = {'commits': 0, 'lines_added': 0, 'lines_deleted': 0, 'files_changed': 0}
+        return {
+            contributor_id: self._series(contributor_points, start_date, end_date, granularity, max_points,
+                                         zero, 'commits', first_day)
+            for contributor_id, contributor_points in points.items()
+        }
@@ -2,12 +2,51 @@ import git
 import os
 import shutil
 import time
-from datetime import datetime
-from models import Commit, Contributor, CommitFile, Repository
+import multiprocessing
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from models import Commit, Contributor, CommitFile, Repository, RefWatermark
+from git_log_reader import (
+    iter_log_commits, iter_gitpython_commits, list_ref_tips, existing_objects,
+    build_walk_revisions, count_commits, iter_commit_shards
+)
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import sessionmaker
-import re
 import threading
 from git.remote import RemoteProgress
+import config
+from rollups import add_commits_to_rollups
+from branches import update_branch_bitmaps
+from classifiers import classify_message, is_test_path, default_classifier, classifier_for, load_rules
+from metrics_cache import data_versions
+from path_index import PathIndex
+
+# Rows per executemany INSERT into commit_files
+COMMIT_FILE_CHUNK_SIZE = 5000
+
+# Fetch refspecs of mirror clones: branches and tags map onto the same local refs. Unlike
+# clone --mirror this leaves out hosting refs such as refs/pull/*, which analysis would walk too
+MIRROR_FETCH_REFSPECS = ('+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*')
+
+
+def is_git_repository(path):
+    """Whether path is a working tree or a bare (mirror) repository"""
+    if os.path.exists(os.path.join(path, '.git')):
+        return True
+    return all(os.path.exists(os.path.join(path, name)) for name in ('HEAD', 'objects', 'refs'))
+
+class AnalysisCancelled(Exception):
+    """Raised between batches when a running analysis is asked to stop"""
+    def __init__(self, commits_walked, commits_processed):
+        super().__init__(f"Analysis cancelled after {commits_walked} commits")
+        self.commits_walked = commits_walked
+        self.commits_processed = commits_processed
+
+# A parsed commit with its classification done; files are
+# (path, file_type, insertions, deletions, is_test_file) tuples
+ClassifiedCommit = namedtuple('ClassifiedCommit', ['log_commit', 'commit_type', 'files'])
 
 class CloneProgress(RemoteProgress):
     def __init__(self, socketio=None):
@@ -63,45 +102,34 @@ class CloneProgress(RemoteProgress):
         return time.time() - self.last_update_time > self.idle_timeout
 
 class GitAnalyzer:
-    def __init__(self, session, socketio=None):
-        self.session = session
+    def __init__(self, session=None, socketio=None, session_factory=None):
+        """Use either a fixed session or a scoped_session factory handing each thread its own"""
+        self._session = session
+        self.session_factory = session_factory
         self.socketio = socketio
+        # Path ids of the batches being written, see PathIndex
+        self.path_index = PathIndex()
+    
+    @property
+    def session(self):
+        if self._session is not None:
+            return self._session
+        if self.session_factory is None:
+            return None
+        return self.session_factory()
+    
+    def release_session(self):
+        """Return the calling thread's session to the factory (end of a request or worker thread)"""
+        if self._session is None and hasattr(self.session_factory, 'remove'):
+            self.session_factory.remove()
         
     def classify_commit_type(self, message):
         """Classify commit type based on commit message"""
-        message_lower = message.lower()
-        
-        if any(keyword in message_lower for keyword in ['test', 'spec', 'unit test', 'integration test']):
-            return 'test'
-        elif any(keyword in message_lower for keyword in ['fix', 'bug', 'hotfix', 'patch']):
-            return 'bugfix'
-        elif any(keyword in message_lower for keyword in ['refactor', 'cleanup', 'optimize']):
-            return 'refactor'
-        elif any(keyword in message_lower for keyword in ['doc', 'readme', 'comment']):
-            return 'documentation'
-        elif any(keyword in message_lower for keyword in ['feat', 'feature', 'add', 'implement']):
-            return 'feature'
-        else:
-            return 'other'
+        return classify_message(message)
     
     def is_test_file(self, file_path):
         """Determine if a file is a test file"""
-        test_patterns = [
-            r'\.test\.',
-            r'\.spec\.',
-            r'/test/',
-            r'/tests/',
-            r'_test\.',
-            r'test_.*\.py$',
-            r'.*Test\.java$',
-            r'.*\.test\.js$',
-            r'.*\.spec\.ts$'
-        ]
-        
-        for pattern in test_patterns:
-            if re.search(pattern, file_path, re.IGNORECASE):
-                return True
-        return False
+        return is_test_path(file_path)
     
     def get_file_type(self, file_path):
         """Extract file extension"""
@@ -138,7 +166,7 @@ class GitAnalyzer:
             if not os.path.exists(repo_path):
                 raise Exception(f"Repository path does not exist: {repo_path}")
             
-            if not os.path.exists(os.path.join(repo_path, '.git')):
+            if not is_git_repository(repo_path):
                 raise Exception(f"Not a git repository: {repo_path}")
             
             # Open the repository
@@ -148,6 +176,10 @@ class GitAnalyzer:
             if not repo.remotes:
                 raise Exception("Repository has no remote configured")
             
+            if repo.bare:
+                # Mirror clones have no working tree to update, fetching is the whole refresh
+                return self._fetch_mirror(repo, repo_path)
+            
             origin = repo.remotes.origin
             
             # Emit progress update
@@ -242,8 +274,60 @@ class GitAnalyzer:
             
             return False, error_msg, 0
 
-    def clone_repository(self, git_url, local_path):
-        """Clone a git repository from remote URL to local path with progress tracking"""
+    def _fetch_mirror(self, repo, repo_path):
+        """Refresh a mirror clone with git fetch --prune, returns pull_repository's result
+
+        Moved and new refs are applied as fetched and refs deleted upstream are removed, so there
+        is nothing to merge and the refresh can't conflict. New commits are counted from the ref
+        tips before and after the fetch.
+        """
+        if self.socketio:
+            self.socketio.emit('pull_progress', {
+                'stage': 'Fetching changes',
+                'progress': 25,
+                'message': 'Fetching latest changes from remote'
+            })
+        
+        previous_tips = list_ref_tips(repo_path)
+        print("Fetching mirror from remote...")
+        repo.git.fetch('--prune', 'origin')
+        ref_tips = list_ref_tips(repo_path)
+        
+        if self.socketio:
+            self.socketio.emit('pull_progress', {
+                'stage': 'Checking for updates',
+                'progress': 75,
+                'message': 'Counting new commits'
+            })
+        
+        revisions = build_walk_revisions(ref_tips.values(), previous_tips.values())
+        commits_fetched = count_commits(repo_path, revisions) if revisions else 0
+        # HEAD follows the default branch, it isn't a ref of its own
+        refs_changed = sum(1 for ref_name in set(previous_tips) | set(ref_tips)
+                           if ref_name != 'HEAD' and previous_tips.get(ref_name) != ref_tips.get(ref_name))
+        
+        if not refs_changed:
+            message = "Repository is already up to date"
+        else:
+            message = f"Successfully fetched {commits_fetched} new commits, {refs_changed} refs updated"
+        if self.socketio:
+            self.socketio.emit('pull_completed', {
+                'success': True,
+                'message': message,
+                'commits_pulled': commits_fetched
+            })
+        
+        print(f"Fetch completed successfully. {commits_fetched} commits fetched, {refs_changed} refs updated.")
+        return True, message, commits_fetched
+
+    def clone_repository(self, git_url, local_path, mirror=None):
+        """Clone a git repository from remote URL to local path with progress tracking
+
+        mirror (default: CODETIDE_CLONE_MODE) makes a bare clone without a working tree, whose
+        branches and tags track the remote's, see pull_repository.
+        """
+        if mirror is None:
+            mirror = config.CLONE_MODE == 'mirror'
         try:
             print(f"Starting clone operation: {git_url} -> {local_path}")
             
@@ -295,7 +379,14 @@ class GitAnalyzer:
                 monitor_thread.daemon = True
                 monitor_thread.start()
             
-            repo = git.Repo.clone_from(git_url, local_path, progress=progress)
+            if mirror:
+                repo = git.Repo.clone_from(git_url, local_path, progress=progress, bare=True)
+                # A bare clone has no fetch refspec, set one so fetch --prune keeps the refs in sync
+                with repo.config_writer() as writer:
+                    writer.set_value('remote "origin"', 'fetch', MIRROR_FETCH_REFSPECS[0])
+                    writer.add_value('remote "origin"', 'fetch', MIRROR_FETCH_REFSPECS[1])
+            else:
+                repo = git.Repo.clone_from(git_url, local_path, progress=progress)
             print("Git clone completed successfully")
             
             # Emit completion
@@ -330,11 +421,11 @@ class GitAnalyzer:
                 })
             return False, error_msg
     
-    def clone_repository_async(self, git_url, local_path):
+    def clone_repository_async(self, git_url, local_path, mirror=None):
         """Clone repository in a separate thread to avoid blocking"""
         def clone_worker():
             try:
-                return self.clone_repository(git_url, local_path)
+                return self.clone_repository(git_url, local_path, mirror=mirror)
             except Exception as e:
                 if self.socketio:
                     self.socketio.emit('clone_completed', {
@@ -342,6 +433,8 @@ class GitAnalyzer:
                         'error': f"Clone failed: {str(e)}"
                     })
                 return False, str(e)
+            finally:
+                self.release_session()
         
         def progress_simulator():
             """Simulate progress if git progress callback doesn't work"""
@@ -397,12 +490,180 @@ class GitAnalyzer:
         except Exception as e:
             return False, f"URL validation failed: {str(e)}"
     
-    def analyze_repository(self, repo_path, repository_id, max_commits=None):
-        """Analyze git repository and extract commit data with optimized batch processing"""
+    def classify_log_commit(self, log_commit, classifier=default_classifier):
+        """Classify a parsed commit and its files under the classifier's rules"""
+        files = []
+        for file_path, insertions, deletions in log_commit.files:
+            # Paths repeat from commit to commit, their classification is memoized
+            file_type, is_test_file = classifier.classify_path(file_path)
+            files.append((file_path, file_type, insertions, deletions, is_test_file))
+        return ClassifiedCommit(log_commit, classifier.classify_message(log_commit.message), files)
+    
+    def iter_commit_records(self, repo, repo_path, revisions, max_commits=None, backend='log', skip=0):
+        """Yield LogCommit records for the given revisions using the selected ingestion backend"""
+        if backend == 'gitpython':
+            # Legacy path: GitPython runs a separate git diff for every commit.stats
+            return iter_gitpython_commits(repo, revisions, max_count=max_commits, skip=skip)
+        if backend != 'log':
+            raise ValueError(f"Unknown ingestion backend: {backend}")
+        # Single streaming git log --numstat process, constant memory
+        return iter_log_commits(repo_path, stdin_revs=revisions, max_count=max_commits, skip=skip)
+    
+    def iter_classified_commits(self, repo, repo_path, revisions, max_commits=None, backend='log', workers=1, skip=0,
+                                classifier=default_classifier):
+        """Yield ClassifiedCommit records in git log order, in-process or from worker processes"""
+        if workers > 1 and backend == 'log':
+            return self._iter_parallel_classified_commits(repo_path, revisions, max_commits, workers, skip, classifier)
+        return (
+            self.classify_log_commit(log_commit, classifier)
+            for log_commit in self.iter_commit_records(repo, repo_path, revisions, max_commits, backend, skip)
+        )
+    
+    def _iter_parallel_classified_commits(self, repo_path, revisions, max_commits, workers, skip=0,
+                                          classifier=default_classifier):
+        """Parse and classify disjoint SHA shards in worker processes, yielding results in walk order"""
+        # spawn instead of fork: the API server runs socketio and clone threads
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            pending = deque()
+            shards = iter_commit_shards(
+                repo_path, revisions, config.INGEST_SHARD_SIZE, max_count=max_commits, skip=skip
+            )
+            for shard in shards:
+                # Workers rebuild the classifier from its (picklable) rules, once per process
+                pending.append(executor.submit(_classify_commit_shard, repo_path, shard, classifier.rules))
+                # Keep a bounded number of shards in flight so memory stays flat
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+    
+    def get_ref_watermarks(self, repository_id):
+        """Get the last analyzed tip for every ref of a repository"""
+        watermarks = self.session.query(RefWatermark).filter_by(repository_id=repository_id).all()
+        return {watermark.ref_name: watermark.tip_sha for watermark in watermarks}
+    
+    def save_ref_watermarks(self, repository_id, ref_tips):
+        """Replace the stored ref watermarks of a repository with the analyzed tips"""
+        self.session.query(RefWatermark).filter_by(repository_id=repository_id).delete()
+        now = datetime.utcnow()
+        for ref_name, tip_sha in ref_tips.items():
+            self.session.add(RefWatermark(
+                repository_id=repository_id,
+                ref_name=ref_name,
+                tip_sha=tip_sha,
+                updated_at=now
+            ))
+    
+    def plan_commit_walk(self, repo_path, repository_id):
+        """Work out which revisions still need analysis from the stored ref watermarks"""
+        ref_tips = list_ref_tips(repo_path)
+        previous_tips = self.get_ref_watermarks(repository_id)
+        
+        # Old tips may have been garbage collected after a force push, they can't be excluded then
+        reachable_previous = existing_objects(repo_path, set(previous_tips.values()))
+        revisions = build_walk_revisions(ref_tips.values(), reachable_previous)
+        return ref_tips, revisions
+    
+    def get_default_branch_name(self, repo):
+        """Get default branch name for performance"""
+        default_branch_name = 'main'
         try:
-            repo = git.Repo(repo_path)
-            commits_processed = 0
+            # Try to get the active/current branch
+            if hasattr(repo, 'active_branch'):
+                default_branch_name = repo.active_branch.name
+            else:
+                # Fallback: check for common main branch names
+                for branch_name in ['main', 'master', 'develop']:
+                    try:
+                        if branch_name in [b.name for b in repo.branches]:
+                            default_branch_name = branch_name
+                            break
+                    except Exception:
+                        continue
+        except Exception:
+            pass
+        return default_branch_name
+    
+    def build_commit_row(self, classified_commit, repository_id, contributor_id, branch_name):
+        """Build the commits table row for a classified log record"""
+        log_commit = classified_commit.log_commit
+        
+        # Commit stats come straight from the numstat output
+        files_changed = len(log_commit.files)
+        lines_added = sum(insertions for _, insertions, _ in log_commit.files)
+        lines_deleted = sum(deletions for _, _, deletions in log_commit.files)
+        
+        # Handle commit date conversion with validation; stored as naive UTC like every other timestamp
+        try:
+            commit_timestamp = log_commit.committed_date
+            commit_date = datetime.fromtimestamp(commit_timestamp, timezone.utc).replace(tzinfo=None)
+            
+            # Validate reasonable date range (1970-2100)
+            if commit_date.year < 1970 or commit_date.year > 2100:
+                if commit_date.year < 1970:
+                    commit_date = datetime(1970, 1, 1)
+                elif commit_date.year > 2100:
+                    commit_date = datetime.utcnow()
+                    
+        except (ValueError, OSError):
+            commit_date = datetime.utcnow()
+        
+        return {
+            'sha': log_commit.sha,
+            'repository_id': repository_id,
+            'contributor_id': contributor_id,
+            'message': log_commit.message.strip(),
+            'commit_date': commit_date,
+            'author_name': log_commit.author_name,
+            'author_email': log_commit.author_email,
+            'files_changed': files_changed,
+            'lines_added': lines_added,
+            'lines_deleted': lines_deleted,
+            'commit_type': classified_commit.commit_type,
+            'branch_name': branch_name,
+            'is_merge': len(log_commit.parents) > 1
+        }
+    
+    def _prepare_commit_batch(self, classified_commits, repository_id, contributor_cache, branch_name):
+        """Turn classified records into (commit row, files) pairs, skipping commits already stored"""
+        # SHAs are unique across the whole table, so check just this batch instead of
+        # loading every known SHA up front
+        known_shas = {
+            sha for (sha,) in self.session.query(Commit.sha).filter(
+                Commit.sha.in_([classified.log_commit.sha for classified in classified_commits])
+            )
+        }
+        
+        commit_batch = []
+        for classified_commit in classified_commits:
+            log_commit = classified_commit.log_commit
+            if log_commit.sha in known_shas:
+                continue
+            
+            # Get or create contributor (use cache)
+            contributor_email = log_commit.author_email
+            if contributor_email in contributor_cache:
+                contributor = contributor_cache[contributor_email]
+            else:
+                contributor = Contributor(
+                    name=log_commit.author_name,
+                    email=contributor_email,
+                    role='developer',
+                    team='unknown',
+                    experience_level='unknown'
+                )
+                self.session.add(contributor)
+                self.session.flush()  # Get ID
+                contributor_cache[contributor_email] = contributor
             
+            commit_row = self.build_commit_row(classified_commit, repository_id, contributor.id, branch_name)
+            commit_batch.append((commit_row, classified_commit.files))
+        return commit_batch
+    
+    def analyze_repository(self, repo_path, repository_id, max_commits=None, backend='log', workers=None):
+        """Analyze new commits since the last run using per-ref watermarks"""
+        try:
             # Emit analysis started event
             if self.socketio:
                 self.socketio.emit('analysis_started', {
@@ -410,194 +671,12 @@ class GitAnalyzer:
                     'path': repo_path
                 })
             
-            # Optimize for large repositories (30k+ commits)
-            if max_commits is None or max_commits > 10000:
-                # For large repos, use faster commit counting and larger batches
-                try:
-                    # Fast commit count using git command
-                    import subprocess
-                    result = subprocess.run(['git', 'rev-list', '--count', '--all'], 
-                                          cwd=repo_path, capture_output=True, text=True, timeout=30)
-                    total_commits = int(result.stdout.strip()) if result.returncode == 0 else 0
-                    if max_commits:
-                        total_commits = min(total_commits, max_commits)
-                except:
-                    # Fallback to iterator count with limit
-                    total_commits = sum(1 for _ in repo.iter_commits('--all', max_count=min(max_commits or 50000, 50000)))
-            else:
-                total_commits = sum(1 for _ in repo.iter_commits('--all', max_count=max_commits))
-            
-            # Pre-fetch existing commit SHAs and check for missing branch names
-            existing_shas = set()
-            commits_needing_update = set()
-            existing_commits = self.session.query(Commit.sha, Commit.branch_name).filter_by(repository_id=repository_id).all()
-            for sha, branch_name in existing_commits:
-                existing_shas.add(sha)
-                # Mark commits with NULL branch names for update
-                if branch_name is None:
-                    commits_needing_update.add(sha)
-            
-            # Cache contributors to avoid repeated database queries
-            contributor_cache = {}
-            existing_contributors = self.session.query(Contributor).all()
-            for contrib in existing_contributors:
-                contributor_cache[contrib.email] = contrib
-            
-            # Get default branch name for performance
-            default_branch_name = 'main'
-            try:
-                # Try to get the active/current branch
-                if hasattr(repo, 'active_branch'):
-                    default_branch_name = repo.active_branch.name
-                else:
-                    # Fallback: check for common main branch names
-                    for branch_name in ['main', 'master', 'develop']:
-                        try:
-                            if branch_name in [b.name for b in repo.branches]:
-                                default_branch_name = branch_name
-                                break
-                        except Exception:
-                            continue
-            except Exception:
-                pass
-            
-            # Dynamic batch sizing based on repository size
-            if total_commits > 30000:
-                batch_size = 500  # Larger batches for big repos
-            elif total_commits > 10000:
-                batch_size = 250
-            else:
-                batch_size = 100
-            commit_batch = []
-            file_batch = []
-            
-            # Get commits from all branches
-            for commit in repo.iter_commits('--all', max_count=max_commits):
-                # Skip if commit already exists and doesn't need updates
-                if commit.hexsha in existing_shas and commit.hexsha not in commits_needing_update:
-                    continue
-                
-                # Use default branch name for performance (simple approach)
-                branch_name = default_branch_name
-                
-                # Check if this is an update or new commit
-                is_update = commit.hexsha in commits_needing_update
-                
-                if is_update:
-                    # Update existing commit with branch name
-                    existing_commit = self.session.query(Commit).filter_by(
-                        sha=commit.hexsha, 
-                        repository_id=repository_id
-                    ).first()
-                    if existing_commit:
-                        existing_commit.branch_name = branch_name
-                        commits_processed += 1
-                        
-                        # Emit progress updates for updates too
-                        if commits_processed % 100 == 0:
-                            print(f"Updated {commits_processed} commits...")
-                            if self.socketio and total_commits > 0:
-                                progress = min(95, int((commits_processed / total_commits) * 90) + 5)
-                                self.socketio.emit('analysis_progress', {
-                                    'repository_id': repository_id,
-                                    'stage': f'Updating commits ({commits_processed}/{total_commits})',
-                                    'progress': progress,
-                                    'commits_processed': commits_processed,
-                                    'total_commits': total_commits
-                                })
-                    continue
-                
-                # Get or create contributor (use cache)
-                contributor_email = commit.author.email
-                if contributor_email in contributor_cache:
-                    contributor = contributor_cache[contributor_email]
-                else:
-                    contributor = Contributor(
-                        name=commit.author.name,
-                        email=contributor_email,
-                        role='developer',
-                        team='unknown',
-                        experience_level='unknown'
-                    )
-                    self.session.add(contributor)
-                    self.session.flush()  # Get ID
-                    contributor_cache[contributor_email] = contributor
-                
-                # Calculate commit stats (optimized for large repos)
-                try:
-                    stats = commit.stats
-                    files_changed = len(stats.files)
-                    lines_added = stats.total['insertions']
-                    lines_deleted = stats.total['deletions']
-                except Exception:
-                    # Fallback for problematic commits
-                    files_changed = 0
-                    lines_added = 0
-                    lines_deleted = 0
-                    stats = type('MockStats', (), {'files': {}})()
-                
-                # Handle commit date conversion with validation
-                try:
-                    commit_timestamp = commit.committed_date
-                    commit_date = datetime.fromtimestamp(commit_timestamp)
-                    
-                    # Validate reasonable date range (1970-2100)
-                    if commit_date.year < 1970 or commit_date.year > 2100:
-                        if commit_date.year < 1970:
-                            commit_date = datetime.fromtimestamp(0)
-                        elif commit_date.year > 2100:
-                            commit_date = datetime.utcnow()
-                            
-                except (ValueError, OSError):
-                    commit_date = datetime.utcnow()
-                
-                # Create commit record for batch
-                commit_record = Commit(
-                    sha=commit.hexsha,
-                    repository_id=repository_id,
-                    contributor_id=contributor.id,
-                    message=commit.message.strip(),
-                    commit_date=commit_date,
-                    author_name=commit.author.name,
-                    author_email=commit.author.email,
-                    files_changed=files_changed,
-                    lines_added=lines_added,
-                    lines_deleted=lines_deleted,
-                    commit_type=self.classify_commit_type(commit.message),
-                    branch_name=branch_name,
-                    is_merge=len(commit.parents) > 1
-                )
-                
-                commit_batch.append((commit_record, stats.files))
-                commits_processed += 1
-                
-                # Process batch when it reaches batch_size
-                if len(commit_batch) >= batch_size:
-                    self._process_commit_batch(commit_batch, file_batch)
-                    commit_batch = []
-                    
-                    # Dynamic progress update frequency based on repo size
-                    progress_interval = 500 if total_commits > 30000 else 250 if total_commits > 10000 else 100
-                    
-                    # Emit progress updates
-                    if commits_processed % progress_interval == 0:
-                        print(f"Processed {commits_processed} commits...")
-                        if self.socketio and total_commits > 0:
-                            progress = min(95, int((commits_processed / total_commits) * 90) + 5)
-                            self.socketio.emit('analysis_progress', {
-                                'repository_id': repository_id,
-                                'stage': f'Processing commits ({commits_processed}/{total_commits})',
-                                'progress': progress,
-                                'commits_processed': commits_processed,
-                                'total_commits': total_commits
-                            })
-            
-            # Process remaining commits in batch
-            if commit_batch:
-                self._process_commit_batch(commit_batch, file_batch)
-            
-            # Final commit
-            self.session.commit()
+            # Only walk old_tip..new_tip for every ref that moved since the last analysis
+            ref_tips, revisions = self.plan_commit_walk(repo_path, repository_id)
+            commits_processed = self.ingest_commits(
+                repo_path, repository_id, ref_tips, revisions,
+                max_commits=max_commits, backend=backend, workers=workers
+            )
             
             # Emit completion event
             if self.socketio:
@@ -626,66 +705,207 @@ class GitAnalyzer:
             self.session.rollback()
             return 0
     
-    def _process_commit_batch(self, commit_batch, file_batch):
-        """Process a batch of commits and their files efficiently with bulk operations"""
+    def ingest_commits(self, repo_path, repository_id, ref_tips, revisions, max_commits=None,
+                       backend='log', workers=None, skip=0, total_commits=None,
+                       on_batch=None, should_cancel=None):
+        """Walk the planned revisions and store new commits, batch by batch
+        
+        skip resumes a walk after that many commits. on_batch(commits_walked, commits_processed)
+        runs after every stored batch, and should_cancel() is checked right after it.
+        """
+        if workers is None:
+            workers = config.INGEST_WORKERS
+        
+        repo = git.Repo(repo_path)
+        commits_processed = 0
+        
+        if total_commits is None:
+            total_commits = count_commits(repo_path, revisions) if revisions else 0
+        if max_commits:
+            total_commits = min(total_commits, max_commits)
+        
+        default_branch_name = self.get_default_branch_name(repo)
+        classifier = classifier_for(load_rules(self.session, repository_id))
+        # Ids cached by an earlier run may belong to a repository deleted since
+        self.path_index.clear()
+        
+        # Backfill branch names for commits stored before branch tracking existed
+        commits_processed += self.session.query(Commit).filter(
+            Commit.repository_id == repository_id,
+            Commit.branch_name.is_(None)
+        ).update({Commit.branch_name: default_branch_name}, synchronize_session=False)
+        
+        # Cache contributors to avoid repeated database queries
+        contributor_cache = {}
+        existing_contributors = self.session.query(Contributor).all()
+        for contrib in existing_contributors:
+            contributor_cache[contrib.email] = contrib
+        
+        # Dynamic batch sizing based on repository size
+        if total_commits > 30000:
+            batch_size = 500  # Larger batches for big repos
+        elif total_commits > 10000:
+            batch_size = 250
+        else:
+            batch_size = 100
+        
+        # Dynamic progress update frequency based on repo size
+        progress_interval = 500 if total_commits > 30000 else 250 if total_commits > 10000 else 100
+        
+        commits_walked = skip
+        last_progress_at = skip
+        classified_batch = []
+        remaining = max_commits - skip if max_commits else None
+        classified_commits = self.iter_classified_commits(
+            repo, repo_path, revisions, remaining, backend, workers, skip, classifier
+        ) if revisions and (remaining is None or remaining > 0) else []
+        
+        def store_batch():
+            commit_batch = self._prepare_commit_batch(classified_batch, repository_id, contributor_cache, default_branch_name)
+            stored = self._process_commit_batch(commit_batch)
+            # Committed batches are visible to metric queries, drop cached results
+            data_versions.bump(repository_id)
+            return stored
+        
+        # Single writer: workers only parse and classify, all inserts happen here in walk order
+        for classified_commit in classified_commits:
+            classified_batch.append(classified_commit)
+            if len(classified_batch) < batch_size:
+                continue
+            
+            # Process batch when it reaches batch_size
+            commits_processed += store_batch()
+            commits_walked += len(classified_batch)
+            classified_batch = []
+            
+            if on_batch:
+                on_batch(commits_walked, commits_processed)
+            
+            # Emit progress updates
+            if commits_walked - last_progress_at >= progress_interval:
+                last_progress_at = commits_walked
+                print(f"Processed {commits_processed} commits...")
+                if self.socketio and total_commits > 0:
+                    progress = min(95, int((commits_walked / total_commits) * 90) + 5)
+                    self.socketio.emit('analysis_progress', {
+                        'repository_id': repository_id,
+                        'stage': f'Processing commits ({commits_walked}/{total_commits})',
+                        'progress': progress,
+                        'commits_processed': commits_processed,
+                        'total_commits': total_commits
+                    })
+            
+            if should_cancel and should_cancel():
+                raise AnalysisCancelled(commits_walked, commits_processed)
+        
+        # Process remaining commits in batch
+        if classified_batch:
+            commits_processed += store_batch()
+            commits_walked += len(classified_batch)
+            if on_batch:
+                on_batch(commits_walked, commits_processed)
+        
+        # A truncated walk hasn't seen everything below the new tips, keep the old watermarks
+        if not max_commits:
+            self.save_ref_watermarks(repository_id, ref_tips)
+            # Everything below the tips is stored now; only branches whose tip moved are walked again
+            update_branch_bitmaps(self.session, repo_path, repository_id, ref_tips, default_branch_name)
+        
+        # Final commit
+        self.session.commit()
+        data_versions.bump(repository_id)
+        self.path_index.clear()
+        return commits_processed
+    
+    def _process_commit_batch(self, commit_batch):
+        """Write a batch of commits and their files with Core bulk inserts, returns commits stored"""
+        if not commit_batch:
+            self.session.commit()
+            return 0
+        
         try:
-            # Add all commits to session
-            commit_records = []
-            for commit_record, file_stats in commit_batch:
-                self.session.add(commit_record)
-                commit_records.append((commit_record, file_stats))
-            
-            # Flush to get commit IDs
-            self.session.flush()
-            
-            # Bulk insert files for better performance on large batches
-            file_objects = []
-            for commit_record, file_stats in commit_records:
-                # Limit files per commit for very large commits (performance)
-                file_items = list(file_stats.items())
-                # if len(file_items) > 1000:  # Skip processing commits with >1000 files
-                #     print(f"Skipping file processing for large commit {commit_record.sha[:8]} with {len(file_items)} files")
-                #     continue
-                    
-                for file_path, file_stat_dict in file_items:
-                    file_objects.append(CommitFile(
-                        commit_id=commit_record.id,
-                        file_path=file_path,
-                        file_type=self.get_file_type(file_path),
-                        lines_added=file_stat_dict['insertions'],
-                        lines_deleted=file_stat_dict['deletions'],
-                        is_test_file=self.is_test_file(file_path)
-                    ))
-            
-            # Bulk add file objects
-            if file_objects:
-                self.session.bulk_save_objects(file_objects)
+            # Outside the savepoints below: paths of a skipped commit stay, unreferenced, which is harmless
+            file_stats_by_repository = {}
+            for commit_row, file_stats in commit_batch:
+                file_stats_by_repository.setdefault(commit_row['repository_id'], []).extend(file_stats)
+            paths = {
+                repository_id: self.path_index.resolve(self.session, repository_id, (
+                    (file_path, file_type, is_test_file)
+                    for file_path, file_type, _, _, is_test_file in file_stats
+                ))
+                for repository_id, file_stats in file_stats_by_repository.items()
+            }
+            
+            stored = self._insert_isolating_failures(commit_batch, paths)
             
             # Commit the batch
             self.session.commit()
-            
-        except Exception as e:
-            print(f"Error in batch processing: {e}")
-            self.session.rollback()
-            # Fallback to individual processing
-            for commit_record, file_stats in commit_batch:
-                try:
-                    self.session.add(commit_record)
-                    self.session.flush()
-                    
-                    # Process files individually as fallback
-                    for file_path, file_stat_dict in list(file_stats.items())[:100]:  # Limit to 100 files
-                        commit_file = CommitFile(
-                            commit_id=commit_record.id,
-                            file_path=file_path,
-                            file_type=self.get_file_type(file_path),
-                            lines_added=file_stat_dict['insertions'],
-                            lines_deleted=file_stat_dict['deletions'],
-                            is_test_file=self.is_test_file(file_path)
-                        )
-                        self.session.add(commit_file)
-                    
-                    self.session.commit()
-                except Exception as inner_e:
-                    print(f"Error processing individual commit: {inner_e}")
-                    self.session.rollback()
+        except Exception:
+            # Path ids inserted by the lost transaction are gone
+            self.path_index.clear()
+            raise
+        return stored
+    
+    def _insert_isolating_failures(self, commit_batch, paths):
+        """Insert in a savepoint; on failure retry each half separately so only bad rows are dropped"""
+        try:
+            with self.session.begin_nested():
+                self._insert_commit_rows(commit_batch, paths)
+            return len(commit_batch)
+        except SQLAlchemyError as e:
+            if len(commit_batch) == 1:
+                commit_row, _ = commit_batch[0]
+                print(f"Skipping commit {commit_row['sha'][:8]}: {e}")
+                return 0
+            
+            middle = len(commit_batch) // 2
+            return (self._insert_isolating_failures(commit_batch[:middle], paths) +
+                    self._insert_isolating_failures(commit_batch[middle:], paths))
+    
+    def _insert_commit_rows(self, commit_batch, paths):
+        """executemany INSERT of commit rows, ids come back via RETURNING, then chunked file inserts
+        
+        paths maps repository ids to {path: (path_id, is_test_file)}, see PathIndex.resolve.
+        """
+        commit_ids = self.session.execute(
+            insert(Commit.__table__).returning(Commit.__table__.c.id, sort_by_parameter_order=True),
+            [commit_row for commit_row, _ in commit_batch]
+        ).scalars().all()
+        
+        file_rows = []
+        rollup_commits = []
+        for commit_id, (commit_row, file_stats) in zip(commit_ids, commit_batch):
+            repository_paths = paths[commit_row['repository_id']]
+            test_files = 0
+            for file_path, _, insertions, deletions, _ in file_stats:
+                path_id, is_test_file = repository_paths[file_path]
+                test_files += is_test_file
+                file_rows.append({
+                    'commit_id': commit_id,
+                    'path_id': path_id,
+                    'lines_added': insertions,
+                    'lines_deleted': deletions
+                })
+                if len(file_rows) >= COMMIT_FILE_CHUNK_SIZE:
+                    self.session.execute(insert(CommitFile.__table__), file_rows)
+                    file_rows = []
+        
+            # Counted with the stored flags, the ones rollup rebuilds and metric queries read
+            rollup_commits.append((commit_row, test_files, len(file_stats) - test_files))
+        
+        if file_rows:
+            self.session.execute(insert(CommitFile.__table__), file_rows)
+        
+        # Same savepoint as the rows themselves, so a skipped commit never reaches the rollup
+        add_commits_to_rollups(self.session, rollup_commits)
+        return commit_ids
+
+
+def _classify_commit_shard(repo_path, shas, rules):
+    """Worker process entry point: parse and classify one shard of commits"""
+    analyzer = GitAnalyzer(None)
+    classifier = classifier_for(rules)
+    return [
+        analyzer.classify_log_commit(log_commit, classifier)
+        for log_commit in iter_log_commits(repo_path, stdin_revs=shas, no_walk=True)
+    ]
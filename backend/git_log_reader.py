@@ -0,0 +1,308 @@
+"""
+Streaming commit reader built on a single `git log --numstat` subprocess
+"""
+import subprocess
+import tempfile
+from collections import namedtuple
+
+# One parsed commit; files is a list of (path, insertions, deletions) tuples
+LogCommit = namedtuple('LogCommit', [
+    'sha', 'parents', 'author_name', 'author_email', 'committed_date', 'message', 'files'
+])
+
+RECORD_SEPARATOR = b'\x1e'
+FIELD_SEPARATOR = '\x1f'
+HEADER_TERMINATOR = '\x1f\x00'
+
+# Header fields are unit-separated and the whole record starts with a record separator,
+# so the NUL-terminated numstat entries that follow can be split off unambiguously
+LOG_FORMAT = '%x1e%H%x1f%P%x1f%an%x1f%ae%x1f%ct%x1f%B%x1f'
+
+# Mirrors GitPython's Commit.stats: no rename detection, merges diffed against first parent
+LOG_OPTIONS = ['--numstat', '-z', '--no-renames', '--diff-merges=first-parent', '--no-color']
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def build_log_command(revs=('--all',), max_count=None, skip=None, use_stdin=False, no_walk=False):
+    """Build the git log command line for the given revisions"""
+    command = ['git', '-c', 'core.quotepath=off', 'log', f'--format={LOG_FORMAT}'] + LOG_OPTIONS
+    if no_walk:
+        # Show exactly the given commits, in the given order
+        command.append('--no-walk=unsorted')
+    if max_count:
+        command.append(f'--max-count={int(max_count)}')
+    if skip:
+        command.append(f'--skip={int(skip)}')
+    if use_stdin:
+        # Revisions are fed on stdin, a repository can have more refs than fit on a command line
+        command.append('--stdin')
+    else:
+        command.extend(revs)
+    command.append('--')
+    return command
+
+
+def _run_git(repo_path, args, input_lines=None):
+    """Run a short git command and return its decoded stdout"""
+    stdin = ''.join(f'{line}\n' for line in input_lines).encode() if input_lines is not None else None
+    result = subprocess.run(['git'] + args, cwd=repo_path, input=stdin, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {result.stderr.decode('utf-8', errors='replace').strip()}")
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def list_ref_tips(repo_path):
+    """Return {ref_name: commit_sha} for HEAD and every ref that points at a commit"""
+    output = _run_git(repo_path, [
+        'for-each-ref',
+        '--format=%(refname)%00%(objecttype)%00%(objectname)%00%(*objecttype)%00%(*objectname)'
+    ])
+
+    ref_tips = {}
+    for line in output.splitlines():
+        ref_name, object_type, object_name, peeled_type, peeled_name = line.split('\x00')
+        if object_type == 'commit':
+            ref_tips[ref_name] = object_name
+        elif peeled_type == 'commit':
+            # Annotated tag, record the tagged commit
+            ref_tips[ref_name] = peeled_name
+
+    # Detached HEAD is part of --all as well; an unborn HEAD simply has no tip
+    head = subprocess.run(
+        ['git', 'rev-parse', '--verify', '--quiet', 'HEAD^{commit}'],
+        cwd=repo_path, capture_output=True, text=True
+    )
+    if head.returncode == 0 and head.stdout.strip():
+        ref_tips['HEAD'] = head.stdout.strip()
+    return ref_tips
+
+
+def existing_objects(repo_path, shas):
+    """Return the subset of object ids that still exist in the repository"""
+    shas = sorted(shas)
+    if not shas:
+        return set()
+    output = _run_git(repo_path, ['cat-file', '--batch-check=%(objectname) %(objecttype)'], shas)
+    return {
+        parts[0] for parts in (line.split() for line in output.splitlines())
+        if len(parts) == 2 and parts[1] == 'commit'
+    }
+
+
+def build_walk_revisions(current_tips, previous_tips):
+    """Revisions covering commits reachable from the current tips but not from already analyzed tips"""
+    previous_tips = set(previous_tips)
+    new_tips = sorted(set(current_tips) - previous_tips)
+    if not new_tips:
+        return []
+    return new_tips + [f'^{sha}' for sha in sorted(previous_tips)]
+
+
+def count_commits(repo_path, revisions):
+    """Count the commits a walk over the given revisions will visit"""
+    return int(_run_git(repo_path, ['rev-list', '--count', '--stdin'], revisions).strip() or 0)
+
+
+def parse_record(record):
+    """Parse a single commit record (bytes without the leading separator)"""
+    text = record.decode('utf-8', errors='replace')
+    # Header and message never contain NUL, so the first terminator ends the header
+    header_end = text.find(HEADER_TERMINATOR)
+    if header_end == -1:
+        # Commit without file changes at the very end of the stream
+        header, numstat = text.rstrip('\x00'), ''
+        if header.endswith(FIELD_SEPARATOR):
+            header = header[:-1]
+    else:
+        header, numstat = text[:header_end], text[header_end + len(HEADER_TERMINATOR):]
+
+    sha, parents, author_name, author_email, committed_date, message = header.split(FIELD_SEPARATOR, 5)
+
+    files = []
+    for entry in numstat.lstrip('\n').split('\x00'):
+        if not entry:
+            continue
+        parts = entry.split('\t', 2)
+        if len(parts) != 3:
+            continue
+        insertions, deletions, path = parts
+        # Binary files report '-' for both counts, GitPython counts them as 0
+        files.append((
+            path,
+            int(insertions) if insertions != '-' else 0,
+            int(deletions) if deletions != '-' else 0
+        ))
+
+    return LogCommit(
+        sha=sha,
+        parents=parents.split() if parents else [],
+        author_name=author_name,
+        author_email=author_email,
+        committed_date=int(committed_date),
+        message=message,
+        files=files
+    )
+
+
+def parse_log_stream(chunks):
+    """Incrementally parse git log output, yielding LogCommit tuples as records complete"""
+    # Parts of the record still being received; joined once it is complete so a huge
+    # commit spread over many chunks is not re-copied for every chunk
+    pending = []
+    for chunk in chunks:
+        if RECORD_SEPARATOR not in chunk:
+            if chunk:
+                pending.append(chunk)
+            continue
+
+        records = chunk.split(RECORD_SEPARATOR)
+        pending.append(records[0])
+        record = b''.join(pending)
+        if record:
+            yield parse_record(record)
+
+        for record in records[1:-1]:
+            if record:
+                yield parse_record(record)
+
+        # The last element may be an incomplete record, keep it for the next chunk
+        pending = [records[-1]]
+
+    record = b''.join(pending)
+    if record:
+        yield parse_record(record)
+
+
+def _read_chunks(stream, chunk_size=READ_CHUNK_SIZE):
+    """Read a binary stream in fixed-size chunks"""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _start_git(command, repo_path, input_lines=None):
+    """Start a streaming git process, returns (process, stderr file)
+
+    stderr goes to a temporary file rather than a pipe: nobody reads it until stdout ends, and a
+    full stderr pipe would block git (warnings, many bad revisions) while we wait on stdout.
+    """
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        command,
+        cwd=repo_path,
+        stdin=subprocess.PIPE if input_lines is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=stderr_file
+    )
+    if input_lines is not None:
+        # git reads all revisions before it starts walking, so this can't block on stdout
+        try:
+            process.stdin.write(''.join(f'{line}\n' for line in input_lines).encode())
+            process.stdin.close()
+        except BrokenPipeError:
+            # git already gave up on a revision, its exit status and stderr tell why
+            pass
+    return process, stderr_file
+
+
+def _stop_git(process, stderr_file):
+    """Wait for (or kill) a streaming git process, returns (return code, stderr text)"""
+    # The generator may be closed early (max commits, cancellation), don't leave git running
+    if process.poll() is None:
+        process.kill()
+    process.stdout.close()
+    return_code = process.wait()
+    stderr_file.seek(0)
+    stderr = stderr_file.read().decode('utf-8', errors='replace').strip()
+    stderr_file.close()
+    return return_code, stderr
+
+
+def iter_log_commits(repo_path, revs=('--all',), max_count=None, skip=None, stdin_revs=None, no_walk=False):
+    """Stream commits from a repository with one long-running git log process"""
+    use_stdin = stdin_revs is not None
+    command = build_log_command(revs, max_count=max_count, skip=skip, use_stdin=use_stdin, no_walk=no_walk)
+    process, stderr_file = _start_git(command, repo_path, stdin_revs)
+    try:
+        for log_commit in parse_log_stream(_read_chunks(process.stdout)):
+            yield log_commit
+    finally:
+        return_code, stderr = _stop_git(process, stderr_file)
+
+    if return_code != 0:
+        raise RuntimeError(f"git log failed: {stderr}")
+
+
+def iter_commit_shards(repo_path, revisions, shard_size, max_count=None, skip=None):
+    """Split a walk into consecutive lists of commit SHAs, in git log order"""
+    command = ['git', 'rev-list', '--stdin']
+    if max_count:
+        command.append(f'--max-count={int(max_count)}')
+    if skip:
+        command.append(f'--skip={int(skip)}')
+    process, stderr_file = _start_git(command, repo_path, revisions)
+    try:
+        shard = []
+        for line in process.stdout:
+            shard.append(line.decode().strip())
+            if len(shard) >= shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+    finally:
+        return_code, stderr = _stop_git(process, stderr_file)
+
+    if return_code != 0:
+        raise RuntimeError(f"git rev-list failed: {stderr}")
+
+
+def iter_gitpython_commits(repo, revs=('--all',), max_count=None, skip=0):
+    """Legacy reader using GitPython's per-commit stats (one git diff per commit)"""
+    for commit in repo.iter_commits(list(revs), max_count=max_count, skip=skip):
+        try:
+            files = [
+                (path, stat['insertions'], stat['deletions'])
+                for path, stat in commit.stats.files.items()
+            ]
+        except Exception:
+            # Fallback for problematic commits
+            files = []
+
+        yield LogCommit(
+            sha=commit.hexsha,
+            parents=[parent.hexsha for parent in commit.parents],
+            author_name=commit.author.name,
+            author_email=commit.author.email,
+            committed_date=commit.committed_date,
+            message=commit.message,
+            files=files
+        )
+
+
+def iter_rev_list_parents(repo_path, revisions):
+    """Stream (sha, parent shas) of every commit a walk visits, children always before their parents"""
+    process, stderr_file = _start_git(
+        ['git', 'rev-list', '--topo-order', '--parents', '--stdin'], repo_path, revisions
+    )
+    try:
+        for line in process.stdout:
+            sha, *parents = line.decode().split()
+            yield sha, parents
+    finally:
+        return_code, stderr = _stop_git(process, stderr_file)
+
+    if return_code != 0:
+        raise RuntimeError(f"git rev-list failed: {stderr}")
+
+
+def is_ancestor(repo_path, ancestor, descendant):
+    """Whether ancestor is reachable from descendant; False as well when either no longer exists"""
+    result = subprocess.run(
+        ['git', 'merge-base', '--is-ancestor', ancestor, descendant],
+        cwd=repo_path, capture_output=True
+    )
+    return result.returncode == 0
@@ -0,0 +1,327 @@
+"""
+Background jobs (analysis, reclassification): bounded worker pool, status, cancellation and resume after restart
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from models import AnalysisJob, Repository
+from git_analyzer import GitAnalyzer, AnalysisCancelled
+from git_log_reader import count_commits
+from classifiers import load_rules, classifier_for
+from reclassification import reclassify_repository
+import config
+
+ACTIVE_STATUSES = ('queued', 'running')
+JOB_KINDS = ('analysis', 'reclassify')
+# How each job kind reads in error messages: (verb for failures, noun for cancellations)
+JOB_KIND_LABELS = {'analysis': ('analyzing', 'Analysis'), 'reclassify': ('reclassifying', 'Reclassification')}
+
+
+def serialize_job(job):
+    """Convert an AnalysisJob row to the API representation"""
+    if job.total_commits:
+        progress = min(100, int((job.commits_walked or 0) / job.total_commits * 100))
+    else:
+        progress = 100 if job.status == 'completed' else 0
+
+    return {
+        'id': job.id,
+        'repository_id': job.repository_id,
+        'status': job.status,
+        'kind': job.kind or 'analysis',
+        'progress': progress,
+        'commits_walked': job.commits_walked or 0,
+        'commits_processed': job.commits_processed or 0,
+        'total_commits': job.total_commits,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'updated_at': job.updated_at.isoformat() if job.updated_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+class JobManager:
+    def __init__(self, Session, socketio=None, max_workers=None, frames=None):
+        self.Session = Session
+        self.socketio = socketio
+        # FrameStore to invalidate after reclassification, which keeps commit counts unchanged
+        self.frames = frames
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.JOB_WORKERS,
+            thread_name_prefix='analysis-job'
+        )
+        self._cancel_events = {}
+        self._lock = threading.Lock()
+
+    def submit(self, repository_id, workers=None, kind='analysis'):
+        """Queue a job of the given kind; returns (job, created) and reuses the repository's active job
+        
+        One active job per repository of either kind, so reclassification never races ingestion.
+        The database enforces it (ux_analysis_jobs_active_repository): a concurrent submit that
+        loses the insert gets the winner's job.
+        """
+        session = self.Session()
+        try:
+            active_job = self._active_job(session, repository_id)
+            if active_job:
+                return serialize_job(active_job), False
+
+            job = AnalysisJob(repository_id=repository_id, status='queued', kind=kind, workers=workers)
+            session.add(job)
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                active_job = self._active_job(session, repository_id)
+                if active_job is None:
+                    raise
+                return serialize_job(active_job), False
+            job_data = serialize_job(job)
+        finally:
+            session.close()
+
+        self._schedule(job_data['id'])
+        return job_data, True
+
+    def _active_job(self, session, repository_id):
+        return session.query(AnalysisJob).filter(
+            AnalysisJob.repository_id == repository_id,
+            AnalysisJob.status.in_(ACTIVE_STATUSES)
+        ).first()
+
+    def get(self, job_id):
+        """Get a job's current status"""
+        session = self.Session()
+        try:
+            job = session.get(AnalysisJob, job_id)
+            return serialize_job(job) if job else None
+        finally:
+            session.close()
+
+    def list_for_repository(self, repository_id, limit=20):
+        """Get the most recent jobs of a repository"""
+        session = self.Session()
+        try:
+            jobs = session.query(AnalysisJob).filter_by(
+                repository_id=repository_id
+            ).order_by(AnalysisJob.id.desc()).limit(limit).all()
+            return [serialize_job(job) for job in jobs]
+        finally:
+            session.close()
+
+    def cancel(self, job_id):
+        """Cancel a job; a running job stops after the batch it is writing"""
+        session = self.Session()
+        try:
+            job = session.get(AnalysisJob, job_id)
+            if not job:
+                return None
+
+            with self._lock:
+                cancel_event = self._cancel_events.get(job_id)
+            if cancel_event:
+                cancel_event.set()
+
+            if job.status == 'queued' or (job.status == 'running' and not cancel_event):
+                # Not picked up by a worker (yet), nothing to wait for
+                job.status = 'cancelled'
+                job.finished_at = datetime.utcnow()
+                session.commit()
+            return serialize_job(job)
+        finally:
+            session.close()
+
+    def resume_incomplete(self):
+        """Re-queue jobs interrupted by a shutdown or crash; analyses continue from their checkpoint,
+        reclassifications start over (rows already rewritten are skipped as unchanged)"""
+        session = self.Session()
+        try:
+            job_ids = [job_id for (job_id,) in session.query(AnalysisJob.id).filter(
+                AnalysisJob.status.in_(ACTIVE_STATUSES)
+            ).order_by(AnalysisJob.id)]
+        finally:
+            session.close()
+
+        for job_id in job_ids:
+            self._schedule(job_id)
+        return len(job_ids)
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and wait for running ones"""
+        self.executor.shutdown(wait=wait)
+
+    def _schedule(self, job_id):
+        with self._lock:
+            self._cancel_events[job_id] = threading.Event()
+        self.executor.submit(self._run, job_id)
+
+    def _emit(self, event, data):
+        if self.socketio:
+            self.socketio.emit(event, data)
+
+    def _run(self, job_id):
+        """Worker thread: run (or resume) one job with its own session"""
+        session = self.Session()
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+        job = None
+        kind = 'analysis'
+
+        try:
+            job = session.get(AnalysisJob, job_id)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                return
+            kind = job.kind or 'analysis'
+
+            if cancel_event.is_set():
+                raise AnalysisCancelled(job.commits_walked or 0, job.commits_processed or 0)
+
+            repo = session.get(Repository, job.repository_id)
+            if repo is None:
+                raise Exception('Repository not found')
+
+            if kind == 'reclassify':
+                message = self._reclassify(session, job, repo, cancel_event)
+            else:
+                message = self._analyze(session, job, repo, cancel_event)
+
+            job.status = 'completed'
+            job.finished_at = job.updated_at = datetime.utcnow()
+            session.commit()
+
+            self._emit('analysis_completed', {
+                'repository_id': repo.id,
+                'job_id': job_id,
+                'kind': kind,
+                'success': True,
+                'commits_processed': job.commits_processed,
+                'message': message
+            })
+
+        except AnalysisCancelled:
+            session.rollback()
+            if job is not None:
+                job.status = 'cancelled'
+                job.finished_at = job.updated_at = datetime.utcnow()
+                session.commit()
+                self._emit('analysis_completed', {
+                    'repository_id': job.repository_id,
+                    'job_id': job_id,
+                    'kind': kind,
+                    'success': False,
+                    'cancelled': True,
+                    'error': f'{JOB_KIND_LABELS[kind][1]} cancelled'
+                })
+
+        except Exception as e:
+            error_msg = f"Error {JOB_KIND_LABELS[kind][0]} repository: {str(e)}"
+            print(error_msg)
+            session.rollback()
+            if job is not None:
+                job.status = 'failed'
+                job.error = error_msg
+                job.finished_at = job.updated_at = datetime.utcnow()
+                session.commit()
+                self._emit('analysis_completed', {
+                    'repository_id': job.repository_id,
+                    'job_id': job_id,
+                    'kind': kind,
+                    'success': False,
+                    'error': error_msg
+                })
+
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+            session.close()
+
+    def _analyze(self, session, job, repo, cancel_event):
+        """Walk and store the repository's new commits, resuming from the job's checkpoint"""
+        analyzer = GitAnalyzer(session, self.socketio)
+        resumed = job.revisions is not None
+
+        if resumed:
+            ref_tips = json.loads(job.ref_tips)
+            revisions = json.loads(job.revisions)
+        else:
+            # Pin the walk so a resumed job sees exactly the same commit sequence
+            ref_tips, revisions = analyzer.plan_commit_walk(repo.path, repo.id)
+            job.ref_tips = json.dumps(ref_tips)
+            job.revisions = json.dumps(revisions)
+            job.total_commits = count_commits(repo.path, revisions) if revisions else 0
+            job.commits_walked = 0
+            job.commits_processed = 0
+
+        job.status = 'running'
+        job.started_at = job.started_at or datetime.utcnow()
+        job.updated_at = datetime.utcnow()
+        session.commit()
+
+        self._emit('analysis_started', {
+            'repository_id': repo.id,
+            'path': repo.path,
+            'job_id': job.id,
+            'kind': 'analysis',
+            'resumed': resumed
+        })
+
+        processed_before = job.commits_processed or 0
+
+        def checkpoint(commits_walked, commits_processed):
+            # Runs right after _process_commit_batch committed the batch
+            job.commits_walked = commits_walked
+            job.commits_processed = processed_before + commits_processed
+            job.updated_at = datetime.utcnow()
+            session.commit()
+
+        commits_processed = analyzer.ingest_commits(
+            repo.path, repo.id, ref_tips, revisions,
+            workers=job.workers,
+            skip=job.commits_walked or 0,
+            total_commits=job.total_commits,
+            on_batch=checkpoint,
+            should_cancel=cancel_event.is_set
+        )
+
+        repo.last_analyzed = datetime.utcnow()
+        job.commits_processed = processed_before + commits_processed
+        return f'Analysis complete. Processed {job.commits_processed} commits.'
+
+    def _reclassify(self, session, job, repo, cancel_event):
+        """Apply the repository's current classification rules to its stored commits"""
+        job.status = 'running'
+        job.started_at = job.started_at or datetime.utcnow()
+        job.updated_at = datetime.utcnow()
+        job.commits_walked = 0
+        job.commits_processed = 0
+        session.commit()
+
+        self._emit('analysis_started', {
+            'repository_id': repo.id,
+            'path': repo.path,
+            'job_id': job.id,
+            'kind': 'reclassify'
+        })
+
+        def checkpoint(commits_scanned, commits_total):
+            job.total_commits = commits_total
+            job.commits_walked = commits_scanned
+            job.updated_at = datetime.utcnow()
+            session.commit()
+
+        classifier = classifier_for(load_rules(session, repo.id))
+        result = reclassify_repository(
+            session, repo.id, classifier, on_chunk=checkpoint, should_cancel=cancel_event.is_set
+        )
+        if self.frames is not None:
+            self.frames.invalidate(repo.id)
+
+        job.total_commits = result['commits_total']
+        job.commits_processed = result['commits_reclassified']
+        if result['cancelled']:
+            raise AnalysisCancelled(result['commits_scanned'], result['commits_reclassified'])
+        return (f"Reclassification complete. {result['commits_reclassified']} commits and "
+                f"{result['paths_reclassified']} paths changed classification.")
@@ -0,0 +1,191 @@
+"""
+LRU cache for MetricsCalculator results, invalidated through per-repository data versions
+"""
+import inspect
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+import config
+
+# Methods whose results are cached; everything else passes straight through to the calculator
+CACHED_METHODS = (
+    'get_commit_velocity',
+    'get_code_churn',
+    'get_test_coverage_impact',
+    'get_contributor_stats',
+    'get_commit_type_distribution',
+    'get_daily_activity',
+    'get_team_comparison',
+    'get_contributor_detailed_metrics',
+    'get_contributor_activity_timeline',
+    'compare_contributors',
+    'get_contributors_bulk_metrics',
+    'get_dashboard'
+)
+
+# Rough per-entry bookkeeping cost (key tuple, OrderedDict node) on top of the payload
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class DataVersions:
+    """Per-repository counters, bumped whenever a repository's commit data or contributors change
+
+    Versions restart at 0 with the process, so anything handed to clients (ETags) also carries
+    the instance token, which is new for every process.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._modified = {}
+        self._lock = threading.Lock()
+        self.instance = uuid.uuid4().hex
+        # HTTP dates have one-second resolution
+        self.started_at = datetime.utcnow().replace(microsecond=0)
+
+    def get(self, repository_id):
+        return self._versions.get(repository_id, 0)
+
+    def last_modified(self, repository_id):
+        """UTC time of the last bump, or the process start when there was none"""
+        return self._modified.get(repository_id, self.started_at)
+
+    def bump(self, repository_id):
+        with self._lock:
+            self._versions[repository_id] = self._versions.get(repository_id, 0) + 1
+            self._modified[repository_id] = datetime.utcnow().replace(microsecond=0)
+            return self._versions[repository_id]
+
+
+# Shared by the API and the analysis workers, they run in the same process
+data_versions = DataVersions()
+
+
+def _freeze(value):
+    """Make an argument value hashable for use in a cache key"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def estimate_size(value):
+    """Approximate memory used by a cached result, based on its JSON size"""
+    return len(json.dumps(value, default=str)) + ENTRY_OVERHEAD_BYTES
+
+
+class MetricsCache:
+    """Thread-safe LRU mapping bounded by an approximate byte budget"""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = config.METRICS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (found, value) and mark the entry as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value):
+        """Store a result, evicting least recently used entries to stay under the budget"""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+class CachedMetricsCalculator:
+    """Drop-in wrapper around MetricsCalculator that memoizes metric results
+
+    Keys are the normalized call arguments plus the repository's data version and the
+    current UTC day, the windows MetricsCalculator computes are snapped to whole days.
+    Cached results are shared between callers and must not be modified. Wrappers sharing one
+    cache around calculators that answer differently (branch filters) need distinct scopes.
+    """
+
+    def __init__(self, calculator, cache=None, versions=None, scope=None):
+        self.calculator = calculator
+        self.scope = scope
+        self.cache = cache if cache is not None else MetricsCache()
+        self.versions = versions if versions is not None else data_versions
+        self._signatures = {
+            name: inspect.signature(getattr(calculator, name)) for name in CACHED_METHODS
+        }
+
+    def __getattr__(self, name):
+        attribute = getattr(self.calculator, name)
+        if name not in CACHED_METHODS:
+            return attribute
+
+        signature = self._signatures[name]
+
+        def cached_method(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            repository_id = bound.arguments['repository_id']
+            key = (
+                self.scope,
+                name,
+                _freeze(tuple(bound.arguments.items())),
+                self.versions.get(repository_id),
+                datetime.utcnow().date()
+            )
+
+            found, value = self.cache.get(key)
+            if found:
+                return value
+
+            value = attribute(*args, **kwargs)
+            self.cache.put(key, value)
+            return value
+
+        cached_method.__name__ = name
+        cached_method.__doc__ = attribute.__doc__
+        return cached_method
+
+    def stats(self):
+        return self.cache.stats()
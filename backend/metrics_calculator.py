@@ -1,94 +1,154 @@
 from sqlalchemy import func, and_, desc
-from models import Commit, Contributor, CommitFile, MetricSnapshot
+from models import Commit, Contributor, CommitFile, FilePath, MetricSnapshot, DailyRollup, EPOCH_DAY
+from downsampling import GRANULARITIES, bucket_start, choose_granularity, zero_filled, lttb, parse_day
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
+# Panels served by get_dashboard, in response order
+DASHBOARD_PANELS = ('velocity', 'churn', 'test_coverage', 'contributors', 'daily_activity', 'commit_types')
+
 class MetricsCalculator:
-    def __init__(self, session):
-        self.session = session
+    def __init__(self, session=None, session_factory=None):
+        """Use either a fixed session or a scoped_session factory handing each thread its own"""
+        self._session = session
+        self.session_factory = session_factory
     
-    def get_commit_velocity(self, repository_id, days=30, contributor_id=None):
-        """Calculate commits per day over specified period"""
+    @property
+    def session(self):
+        if self._session is not None:
+            return self._session
+        return self.session_factory()
+    
+    def _resolve_window(self, days):
+        """Resolve a days value to (start_date, end_date); start_date is None for lifetime
+        
+        Windows start at midnight so results only change with the day or the data, not every call.
+        """
         end_date = datetime.utcnow()
         
-        # Handle special cases for date ranges
         if days == 0:  # Lifetime
-            query = self.session.query(Commit).filter(
-                Commit.repository_id == repository_id
-            )
-            if contributor_id:
-                query = query.filter(Commit.contributor_id == contributor_id)
-            
-            commits = query.all()
-            if not commits:
-                return 0
-            
-            # Calculate actual days between first and last commit
-            first_commit = min(commits, key=lambda c: c.commit_date)
-            actual_days = (end_date - first_commit.commit_date).days
-            return len(commits) / max(actual_days, 1)
-        
+            return None, end_date
         elif days == 365:  # Year to date
-            start_date = datetime(end_date.year, 1, 1)
+            return datetime(end_date.year, 1, 1), end_date
         else:  # Regular days back from now
             start_date = end_date - timedelta(days=days)
-        
-        query = self.session.query(Commit).filter(
-            and_(
-                Commit.repository_id == repository_id,
-                Commit.commit_date >= start_date,
-                Commit.commit_date <= end_date
-            )
-        )
-        
+            return start_date.replace(hour=0, minute=0, second=0, microsecond=0), end_date
+    
+    def _rollup_filter(self, repository_id, start_date, end_date, contributor_id=None):
+        """Filter on daily rollup rows, whole days are covered"""
+        conditions = [DailyRollup.repository_id == repository_id]
+        if start_date is not None:
+            conditions.append(DailyRollup.day >= start_date.date())
+            conditions.append(DailyRollup.day <= end_date.date())
         if contributor_id:
-            query = query.filter(Commit.contributor_id == contributor_id)
+            conditions.append(DailyRollup.contributor_id == contributor_id)
+        return and_(*conditions)
+    
+    def _commit_filter(self, repository_id, start_date, end_date, contributor_id=None):
+        """Filter on commit rows within the window"""
+        conditions = [Commit.repository_id == repository_id]
+        if contributor_id:
+            conditions.append(Commit.contributor_id == contributor_id)
+        if start_date is not None:
+            conditions.append(Commit.commit_date >= start_date)
+            conditions.append(Commit.commit_date <= end_date)
+        return and_(*conditions)
+    
+    def _velocity_days(self, days, start_date, end_date, first_commit_date=None):
+        """Days a velocity is spread over: since the first commit for lifetime, the whole window otherwise"""
+        if days == 0:  # Lifetime
+            if first_commit_date is None:
+                return 1
+            return max((end_date - first_commit_date).days, 1)
+        elif days == 365:  # Year to date, today included
+            return (end_date - start_date).days + 1
+        else:
+            return max((end_date - start_date).days, 1)
+    
+    def _first_commit_dates(self, repository_id, first_days, contributor_ids=None):
+        """Exact time of each contributor's first commit, given the days their rollups start on
+        
+        Only the commits of those days are read. A contributor's first commit is on their own first
+        day, which is among first_days, and none of their commits come earlier.
+        """
+        conditions = [
+            Commit.repository_id == repository_id,
+            Commit.commit_day.in_(sorted({(day - EPOCH_DAY).days for day in first_days}))
+        ]
+        if contributor_ids:
+            conditions.append(Commit.contributor_id.in_(contributor_ids))
+        return dict(self.session.query(
+            Commit.contributor_id, func.min(Commit.commit_date)
+        ).filter(*conditions).group_by(Commit.contributor_id).all())
+    
+    def _check_series_args(self, granularity, max_points):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        if max_points is not None and max_points < 3:
+            raise ValueError('max_points must be at least 3')
+    
+    def _series_granularity(self, granularity, max_points, start_date, end_date, condition):
+        """Resolve 'auto' to the finest granularity that fits the window in max_points"""
+        self._check_series_args(granularity, max_points)
+        if granularity != 'auto':
+            return granularity
+        first_day = start_date.date() if start_date is not None else self.session.query(
+            func.min(DailyRollup.day)
+        ).filter(condition).scalar()
+        return choose_granularity(first_day, end_date.date(), max_points)
+    
+    def _bucket_column(self, granularity):
+        """Start date of the bucket each rollup day falls in, weeks start on Monday"""
+        if granularity == 'week':
+            return func.date(DailyRollup.day, 'weekday 0', '-6 days')
+        if granularity == 'month':
+            return func.date(DailyRollup.day, 'start of month')
+        return DailyRollup.day
+    
+    def _series(self, points, start_date, end_date, granularity, max_points, zero, key, first_day=None):
+        """Zero-filled series over the window, from the first point for lifetime, downsampled to max_points"""
+        dates = sorted(points)  # ISO dates sort chronologically
+        if start_date is not None:
+            first_day = start_date.date()
+        elif first_day is None:
+            if not dates:
+                return []
+            first_day = parse_day(dates[0])
+        last_day = max(end_date.date(), parse_day(dates[-1])) if dates else end_date.date()
+        return lttb(zero_filled(points, first_day, last_day, granularity, zero), max_points, key)
+    
+    def get_commit_velocity(self, repository_id, days=30, contributor_id=None):
+        """Calculate commits per day over specified period"""
+        start_date, end_date = self._resolve_window(days)
         
-        commits = query.all()
-        actual_days = (end_date - start_date).days if days != 365 else (end_date - start_date).days + 1
-        return len(commits) / max(actual_days, 1)
+        result = self.session.query(
+            func.sum(DailyRollup.commit_count).label('commit_count'),
+            func.min(DailyRollup.day).label('first_day')
+        ).filter(
+            self._rollup_filter(repository_id, start_date, end_date, contributor_id)
+        ).first()
+        commit_count = result.commit_count or 0
+        
+        if days == 0:
+            if not commit_count:
+                return 0
+            first_commit_date = min(self._first_commit_dates(
+                repository_id, [result.first_day], [contributor_id] if contributor_id else None
+            ).values())
+            return commit_count / self._velocity_days(days, start_date, end_date, first_commit_date)
+        return commit_count / self._velocity_days(days, start_date, end_date)
     
     def get_code_churn(self, repository_id, days=30, contributor_id=None):
         """Calculate lines added vs deleted ratio"""
-        end_date = datetime.utcnow()
-        
-        # Handle special cases for date ranges
-        if days == 0:  # Lifetime
-            query = self.session.query(
-                func.sum(Commit.lines_added).label('total_added'),
-                func.sum(Commit.lines_deleted).label('total_deleted')
-            ).filter(
-                Commit.repository_id == repository_id
-            )
-        elif days == 365:  # Year to date
-            start_date = datetime(end_date.year, 1, 1)
-            query = self.session.query(
-                func.sum(Commit.lines_added).label('total_added'),
-                func.sum(Commit.lines_deleted).label('total_deleted')
-            ).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            )
-        else:  # Regular days back from now
-            start_date = end_date - timedelta(days=days)
-            query = self.session.query(
-                func.sum(Commit.lines_added).label('total_added'),
-                func.sum(Commit.lines_deleted).label('total_deleted')
-            ).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            )
+        start_date, end_date = self._resolve_window(days)
         
-        if contributor_id:
-            query = query.filter(Commit.contributor_id == contributor_id)
-        
-        result = query.first()
+        result = self.session.query(
+            func.sum(DailyRollup.lines_added).label('total_added'),
+            func.sum(DailyRollup.lines_deleted).label('total_deleted')
+        ).filter(
+            self._rollup_filter(repository_id, start_date, end_date, contributor_id)
+        ).first()
         total_added = result.total_added or 0
         total_deleted = result.total_deleted or 0
         
@@ -100,303 +160,239 @@ class MetricsCalculator:
     
     def get_test_coverage_impact(self, repository_id, days=30, contributor_id=None):
         """Calculate ratio of test files to production files committed"""
-        end_date = datetime.utcnow()
-        
-        # Handle special cases for date ranges
-        if days == 0:  # Lifetime
-            commit_ids_query = self.session.query(Commit.id).filter(
-                Commit.repository_id == repository_id
-            )
-        elif days == 365:  # Year to date
-            start_date = datetime(end_date.year, 1, 1)
-            commit_ids_query = self.session.query(Commit.id).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            )
-        else:  # Regular days back from now
-            start_date = end_date - timedelta(days=days)
-            commit_ids_query = self.session.query(Commit.id).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            )
+        start_date, end_date = self._resolve_window(days)
         
-        if contributor_id:
-            commit_ids_query = commit_ids_query.filter(Commit.contributor_id == contributor_id)
-        
-        commit_ids = [row.id for row in commit_ids_query.all()]
+        result = self.session.query(
+            func.sum(DailyRollup.test_files).label('test_files'),
+            func.sum(DailyRollup.production_files).label('production_files')
+        ).filter(
+            self._rollup_filter(repository_id, start_date, end_date, contributor_id)
+        ).first()
+        test_files = result.test_files or 0
+        production_files = result.production_files or 0
+        total_files = test_files + production_files
         
-        if not commit_ids:
+        if not total_files:
             return {'test_files': 0, 'production_files': 0, 'test_ratio': 0}
         
-        # Count test vs production files
-        test_files = self.session.query(CommitFile).filter(
-            and_(
-                CommitFile.commit_id.in_(commit_ids),
-                CommitFile.is_test_file == True
-            )
-        ).count()
-        
-        total_files = self.session.query(CommitFile).filter(
-            CommitFile.commit_id.in_(commit_ids)
-        ).count()
-        
-        production_files = total_files - test_files
-        
         return {
             'test_files': test_files,
             'production_files': production_files,
-            'test_ratio': test_files / max(total_files, 1)
+            'test_ratio': test_files / total_files
         }
     
     def get_contributor_stats(self, repository_id, days=30):
         """Get statistics for all contributors"""
-        end_date = datetime.utcnow()
-        
-        # Handle special cases for date ranges
-        if days == 0:  # Lifetime
-            stats = self.session.query(
-                Contributor.id,
-                Contributor.name,
-                Contributor.email,
-                Contributor.role,
-                Contributor.team,
-                func.count(Commit.id).label('commit_count'),
-                func.sum(Commit.lines_added).label('lines_added'),
-                func.sum(Commit.lines_deleted).label('lines_deleted'),
-                func.avg(Commit.files_changed).label('avg_files_per_commit')
-            ).join(
-                Commit, Commit.contributor_id == Contributor.id
-            ).filter(
-                Commit.repository_id == repository_id
-            ).group_by(Contributor.id).order_by(desc(func.count(Commit.id))).all()
-            
-            # Optimized single-query approach for lifetime stats
-            # Join with first commit date calculation in one query
-            stats_with_velocity = self.session.query(
-                Contributor.id,
-                Contributor.name,
-                Contributor.email,
-                Contributor.role,
-                Contributor.team,
-                func.count(Commit.id).label('commit_count'),
-                func.sum(Commit.lines_added).label('lines_added'),
-                func.sum(Commit.lines_deleted).label('lines_deleted'),
-                func.avg(Commit.files_changed).label('avg_files_per_commit'),
-                func.min(Commit.commit_date).label('first_commit_date')
-            ).join(
-                Commit, Commit.contributor_id == Contributor.id
-            ).filter(
-                Commit.repository_id == repository_id
-            ).group_by(Contributor.id).order_by(desc(func.count(Commit.id))).all()
-            
-            result = []
-            for stat in stats_with_velocity:
-                if stat.first_commit_date:
-                    actual_days = max((end_date - stat.first_commit_date).days, 1)
-                    velocity = stat.commit_count / actual_days
-                else:
-                    velocity = 0
-                
-                result.append({
-                    'contributor_id': stat.id,
-                    'name': stat.name,
-                    'email': stat.email,
-                    'role': stat.role,
-                    'team': stat.team,
-                    'commit_count': stat.commit_count,
-                    'lines_added': stat.lines_added or 0,
-                    'lines_deleted': stat.lines_deleted or 0,
-                    'avg_files_per_commit': round(stat.avg_files_per_commit or 0, 2),
-                    'velocity': velocity
-                })
-            return result
-            
-        elif days == 365:  # Year to date
-            start_date = datetime(end_date.year, 1, 1)
-            actual_days = (end_date - start_date).days + 1
-        else:  # Regular days back from now
-            start_date = end_date - timedelta(days=days)
-            actual_days = days
-        
+        start_date, end_date = self._resolve_window(days)
+        return self._contributor_stats(repository_id, days, start_date, end_date)
+    
+    def _contributor_stats(self, repository_id, days, start_date, end_date):
+        commit_count = func.sum(DailyRollup.commit_count)
         stats = self.session.query(
             Contributor.id,
             Contributor.name,
             Contributor.email,
             Contributor.role,
             Contributor.team,
-            func.count(Commit.id).label('commit_count'),
-            func.sum(Commit.lines_added).label('lines_added'),
-            func.sum(Commit.lines_deleted).label('lines_deleted'),
-            func.avg(Commit.files_changed).label('avg_files_per_commit')
+            commit_count.label('commit_count'),
+            func.sum(DailyRollup.lines_added).label('lines_added'),
+            func.sum(DailyRollup.lines_deleted).label('lines_deleted'),
+            (func.sum(DailyRollup.files_changed) * 1.0 / commit_count).label('avg_files_per_commit'),
+            func.min(DailyRollup.day).label('first_day')
         ).join(
-            Commit, Commit.contributor_id == Contributor.id
+            DailyRollup, DailyRollup.contributor_id == Contributor.id
         ).filter(
-            and_(
-                Commit.repository_id == repository_id,
-                Commit.commit_date >= start_date,
-                Commit.commit_date <= end_date
+            self._rollup_filter(repository_id, start_date, end_date)
+        ).group_by(Contributor.id).order_by(desc(commit_count), Contributor.id).all()
+        
+        # Lifetime velocity runs from each contributor's own first commit
+        first_commit_dates = self._first_commit_dates(
+            repository_id, [stat.first_day for stat in stats]
+        ) if days == 0 and stats else {}
+        
+        result = []
+        for stat in stats:
+            velocity = stat.commit_count / self._velocity_days(
+                days, start_date, end_date, first_commit_dates.get(stat.id)
             )
-        ).group_by(Contributor.id).order_by(desc(func.count(Commit.id))).all()
-        
-        return [{
-            'contributor_id': stat.id,
-            'name': stat.name,
-            'email': stat.email,
-            'role': stat.role,
-            'team': stat.team,
-            'commit_count': stat.commit_count,
-            'lines_added': stat.lines_added or 0,
-            'lines_deleted': stat.lines_deleted or 0,
-            'avg_files_per_commit': round(stat.avg_files_per_commit or 0, 2),
-            'velocity': stat.commit_count / actual_days
-        } for stat in stats]
+            
+            result.append({
+                'contributor_id': stat.id,
+                'name': stat.name,
+                'email': stat.email,
+                'role': stat.role,
+                'team': stat.team,
+                'commit_count': stat.commit_count,
+                'lines_added': stat.lines_added or 0,
+                'lines_deleted': stat.lines_deleted or 0,
+                'avg_files_per_commit': round(stat.avg_files_per_commit or 0, 2),
+                'velocity': velocity
+            })
+        return result
     
     def get_commit_type_distribution(self, repository_id, days=30):
         """Get distribution of commit types"""
-        end_date = datetime.utcnow()
-        
-        # Handle special cases for date ranges
-        if days == 0:  # Lifetime
-            distribution = self.session.query(
-                Commit.commit_type,
-                func.count(Commit.id).label('count')
-            ).filter(
-                Commit.repository_id == repository_id
-            ).group_by(Commit.commit_type).all()
-        elif days == 365:  # Year to date
-            start_date = datetime(end_date.year, 1, 1)
-            distribution = self.session.query(
-                Commit.commit_type,
-                func.count(Commit.id).label('count')
-            ).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            ).group_by(Commit.commit_type).all()
-        else:  # Regular days back from now
-            start_date = end_date - timedelta(days=days)
-            distribution = self.session.query(
-                Commit.commit_type,
-                func.count(Commit.id).label('count')
-            ).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            ).group_by(Commit.commit_type).all()
+        start_date, end_date = self._resolve_window(days)
+        return self._commit_type_distribution(repository_id, start_date, end_date)
+    
+    def _commit_type_distribution(self, repository_id, start_date, end_date):
+        distribution = self.session.query(
+            Commit.commit_type,
+            func.count(Commit.id).label('count')
+        ).filter(
+            self._commit_filter(repository_id, start_date, end_date)
+        ).group_by(Commit.commit_type).all()
         
         return {item.commit_type: item.count for item in distribution}
     
-    def get_daily_activity(self, repository_id, days=30):
-        """Get daily commit activity for charts"""
-        end_date = datetime.utcnow()
-        
-        # Handle special cases for date ranges
-        if days == 0:  # Lifetime
-            daily_commits = self.session.query(
-                func.date(Commit.commit_date).label('date'),
-                func.count(Commit.id).label('commit_count'),
-                func.sum(Commit.lines_added).label('lines_added'),
-                func.sum(Commit.lines_deleted).label('lines_deleted')
-            ).filter(
-                Commit.repository_id == repository_id
-            ).group_by(func.date(Commit.commit_date)).all()
-        elif days == 365:  # Year to date
-            start_date = datetime(end_date.year, 1, 1)
-            daily_commits = self.session.query(
-                func.date(Commit.commit_date).label('date'),
-                func.count(Commit.id).label('commit_count'),
-                func.sum(Commit.lines_added).label('lines_added'),
-                func.sum(Commit.lines_deleted).label('lines_deleted')
-            ).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            ).group_by(func.date(Commit.commit_date)).all()
-        else:  # Regular days back from now
-            start_date = end_date - timedelta(days=days)
-            daily_commits = self.session.query(
-                func.date(Commit.commit_date).label('date'),
-                func.count(Commit.id).label('commit_count'),
-                func.sum(Commit.lines_added).label('lines_added'),
-                func.sum(Commit.lines_deleted).label('lines_deleted')
-            ).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            ).group_by(func.date(Commit.commit_date)).all()
-        
-        return [{
+    def get_daily_activity(self, repository_id, days=30, granularity='day', max_points=None):
+        """Get commit activity for charts, one zero-filled point per day, week or month"""
+        start_date, end_date = self._resolve_window(days)
+        condition = self._rollup_filter(repository_id, start_date, end_date)
+        granularity = self._series_granularity(granularity, max_points, start_date, end_date, condition)
+        bucket = self._bucket_column(granularity)
+        
+        activity = self.session.query(
+            bucket.label('date'),
+            func.sum(DailyRollup.commit_count).label('commit_count'),
+            func.sum(DailyRollup.lines_added).label('lines_added'),
+            func.sum(DailyRollup.lines_deleted).label('lines_deleted')
+        ).filter(condition).group_by(bucket).order_by(bucket).all()
+        
+        points = {str(item.date): {
             'date': str(item.date),
             'commit_count': item.commit_count,
             'lines_added': item.lines_added or 0,
             'lines_deleted': item.lines_deleted or 0
-        } for item in daily_commits]
+        } for item in activity}
+        return self._series(points, start_date, end_date, granularity, max_points,
+                            {'commit_count': 0, 'lines_added': 0, 'lines_deleted': 0}, 'commit_count')
+    
+    def get_dashboard(self, repository_id, days=30, panels=None, granularity='day', max_points=None):
+        """Compute the requested dashboard panels (all by default) for one resolved window
+        
+        Velocity, churn, test coverage and daily activity come out of a single pass over the
+        window's daily totals; that pass, contributor stats and commit types run concurrently
+        when each thread can get its own session. granularity and max_points shape daily activity
+        like they do for get_daily_activity.
+        """
+        self._check_series_args(granularity, max_points)
+        panels = [panel for panel in DASHBOARD_PANELS if panels is None or panel in panels]
+        start_date, end_date = self._resolve_window(days)
+        
+        parts = {}
+        if set(panels) & {'velocity', 'churn', 'test_coverage', 'daily_activity'}:
+            parts['daily_totals'] = lambda: self._daily_totals(repository_id, start_date, end_date)
+        if 'contributors' in panels:
+            parts['contributors'] = lambda: self._contributor_stats(repository_id, days, start_date, end_date)
+        if 'commit_types' in panels:
+            parts['commit_types'] = lambda: self._commit_type_distribution(repository_id, start_date, end_date)
+        results = self._run_parts(parts)
+        
+        dashboard = {'period_days': days}
+        daily_totals = results.get('daily_totals', [])
+        commit_count = sum(day.commit_count for day in daily_totals)
+        lines_added = sum(day.lines_added or 0 for day in daily_totals)
+        lines_deleted = sum(day.lines_deleted or 0 for day in daily_totals)
+        test_files = sum(day.test_files or 0 for day in daily_totals)
+        production_files = sum(day.production_files or 0 for day in daily_totals)
+        
+        for panel in panels:
+            if panel == 'velocity':
+                if days == 0 and not commit_count:
+                    dashboard['velocity'] = 0
+                else:
+                    first_commit_date = min(self._first_commit_dates(
+                        repository_id, [daily_totals[0].date]
+                    ).values()) if days == 0 else None
+                    dashboard['velocity'] = commit_count / self._velocity_days(
+                        days, start_date, end_date, first_commit_date
+                    )
+            elif panel == 'churn':
+                dashboard['churn'] = {
+                    'lines_added': lines_added,
+                    'lines_deleted': lines_deleted,
+                    'churn_ratio': lines_added / max(lines_deleted, 1)
+                }
+            elif panel == 'test_coverage':
+                total_files = test_files + production_files
+                dashboard['test_coverage'] = {
+                    'test_files': test_files,
+                    'production_files': production_files,
+                    'test_ratio': test_files / total_files if total_files else 0
+                }
+            elif panel == 'daily_activity':
+                dashboard['daily_activity'] = self._dashboard_activity(
+                    daily_totals, start_date, end_date, granularity, max_points
+                )
+            else:
+                dashboard[panel] = results[panel]
+        return dashboard
+    
+    def _dashboard_activity(self, daily_totals, start_date, end_date, granularity, max_points):
+        """Daily activity series from the per-day totals, summed into week or month buckets"""
+        if granularity == 'auto':
+            first_day = start_date.date() if start_date is not None else (
+                daily_totals[0].date if daily_totals else None
+            )
+            granularity = choose_granularity(first_day, end_date.date(), max_points)
+        
+        points = {}
+        for day in daily_totals:
+            key = bucket_start(day.date, granularity).isoformat()
+            point = points.setdefault(key, {'date': key, 'commit_count': 0, 'lines_added': 0, 'lines_deleted': 0})
+            point['commit_count'] += day.commit_count
+            point['lines_added'] += day.lines_added or 0
+            point['lines_deleted'] += day.lines_deleted or 0
+        return self._series(points, start_date, end_date, granularity, max_points,
+                            {'commit_count': 0, 'lines_added': 0, 'lines_deleted': 0}, 'commit_count')
+    
+    def _daily_totals(self, repository_id, start_date, end_date):
+        """Per-day sums over every rollup counter, oldest day first"""
+        return self.session.query(
+            DailyRollup.day.label('date'),
+            func.sum(DailyRollup.commit_count).label('commit_count'),
+            func.sum(DailyRollup.lines_added).label('lines_added'),
+            func.sum(DailyRollup.lines_deleted).label('lines_deleted'),
+            func.sum(DailyRollup.test_files).label('test_files'),
+            func.sum(DailyRollup.production_files).label('production_files')
+        ).filter(
+            self._rollup_filter(repository_id, start_date, end_date)
+        ).group_by(DailyRollup.day).order_by(DailyRollup.day).all()
+    
+    def _run_parts(self, parts):
+        """Run independent queries, each on its own thread and session when a session factory is set"""
+        if self._session is not None or len(parts) < 2:
+            return {name: part() for name, part in parts.items()}
+        
+        def run_in_own_session(part):
+            try:
+                return part()
+            finally:
+                # Give the worker's connection back; plain sessionmakers have nothing to remove
+                remove = getattr(self.session_factory, 'remove', None)
+                if remove:
+                    remove()
+        
+        with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix='dashboard') as executor:
+            futures = {name: executor.submit(run_in_own_session, part) for name, part in parts.items()}
+            return {name: future.result() for name, future in futures.items()}
     
     def get_team_comparison(self, repository_id, days=30):
         """Compare performance across teams"""
-        end_date = datetime.utcnow()
+        start_date, end_date = self._resolve_window(days)
         
-        # Handle special cases for date ranges
-        if days == 0:  # Lifetime
-            team_stats = self.session.query(
-                Contributor.team,
-                func.count(Commit.id).label('total_commits'),
-                func.sum(Commit.lines_added).label('total_lines_added'),
-                func.sum(Commit.lines_deleted).label('total_lines_deleted'),
-                func.count(func.distinct(Contributor.id)).label('team_size')
-            ).join(
-                Commit, Commit.contributor_id == Contributor.id
-            ).filter(
-                Commit.repository_id == repository_id
-            ).group_by(Contributor.team).all()
-        elif days == 365:  # Year to date
-            start_date = datetime(end_date.year, 1, 1)
-            team_stats = self.session.query(
-                Contributor.team,
-                func.count(Commit.id).label('total_commits'),
-                func.sum(Commit.lines_added).label('total_lines_added'),
-                func.sum(Commit.lines_deleted).label('total_lines_deleted'),
-                func.count(func.distinct(Contributor.id)).label('team_size')
-            ).join(
-                Commit, Commit.contributor_id == Contributor.id
-            ).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            ).group_by(Contributor.team).all()
-        else:  # Regular days back from now
-            start_date = end_date - timedelta(days=days)
-            team_stats = self.session.query(
-                Contributor.team,
-                func.count(Commit.id).label('total_commits'),
-                func.sum(Commit.lines_added).label('total_lines_added'),
-                func.sum(Commit.lines_deleted).label('total_lines_deleted'),
-                func.count(func.distinct(Contributor.id)).label('team_size')
-            ).join(
-                Commit, Commit.contributor_id == Contributor.id
-            ).filter(
-                and_(
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            ).group_by(Contributor.team).all()
+        team_stats = self.session.query(
+            Contributor.team,
+            func.sum(DailyRollup.commit_count).label('total_commits'),
+            func.sum(DailyRollup.lines_added).label('total_lines_added'),
+            func.sum(DailyRollup.lines_deleted).label('total_lines_deleted'),
+            func.count(func.distinct(Contributor.id)).label('team_size')
+        ).join(
+            DailyRollup, DailyRollup.contributor_id == Contributor.id
+        ).filter(
+            self._rollup_filter(repository_id, start_date, end_date)
+        ).group_by(Contributor.team).all()
         
         return [{
             'team': stat.team,
@@ -409,198 +405,184 @@ class MetricsCalculator:
     
     def get_contributor_detailed_metrics(self, contributor_id, repository_id, days=30):
         """Get detailed metrics for a specific contributor"""
-        end_date = datetime.utcnow()
+        return self._detailed_metrics_by_contributor([contributor_id], repository_id, days)[contributor_id]
+    
+    def _detailed_metrics_by_contributor(self, contributor_ids, repository_id, days):
+        """Detailed metrics for several contributors at once, one GROUP BY contributor_id query per part"""
+        start_date, end_date = self._resolve_window(days)
+        window = and_(
+            Commit.contributor_id.in_(contributor_ids),
+            self._commit_filter(repository_id, start_date, end_date)
+        )
         
-        # Handle special cases for date ranges
-        if days == 0:  # Lifetime
-            commits_query = self.session.query(Commit).filter(
-                and_(
-                    Commit.contributor_id == contributor_id,
-                    Commit.repository_id == repository_id
-                )
-            )
-        elif days == 365:  # Year to date
-            start_date = datetime(end_date.year, 1, 1)
-            commits_query = self.session.query(Commit).filter(
-                and_(
-                    Commit.contributor_id == contributor_id,
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            )
-        else:  # Regular days back from now
-            start_date = end_date - timedelta(days=days)
-            commits_query = self.session.query(Commit).filter(
-                and_(
-                    Commit.contributor_id == contributor_id,
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            )
+        metrics = {contributor_id: {
+            'contributor_id': contributor_id,
+            'total_commits': 0,
+            'lines_added': 0,
+            'lines_deleted': 0,
+            'files_modified': 0,
+            'avg_files_per_commit': 0,
+            'commit_velocity': 0,
+            'code_churn_ratio': 0,
+            'commit_types': {},
+            'activity_pattern': {},
+            'file_expertise': {}
+        } for contributor_id in contributor_ids}
+        
+        totals = self.session.query(
+            Commit.contributor_id,
+            func.count(Commit.id).label('total_commits'),
+            func.sum(Commit.lines_added).label('lines_added'),
+            func.sum(Commit.lines_deleted).label('lines_deleted'),
+            func.sum(Commit.files_changed).label('files_modified'),
+            func.min(Commit.commit_date).label('first_commit_date')
+        ).filter(window).group_by(Commit.contributor_id).all()
         
-        commits = commits_query.all()
-        
-        if not commits:
-            return {
-                'contributor_id': contributor_id,
-                'total_commits': 0,
-                'lines_added': 0,
-                'lines_deleted': 0,
-                'files_modified': 0,
-                'avg_files_per_commit': 0,
-                'commit_velocity': 0,
-                'code_churn_ratio': 0,
-                'commit_types': {},
-                'activity_pattern': {},
-                'file_expertise': {}
-            }
+        if not totals:
+            return metrics
         
         # Basic metrics
-        total_commits = len(commits)
-        total_lines_added = sum(c.lines_added or 0 for c in commits)
-        total_lines_deleted = sum(c.lines_deleted or 0 for c in commits)
-        total_files_modified = sum(c.files_changed or 0 for c in commits)
-        
-        # Calculate velocity
-        if days == 0:  # Lifetime
-            first_commit = min(commits, key=lambda c: c.commit_date)
-            actual_days = max((end_date - first_commit.commit_date).days, 1)
-        elif days == 365:
-            actual_days = (end_date - datetime(end_date.year, 1, 1)).days + 1
-        else:
-            actual_days = days
-        
-        velocity = total_commits / actual_days
+        for row in totals:
+            total_lines_added = row.lines_added or 0
+            total_lines_deleted = row.lines_deleted or 0
+            total_files_modified = row.files_modified or 0
+            velocity = row.total_commits / self._velocity_days(days, start_date, end_date, row.first_commit_date)
+            
+            metrics[row.contributor_id].update({
+                'total_commits': row.total_commits,
+                'lines_added': total_lines_added,
+                'lines_deleted': total_lines_deleted,
+                'files_modified': total_files_modified,
+                'avg_files_per_commit': round(total_files_modified / row.total_commits, 2),
+                'commit_velocity': round(velocity, 3),
+                'code_churn_ratio': round(total_lines_added / max(total_lines_deleted, 1), 2)
+            })
         
         # Commit type distribution
-        commit_types = {}
-        for commit in commits:
-            commit_type = commit.commit_type or 'other'
-            commit_types[commit_type] = commit_types.get(commit_type, 0) + 1
+        for contributor_id, commit_type, count in self.session.query(
+            Commit.contributor_id, Commit.commit_type, func.count(Commit.id)
+        ).filter(window).group_by(Commit.contributor_id, Commit.commit_type):
+            commit_types = metrics[contributor_id]['commit_types']
+            commit_type = commit_type or 'other'
+            commit_types[commit_type] = commit_types.get(commit_type, 0) + count
         
         # Activity pattern (hour of day)
-        activity_pattern = {}
-        for commit in commits:
-            hour = commit.commit_date.hour
-            activity_pattern[hour] = activity_pattern.get(hour, 0) + 1
-        
-        # File expertise (get file types from commit files)
-        commit_ids = [c.id for c in commits]
-        if commit_ids:
-            file_types = self.session.query(
-                CommitFile.file_type,
-                func.count(CommitFile.id).label('count'),
-                func.sum(CommitFile.lines_added + CommitFile.lines_deleted).label('total_changes')
-            ).filter(
-                CommitFile.commit_id.in_(commit_ids)
-            ).group_by(CommitFile.file_type).all()
-            
-            file_expertise = {
-                ft.file_type or 'unknown': {
-                    'files_modified': ft.count,
-                    'total_changes': ft.total_changes or 0
-                } for ft in file_types
+        for contributor_id, commit_hour, count in self.session.query(
+            Commit.contributor_id, Commit.commit_hour, func.count(Commit.id)
+        ).filter(window).group_by(Commit.contributor_id, Commit.commit_hour):
+            metrics[contributor_id]['activity_pattern'][commit_hour] = count
+        
+        # File expertise (get file types from the paths of commit files)
+        file_types = self.session.query(
+            Commit.contributor_id,
+            FilePath.file_type,
+            func.count(CommitFile.id).label('count'),
+            func.sum(CommitFile.lines_added + CommitFile.lines_deleted).label('total_changes')
+        ).join(
+            Commit, Commit.id == CommitFile.commit_id
+        ).join(
+            FilePath, FilePath.id == CommitFile.path_id
+        ).filter(window).group_by(Commit.contributor_id, FilePath.file_type).all()
+        
+        for ft in file_types:
+            metrics[ft.contributor_id]['file_expertise'][ft.file_type or 'unknown'] = {
+                'files_modified': ft.count,
+                'total_changes': ft.total_changes or 0
             }
-        else:
-            file_expertise = {}
         
-        return {
-            'contributor_id': contributor_id,
-            'total_commits': total_commits,
-            'lines_added': total_lines_added,
-            'lines_deleted': total_lines_deleted,
-            'files_modified': total_files_modified,
-            'avg_files_per_commit': round(total_files_modified / total_commits, 2),
-            'commit_velocity': round(velocity, 3),
-            'code_churn_ratio': round(total_lines_added / max(total_lines_deleted, 1), 2),
-            'commit_types': commit_types,
-            'activity_pattern': activity_pattern,
-            'file_expertise': file_expertise
-        }
+        return metrics
     
-    def get_contributor_activity_timeline(self, contributor_id, repository_id, days=30):
-        """Get daily activity timeline for a contributor"""
-        end_date = datetime.utcnow()
-        
-        # Handle special cases for date ranges
-        if days == 0:  # Lifetime
-            daily_activity = self.session.query(
-                func.date(Commit.commit_date).label('date'),
-                func.count(Commit.id).label('commits'),
-                func.sum(Commit.lines_added).label('lines_added'),
-                func.sum(Commit.lines_deleted).label('lines_deleted'),
-                func.sum(Commit.files_changed).label('files_changed')
-            ).filter(
-                and_(
-                    Commit.contributor_id == contributor_id,
-                    Commit.repository_id == repository_id
-                )
-            ).group_by(func.date(Commit.commit_date)).all()
-        elif days == 365:  # Year to date
-            start_date = datetime(end_date.year, 1, 1)
-            daily_activity = self.session.query(
-                func.date(Commit.commit_date).label('date'),
-                func.count(Commit.id).label('commits'),
-                func.sum(Commit.lines_added).label('lines_added'),
-                func.sum(Commit.lines_deleted).label('lines_deleted'),
-                func.sum(Commit.files_changed).label('files_changed')
-            ).filter(
-                and_(
-                    Commit.contributor_id == contributor_id,
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            ).group_by(func.date(Commit.commit_date)).all()
-        else:  # Regular days back from now
-            start_date = end_date - timedelta(days=days)
-            daily_activity = self.session.query(
-                func.date(Commit.commit_date).label('date'),
-                func.count(Commit.id).label('commits'),
-                func.sum(Commit.lines_added).label('lines_added'),
-                func.sum(Commit.lines_deleted).label('lines_deleted'),
-                func.sum(Commit.files_changed).label('files_changed')
-            ).filter(
-                and_(
-                    Commit.contributor_id == contributor_id,
-                    Commit.repository_id == repository_id,
-                    Commit.commit_date >= start_date,
-                    Commit.commit_date <= end_date
-                )
-            ).group_by(func.date(Commit.commit_date)).all()
+    def get_contributor_activity_timeline(self, contributor_id, repository_id, days=30, granularity='day', max_points=None):
+        """Get the activity timeline for a contributor, one zero-filled point per day, week or month"""
+        return self._activity_timelines_by_contributor(
+            [contributor_id], repository_id, days, granularity, max_points
+        )[contributor_id]
+    
+    def _activity_timelines_by_contributor(self, contributor_ids, repository_id, days, granularity='day', max_points=None):
+        """Activity timelines for several contributors from one rollup query, all over the same buckets"""
+        start_date, end_date = self._resolve_window(days)
+        condition = and_(
+            DailyRollup.contributor_id.in_(contributor_ids),
+            self._rollup_filter(repository_id, start_date, end_date)
+        )
+        granularity = self._series_granularity(granularity, max_points, start_date, end_date, condition)
+        bucket = self._bucket_column(granularity)
+        
+        activity = self.session.query(
+            DailyRollup.contributor_id,
+            bucket.label('date'),
+            func.sum(DailyRollup.commit_count).label('commits'),
+            func.sum(DailyRollup.lines_added).label('lines_added'),
+            func.sum(DailyRollup.lines_deleted).label('lines_deleted'),
+            func.sum(DailyRollup.files_changed).label('files_changed')
+        ).filter(condition).group_by(DailyRollup.contributor_id, bucket).order_by(DailyRollup.contributor_id, bucket).all()
+        
+        points = {contributor_id: {} for contributor_id in contributor_ids}
+        for item in activity:
+            points[item.contributor_id][str(item.date)] = {
+                'date': str(item.date),
+                'commits': item.commits,
+                'lines_added': item.lines_added or 0,
+                'lines_deleted': item.lines_deleted or 0,
+                'files_changed': item.files_changed or 0
+            }
         
-        return [{
-            'date': str(activity.date),
-            'commits': activity.commits,
-            'lines_added': activity.lines_added or 0,
-            'lines_deleted': activity.lines_deleted or 0,
-            'files_changed': activity.files_changed or 0
-        } for activity in daily_activity]
+        # Lifetime timelines all start at the earliest contributor's first bucket
+        first_day = min((parse_day(item.date) for item in activity), default=None)
+        zero = {'commits': 0, 'lines_added': 0, 'lines_deleted': 0, 'files_changed': 0}
+        return {
+            contributor_id: self._series(contributor_points, start_date, end_date, granularity, max_points,
+                                         zero, 'commits', first_day)
+            for contributor_id, contributor_points in points.items()
+        }
     
     def compare_contributors(self, contributor_ids, repository_id, days=30):
         """Compare multiple contributors side by side"""
-        comparison_data = []
-        
-        for contributor_id in contributor_ids:
-            # Get contributor info
-            contributor = self.session.query(Contributor).get(contributor_id)
-            if not contributor:
-                continue
-            
-            # Get detailed metrics
-            metrics = self.get_contributor_detailed_metrics(contributor_id, repository_id, days)
-            
-            # Add contributor info to metrics
-            metrics.update({
-                'name': contributor.name,
-                'email': contributor.email,
-                'role': contributor.role,
-                'team': contributor.team,
-                'experience_level': contributor.experience_level
-            })
-            
-            comparison_data.append(metrics)
+        contributors, known_ids = self._known_contributors(contributor_ids)
+        if not known_ids:
+            return []
+        metrics_by_contributor = self._detailed_metrics_by_contributor(known_ids, repository_id, days)
+        
+        # Unknown contributors are skipped, duplicates kept as requested
+        return [
+            self._with_contributor_info(metrics_by_contributor[contributor_id], contributors[contributor_id])
+            for contributor_id in contributor_ids if contributor_id in contributors
+        ]
+    
+    def get_contributors_bulk_metrics(self, contributor_ids, repository_id, days=30, granularity='day', max_points=None):
+        """Get detailed metrics and activity timelines for several contributors at once"""
+        contributors, known_ids = self._known_contributors(contributor_ids)
+        if not known_ids:
+            return {'metrics': {}, 'timelines': {}}
+        metrics_by_contributor = self._detailed_metrics_by_contributor(known_ids, repository_id, days)
+        timelines = self._activity_timelines_by_contributor(known_ids, repository_id, days, granularity, max_points)
         
-        return comparison_data
+        return {
+            'metrics': {
+                contributor_id: self._with_contributor_info(metrics_by_contributor[contributor_id], contributors[contributor_id])
+                for contributor_id in known_ids
+            },
+            'timelines': timelines
+        }
+    
+    def _known_contributors(self, contributor_ids):
+        """Load the requested contributors with one query; returns them by id and the known ids, deduplicated"""
+        contributors = {
+            contributor.id: contributor for contributor in self.session.query(Contributor).filter(
+                Contributor.id.in_(contributor_ids)
+            )
+        }
+        known_ids = [contributor_id for contributor_id in dict.fromkeys(contributor_ids) if contributor_id in contributors]
+        return contributors, known_ids
+    
+    def _with_contributor_info(self, metrics, contributor):
+        """Copy of metrics with the contributor's profile added"""
+        metrics = dict(metrics)
+        metrics.update({
+            'name': contributor.name,
+            'email': contributor.email,
+            'role': contributor.role,
+            'team': contributor.team,
+            'experience_level': contributor.experience_level
+        })
+        return metrics
@@ -1,10 +1,31 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Float, Boolean
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Date, DateTime, Text, Float, Boolean, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from datetime import datetime, date
+import os
+import config
 
 Base = declarative_base()
 
+EPOCH_DAY = date(1970, 1, 1)
+
+# PRAGMA user_version from which commits.commit_date holds UTC, earlier ingests stored server local time
+COMMIT_DATES_UTC_VERSION = 1
+
+def commit_day_number(commit_date):
+    """Days since 1970-01-01 of a commit's date, the value stored in Commit.commit_day
+    
+    Commit dates are stored as naive UTC, so days (and Commit.commit_hour) are UTC buckets
+    that don't depend on the server's time zone.
+    """
+    return (commit_date.date() - EPOCH_DAY).days
+
+def _commit_day_default(context):
+    return commit_day_number(context.get_current_parameters()['commit_date'])
+
+def _commit_hour_default(context):
+    return context.get_current_parameters()['commit_date'].hour
+
 class Repository(Base):
     __tablename__ = 'repositories'
     
@@ -16,6 +37,71 @@ class Repository(Base):
     last_analyzed = Column(DateTime)
     is_active = Column(Boolean, default=True)
 
+class RefWatermark(Base):
+    __tablename__ = 'ref_watermarks'
+    __table_args__ = (UniqueConstraint('repository_id', 'ref_name'),)
+    
+    id = Column(Integer, primary_key=True)
+    repository_id = Column(Integer, nullable=False)
+    ref_name = Column(String(500), nullable=False)  # refs/heads/main, refs/tags/v1.0, HEAD
+    tip_sha = Column(String(40), nullable=False)  # last analyzed commit for this ref
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class BranchBitmap(Base):
+    __tablename__ = 'branch_bitmaps'
+    __table_args__ = (UniqueConstraint('repository_id', 'branch_name'),)
+    
+    id = Column(Integer, primary_key=True)
+    repository_id = Column(Integer, nullable=False)
+    branch_name = Column(String(500), nullable=False)  # main, origin/feature-x
+    ref_name = Column(String(500), nullable=False)  # refs/heads/main, refs/remotes/origin/feature-x
+    tip_sha = Column(String(40), nullable=False)  # tip the membership was computed for
+    commit_count = Column(Integer, nullable=False, default=0)
+    members = Column(LargeBinary, nullable=False)  # zlib-compressed bitset over commit ids
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class ClassificationRuleSet(Base):
+    __tablename__ = 'classification_rules'
+    __table_args__ = (UniqueConstraint('repository_id'),)
+    
+    # Repositories without a row use the built-in rules of classifiers.py
+    id = Column(Integer, primary_key=True)
+    repository_id = Column(Integer, nullable=False)
+    commit_types = Column(Text, nullable=False)  # JSON [{"type": ..., "keywords": [...]}], first match wins
+    default_commit_type = Column(String(50), nullable=False)
+    test_path_patterns = Column(Text, nullable=False)  # JSON list of regular expressions
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class AnalysisJob(Base):
+    __tablename__ = 'analysis_jobs'
+    __table_args__ = (
+        Index('ix_analysis_jobs_repository_status', 'repository_id', 'status'),
+        # At most one queued or running job per repository, enforced by the database
+        Index('ux_analysis_jobs_active_repository', 'repository_id', unique=True,
+              sqlite_where=text("status IN ('queued', 'running')")),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    repository_id = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default='queued')  # queued, running, completed, failed, cancelled
+    kind = Column(String(20), default='analysis')  # analysis, reclassify
+    workers = Column(Integer)
+    
+    # Walk plan pinned when the job starts (JSON), so a resumed job walks the same commits
+    ref_tips = Column(Text)
+    revisions = Column(Text)
+    
+    # Checkpoint, advanced after every stored batch
+    commits_walked = Column(Integer, default=0)
+    commits_processed = Column(Integer, default=0)
+    total_commits = Column(Integer)
+    
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
 class Contributor(Base):
     __tablename__ = 'contributors'
     
@@ -29,6 +115,13 @@ class Contributor(Base):
 
 class Commit(Base):
     __tablename__ = 'commits'
+    __table_args__ = (
+        # Metrics filter on repository plus a date range, optionally per contributor
+        Index('ix_commits_repository_date', 'repository_id', 'commit_date'),
+        Index('ix_commits_repository_contributor_date', 'repository_id', 'contributor_id', 'commit_date'),
+        # Day buckets are read in index order instead of sorting date(commit_date) per row
+        Index('ix_commits_repository_day', 'repository_id', 'commit_day', 'contributor_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     sha = Column(String(40), nullable=False, unique=True)
@@ -36,6 +129,9 @@ class Commit(Base):
     contributor_id = Column(Integer, nullable=False)
     message = Column(Text)
     commit_date = Column(DateTime, nullable=False)
+    # Derived from commit_date on insert so day/hour grouping needs no per-row function call
+    commit_day = Column(Integer, default=_commit_day_default)  # days since 1970-01-01
+    commit_hour = Column(Integer, default=_commit_hour_default)
     author_name = Column(String(255))
     author_email = Column(String(255))
     
@@ -50,20 +146,57 @@ class Commit(Base):
     # Analysis fields
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class FilePath(Base):
+    __tablename__ = 'paths'
+    __table_args__ = (
+        UniqueConstraint('repository_id', 'path'),
+        Index('ix_paths_repository_directory', 'repository_id', 'directory'),
+    )
+    
+    # Every distinct path of a repository once, commit_files rows reference it by id
+    id = Column(Integer, primary_key=True)
+    repository_id = Column(Integer, nullable=False)
+    path = Column(String(500), nullable=False)
+    directory = Column(String(500), nullable=False)  # path up to the last '/', '' at the root
+    file_type = Column(String(50))  # extension: .py, .js, etc.
+    is_test_file = Column(Boolean, default=False)  # under the repository's classification rules
+
 class CommitFile(Base):
     __tablename__ = 'commit_files'
+    __table_args__ = (
+        Index('ix_commit_files_commit', 'commit_id'),
+        Index('ix_commit_files_path', 'path_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     commit_id = Column(Integer, nullable=False)
-    file_path = Column(String(500), nullable=False)
-    file_type = Column(String(50))  # .py, .js, .test.js, etc.
+    path_id = Column(Integer, nullable=False)
     lines_added = Column(Integer, default=0)
     lines_deleted = Column(Integer, default=0)
-    is_test_file = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+
+class DailyRollup(Base):
+    __tablename__ = 'daily_rollups'
+    __table_args__ = (
+        UniqueConstraint('repository_id', 'contributor_id', 'day'),
+        Index('ix_daily_rollups_repository_day', 'repository_id', 'day'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    repository_id = Column(Integer, nullable=False)
+    contributor_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)  # date(commit_date)
+    
+    # Totals over the contributor's commits on that day, maintained at ingest time
+    commit_count = Column(Integer, nullable=False, default=0)
+    lines_added = Column(Integer, nullable=False, default=0)
+    lines_deleted = Column(Integer, nullable=False, default=0)
+    files_changed = Column(Integer, nullable=False, default=0)
+    test_files = Column(Integer, nullable=False, default=0)
+    production_files = Column(Integer, nullable=False, default=0)
 
 class MetricSnapshot(Base):
     __tablename__ = 'metric_snapshots'
+    __table_args__ = (Index('ix_metric_snapshots_repository', 'repository_id'),)
     
     id = Column(Integer, primary_key=True)
     repository_id = Column(Integer, nullable=False)
@@ -74,9 +207,178 @@ class MetricSnapshot(Base):
     period_end = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+# Fill columns added to existing tables, run once right after the column is created
+COLUMN_BACKFILLS = {
+    ('commits', 'commit_day'): "UPDATE commits SET commit_day = CAST(julianday(date(commit_date)) - 2440587.5 AS INTEGER)",
+    ('commits', 'commit_hour'): "UPDATE commits SET commit_hour = CAST(strftime('%H', commit_date) AS INTEGER)",
+    ('analysis_jobs', 'kind'): "UPDATE analysis_jobs SET kind = 'analysis'"
+}
+
+# Run right before an index is created on an existing table, so the rows satisfy it
+INDEX_PREPARATIONS = {
+    # Keep the oldest active job of a repository, later duplicates could only race it
+    'ux_analysis_jobs_active_repository': (
+        "UPDATE analysis_jobs SET status = 'cancelled', error = 'Superseded by an earlier active job' "
+        "WHERE status IN ('queued', 'running') AND id NOT IN ("
+        "SELECT MIN(id) FROM analysis_jobs WHERE status IN ('queued', 'running') GROUP BY repository_id)"
+    )
+}
+
+def convert_commit_dates_to_utc(engine):
+    """Move commit dates stored in server local time to UTC, returns whether it ran
+    
+    Databases before COMMIT_DATES_UTC_VERSION hold local times of the server that ingested them;
+    they are converted with the current time zone, the day and hour columns follow and the
+    daily rollups are dropped, backfill_daily_rollups rebuilds them.
+    """
+    with engine.begin() as connection:
+        if connection.exec_driver_sql('PRAGMA user_version').scalar() >= COMMIT_DATES_UTC_VERSION:
+            return False
+        converted = connection.execute(text(
+            "UPDATE commits SET commit_date = datetime(commit_date, 'utc') "
+            "WHERE commit_date IS NOT NULL AND datetime(commit_date, 'utc') != datetime(commit_date)"
+        )).rowcount
+        if converted:
+            connection.execute(text(COLUMN_BACKFILLS[('commits', 'commit_day')]))
+            connection.execute(text(COLUMN_BACKFILLS[('commits', 'commit_hour')]))
+            connection.execute(text('DELETE FROM daily_rollups'))
+            print(f"Converted {converted} commit dates from local time to UTC")
+        connection.exec_driver_sql(f'PRAGMA user_version = {COMMIT_DATES_UTC_VERSION}')
+    return True
+
+def intern_commit_file_paths(engine):
+    """Move commit_files stored with a path string per row onto the paths table, returns whether it ran
+    
+    Paths are interned per repository with the type and test flag they were stored with, then
+    commit_files is rebuilt referencing them. VACUUM hands the freed pages back to the file system.
+    """
+    columns = {column['name'] for column in inspect(engine).get_columns('commit_files')}
+    if 'file_path' not in columns:
+        return False
+    
+    with engine.begin() as connection:
+        # rtrim(path, <path without '/'>) strips the file name, the directory keeps no trailing '/'
+        connection.execute(text("""
+            INSERT INTO paths (repository_id, path, directory, file_type, is_test_file)
+            SELECT c.repository_id, f.file_path,
+                   rtrim(rtrim(f.file_path, replace(f.file_path, '/', '')), '/'),
+                   max(f.file_type), max(f.is_test_file)
+            FROM commit_files f JOIN commits c ON c.id = f.commit_id
+            GROUP BY c.repository_id, f.file_path
+        """))
+        connection.execute(text('DROP INDEX IF EXISTS ix_commit_files_commit'))
+        connection.execute(text('ALTER TABLE commit_files RENAME TO commit_files_uninterned'))
+        CommitFile.__table__.create(connection)
+        connection.execute(text("""
+            INSERT INTO commit_files (id, commit_id, path_id, lines_added, lines_deleted)
+            SELECT f.id, f.commit_id, p.id, f.lines_added, f.lines_deleted
+            FROM commit_files_uninterned f
+            JOIN commits c ON c.id = f.commit_id
+            JOIN paths p ON p.repository_id = c.repository_id AND p.path = f.file_path
+        """))
+        connection.execute(text('DROP TABLE commit_files_uninterned'))
+    
+    with engine.connect() as connection:
+        connection.exec_driver_sql('VACUUM')
+    print("Moved commit file paths to the paths table")
+    return True
+
+def migrate_database(engine):
+    """Bring an existing database up to the current schema, returns the columns and indexes added
+    
+    create_all only creates missing tables; columns and indexes declared later on existing
+    tables are added here, new columns are backfilled before their indexes are built.
+    """
+    intern_commit_file_paths(engine)
+    inspector = inspect(engine)
+    table_names = inspector.get_table_names()
+    existing = {
+        index['name']
+        for table_name in table_names
+        for index in inspector.get_indexes(table_name)
+    }
+    
+    added_columns = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in table_names:
+            continue
+        present = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                if backfill:
+                    connection.execute(text(backfill))
+            added_columns.append(f'{table.name}.{column.name}')
+    if added_columns:
+        print(f"Added columns: {', '.join(added_columns)}")
+    
+    created = []
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                preparation = INDEX_PREPARATIONS.get(index.name)
+                if preparation and table.name in table_names:
+                    with engine.begin() as connection:
+                        connection.execute(text(preparation))
+                index.create(engine, checkfirst=True)
+                created.append(index.name)
+    
+    convert_commit_dates_to_utc(engine)
+    
+    if created:
+        # Refresh planner statistics so the new indexes are picked up right away
+        with engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+        print(f"Created indexes: {', '.join(created)}")
+    return added_columns + created
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the given PRAGMA statements on every new connection of the engine"""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+def _pool_options(db_path, pool_size, max_overflow):
+    options = {}
+    if db_path != ':memory:':
+        # File databases get a QueuePool shared by request threads and background jobs
+        if pool_size is not None:
+            options['pool_size'] = pool_size
+        if max_overflow is not None:
+            options['max_overflow'] = max_overflow
+    return options
+
 # Database setup
-def create_database(db_path='./db/commit_tracker.db'):
-    engine = create_engine(f'sqlite:///{db_path}')
+def create_database(db_path='./db/commit_tracker.db', pool_size=None, max_overflow=None, pragmas=None):
+    engine = create_engine(f'sqlite:///{db_path}', **_pool_options(db_path, pool_size, max_overflow))
+    apply_sqlite_pragmas(engine, config.SQLITE_PRAGMAS if pragmas is None else pragmas)
     Base.metadata.create_all(engine)
+    migrate_database(engine)
+    Session = sessionmaker(bind=engine)
+    return engine, Session
+
+def create_read_only_database(db_path='./db/commit_tracker.db', pool_size=None, max_overflow=None, pragmas=None):
+    """Separate engine for queries only; in WAL mode its reads never block on (or block) the writer
+    
+    The database must already exist, create_database sets it up. In-memory databases can't be
+    shared between engines, callers keep using the read-write engine for those.
+    """
+    pragmas = dict(config.SQLITE_PRAGMAS if pragmas is None else pragmas)
+    # The journal mode is persistent and owned by the writer, a read-only connection can't change it
+    pragmas.pop('journal_mode', None)
+    pragmas['query_only'] = 'ON'
+    
+    engine = create_engine(
+        f'sqlite:///file:{os.path.abspath(db_path)}?mode=ro&uri=true',
+        **_pool_options(db_path, pool_size, max_overflow)
+    )
+    apply_sqlite_pragmas(engine, pragmas)
     Session = sessionmaker(bind=engine)
     return engine, Session
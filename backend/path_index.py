@@ -0,0 +1,68 @@
+"""
+Interned file paths: the paths table holds each distinct path of a repository once, with its classification
+"""
+import posixpath
+from sqlalchemy import select, insert
+from models import FilePath
+
+# Paths per IN (...) lookup, below SQLite's bound variable limit
+PATH_LOOKUP_CHUNK_SIZE = 500
+
+
+class PathIndex:
+    """In-process path -> (paths.id, is_test_file) map, filled as batches are ingested
+
+    Misses are looked up in the database and paths seen for the first time are inserted, classified
+    with the values ingest computed. Stored paths keep their stored classification, which only
+    changes through reclassification. Insert ids are only valid once the transaction commits, so
+    whoever rolls back a batch has to clear() the index.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def resolve(self, session, repository_id, classified_paths):
+        """{path: (id, is_test_file)} covering classified_paths, (path, file_type, is_test_file) tuples"""
+        entries = self._entries.setdefault(repository_id, {})
+        missing = {}
+        for path, file_type, is_test_file in classified_paths:
+            if path not in entries and path not in missing:
+                missing[path] = (file_type, is_test_file)
+        if not missing:
+            return entries
+
+        paths = list(missing)
+        for start in range(0, len(paths), PATH_LOOKUP_CHUNK_SIZE):
+            for path_id, path, is_test_file in session.execute(select(
+                FilePath.id, FilePath.path, FilePath.is_test_file
+            ).where(
+                FilePath.repository_id == repository_id,
+                FilePath.path.in_(paths[start:start + PATH_LOOKUP_CHUNK_SIZE])
+            )):
+                entries[path] = (path_id, bool(is_test_file))
+                del missing[path]
+
+        if missing:
+            rows = [{
+                'repository_id': repository_id,
+                'path': path,
+                'directory': posixpath.dirname(path),
+                'file_type': file_type,
+                'is_test_file': is_test_file
+            } for path, (file_type, is_test_file) in missing.items()]
+            table = FilePath.__table__
+            path_ids = session.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            for path_id, row in zip(path_ids, rows):
+                entries[row['path']] = (path_id, bool(row['is_test_file']))
+        return entries
+
+    def clear(self):
+        self._entries.clear()
+
+
+def intern_paths(session, repository_id, classified_paths):
+    """{path: paths.id} of (path, file_type, is_test_file) tuples, inserting the paths not stored yet"""
+    entries = PathIndex().resolve(session, repository_id, classified_paths)
+    return {path: path_id for path, (path_id, _) in entries.items()}
@@ -0,0 +1,97 @@
+"""
+Reclassify stored commits under a repository's current rules with chunked SQL UPDATEs, without touching git
+"""
+from sqlalchemy import select, update, func
+from models import Commit, FilePath
+from rollups import rebuild_daily_rollups
+from metrics_cache import data_versions
+import config
+
+# SQL functions backed by the classifier, registered on the connection running the UPDATEs
+COMMIT_TYPE_FUNCTION = 'codetide_commit_type'
+TEST_PATH_FUNCTION = 'codetide_is_test_path'
+
+
+def register_classifier_functions(session, classifier):
+    """Make the classifier callable from SQL on the session's current connection"""
+    connection = session.connection().connection.driver_connection
+    connection.create_function(COMMIT_TYPE_FUNCTION, 1, classifier.classify_message, deterministic=True)
+    connection.create_function(
+        TEST_PATH_FUNCTION, 1, lambda file_path: classifier.classify_path(file_path)[1], deterministic=True
+    )
+
+
+def reclassify_repository(session, repository_id, classifier, chunk_size=None, on_chunk=None, should_cancel=None):
+    """Rewrite the commit types and test file flags that differ under classifier, returns the counts
+
+    Messages and paths are classified inside SQLite: each id range of chunk_size is one UPDATE
+    in its own transaction, so the write lock is only held briefly and rows never travel through
+    Python objects. Only rows whose classification changes are written. Test flags live on the
+    interned paths, so they take one pass over the repository's distinct paths, before the
+    commits. on_chunk(commits_scanned, commits_total) runs after every commit range and
+    should_cancel() right after it; a cancelled run still refreshes the aggregates of what it
+    changed so far.
+    """
+    chunk_size = chunk_size or config.RECLASSIFY_CHUNK_SIZE
+    commits = Commit.__table__
+    paths = FilePath.__table__
+
+    first_id, last_id, commits_total = session.execute(select(
+        func.min(commits.c.id), func.max(commits.c.id), func.count(commits.c.id)
+    ).where(commits.c.repository_id == repository_id)).one()
+    result = {
+        'commits_total': commits_total,
+        'commits_scanned': 0,
+        'commits_reclassified': 0,
+        'paths_reclassified': 0,
+        'cancelled': False
+    }
+    if not commits_total:
+        return result
+
+    first_path_id, last_path_id = session.execute(select(
+        func.min(paths.c.id), func.max(paths.c.id)
+    ).where(paths.c.repository_id == repository_id)).one()
+    is_test_file = getattr(func, TEST_PATH_FUNCTION)(paths.c.path)
+    if first_path_id is not None:
+        for start in range(first_path_id - 1, last_path_id, chunk_size):
+            register_classifier_functions(session, classifier)
+            result['paths_reclassified'] += session.execute(
+                update(paths).where(
+                    paths.c.repository_id == repository_id,
+                    paths.c.id > start,
+                    paths.c.id <= start + chunk_size,
+                    paths.c.is_test_file.is_distinct_from(is_test_file)
+                ).values(is_test_file=is_test_file)
+            ).rowcount
+            session.commit()
+
+    commit_type = getattr(func, COMMIT_TYPE_FUNCTION)(commits.c.message)
+    for start in range(first_id - 1, last_id, chunk_size):
+        in_range = (commits.c.repository_id == repository_id, commits.c.id > start, commits.c.id <= start + chunk_size)
+        # The session may hand out another pooled connection after every commit
+        register_classifier_functions(session, classifier)
+
+        result['commits_reclassified'] += session.execute(
+            update(commits).where(*in_range, commits.c.commit_type.is_distinct_from(commit_type)).values(
+                commit_type=commit_type
+            )
+        ).rowcount
+        result['commits_scanned'] += session.execute(select(func.count(commits.c.id)).where(*in_range)).scalar()
+        session.commit()
+
+        if on_chunk:
+            on_chunk(result['commits_scanned'], commits_total)
+        if should_cancel and should_cancel():
+            result['cancelled'] = True
+            break
+
+    if result['paths_reclassified']:
+        # Test and production file counts per day moved with the flags
+        rebuild_daily_rollups(session, repository_id)
+        session.commit()
+    if result['commits_reclassified'] or result['paths_reclassified']:
+        data_versions.bump(repository_id)
+    print(f"Reclassified {result['commits_reclassified']} commits and {result['paths_reclassified']} paths "
+          f"of repository {repository_id}")
+    return result
@@ -0,0 +1,95 @@
+"""
+Per (repository, contributor, day) rollups so metrics scale with days instead of commits
+"""
+from sqlalchemy import select, func, case, delete, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import Commit, CommitFile, FilePath, DailyRollup, Repository
+
+ROLLUP_COUNTERS = (
+    'commit_count', 'lines_added', 'lines_deleted', 'files_changed', 'test_files', 'production_files'
+)
+
+
+def add_commits_to_rollups(session, commits):
+    """Fold newly stored commits into their rollup rows; commits yields (commit_row, test_files, production_files)"""
+    deltas = {}
+    for commit_row, test_files, production_files in commits:
+        key = (commit_row['repository_id'], commit_row['contributor_id'], commit_row['commit_date'].date())
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = dict.fromkeys(ROLLUP_COUNTERS, 0)
+        delta['commit_count'] += 1
+        delta['lines_added'] += commit_row['lines_added'] or 0
+        delta['lines_deleted'] += commit_row['lines_deleted'] or 0
+        delta['files_changed'] += commit_row['files_changed'] or 0
+        delta['test_files'] += test_files
+        delta['production_files'] += production_files
+
+    if not deltas:
+        return 0
+
+    rows = [
+        dict(delta, repository_id=repository_id, contributor_id=contributor_id, day=day)
+        for (repository_id, contributor_id, day), delta in deltas.items()
+    ]
+    table = DailyRollup.__table__
+    statement = sqlite_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.repository_id, table.c.contributor_id, table.c.day],
+        set_={name: table.c[name] + statement.excluded[name] for name in ROLLUP_COUNTERS}
+    )
+    session.execute(statement, rows)
+    return len(rows)
+
+
+def rebuild_daily_rollups(session, repository_id):
+    """Recompute a repository's rollups from its commits (backfill, or after bulk edits)"""
+    session.execute(delete(DailyRollup.__table__).where(DailyRollup.repository_id == repository_id))
+
+    repository_commits = select(Commit.id).where(Commit.repository_id == repository_id)
+    file_counts = select(
+        CommitFile.commit_id,
+        func.sum(case((FilePath.is_test_file == True, 1), else_=0)).label('test_files'),
+        func.sum(case((FilePath.is_test_file == True, 0), else_=1)).label('production_files')
+    ).join(
+        FilePath, FilePath.id == CommitFile.path_id
+    ).where(
+        CommitFile.commit_id.in_(repository_commits)
+    ).group_by(CommitFile.commit_id).subquery()
+
+    # Stored day number, grouped in ix_commits_repository_day order, turned back into a date
+    totals = select(
+        Commit.repository_id,
+        Commit.contributor_id,
+        func.date(Commit.commit_day * 86400, 'unixepoch'),
+        func.count(Commit.id),
+        func.coalesce(func.sum(Commit.lines_added), 0),
+        func.coalesce(func.sum(Commit.lines_deleted), 0),
+        func.coalesce(func.sum(Commit.files_changed), 0),
+        func.coalesce(func.sum(file_counts.c.test_files), 0),
+        func.coalesce(func.sum(file_counts.c.production_files), 0)
+    ).outerjoin(
+        file_counts, file_counts.c.commit_id == Commit.id
+    ).where(
+        Commit.repository_id == repository_id
+    ).group_by(Commit.commit_day, Commit.contributor_id)
+
+    session.execute(insert(DailyRollup.__table__).from_select(
+        ['repository_id', 'contributor_id', 'day'] + list(ROLLUP_COUNTERS), totals
+    ))
+
+
+def backfill_daily_rollups(session):
+    """Build rollups for repositories analyzed before the rollup table existed"""
+    has_commits = select(Commit.id).where(Commit.repository_id == Repository.id).exists()
+    has_rollups = select(DailyRollup.id).where(DailyRollup.repository_id == Repository.id).exists()
+    repository_ids = session.execute(
+        select(Repository.id).where(has_commits, ~has_rollups)
+    ).scalars().all()
+
+    for repository_id in repository_ids:
+        print(f"Building daily rollups for repository {repository_id}")
+        rebuild_daily_rollups(session, repository_id)
+    if repository_ids:
+        session.commit()
+    return len(repository_ids)
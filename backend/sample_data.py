@@ -6,6 +6,8 @@ import sys
 from datetime import datetime, timedelta
 import random
 from models import create_database, Repository, Contributor, Commit, CommitFile
+from rollups import rebuild_daily_rollups
+from path_index import PathIndex
 
 def create_sample_data():
     """Create sample data for testing"""
@@ -41,6 +43,7 @@ def create_sample_data():
     file_extensions = ['.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.html', '.css']
     
     start_date = datetime.utcnow() - timedelta(days=90)
+    path_index = PathIndex()
     
     for day in range(90):
         current_date = start_date + timedelta(days=day)
@@ -103,16 +106,17 @@ def create_sample_data():
                 file_lines_added = random.randint(1, lines_added // max(files_changed, 1))
                 file_lines_deleted = random.randint(0, file_lines_added // 2)
                 
+                path_id, _ = path_index.resolve(session, repo.id, [(file_path, file_ext, is_test)])[file_path]
                 commit_file = CommitFile(
                     commit_id=commit.id,
-                    file_path=file_path,
-                    file_type=file_ext,
+                    path_id=path_id,
                     lines_added=file_lines_added,
-                    lines_deleted=file_lines_deleted,
-                    is_test_file=is_test
+                    lines_deleted=file_lines_deleted
                 )
                 session.add(commit_file)
     
+    session.flush()
+    rebuild_daily_rollups(session, repo.id)
     session.commit()
     print(f"Sample data created successfully!")
     print(f"- Repository: {repo.name}")
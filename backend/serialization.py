@@ -0,0 +1,48 @@
+"""
+JSON provider for API responses: orjson when it is installed, Flask's standard provider otherwise
+"""
+from flask.json.provider import DefaultJSONProvider
+import config
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serializes with orjson, falling back to Flask's conversions for types orjson leaves out
+
+    Datetimes are passed through to the fallback so they keep Flask's HTTP date format,
+    and non-string keys (contributor ids) become strings like they do with the json module.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj, indent='indent' in kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Build the response body as bytes directly, skipping the str round trip"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+    def _dumps_bytes(self, obj, indent=False):
+        options = self.options | orjson.OPT_INDENT_2 if indent else self.options
+        return orjson.dumps(obj, default=self.default, option=options)
+
+
+def create_json_provider(app, serializer=None):
+    """Return the JSON provider for app; serializer is 'auto', 'orjson' or 'json'"""
+    serializer = serializer or config.JSON_SERIALIZER
+    if serializer == 'json':
+        return DefaultJSONProvider(app)
+    if orjson is None:
+        if serializer == 'orjson':
+            raise ImportError('CODETIDE_JSON_SERIALIZER=orjson but orjson is not installed')
+        return DefaultJSONProvider(app)
+    return OrjsonProvider(app)
@@ -0,0 +1,165 @@
+import importlib
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import requests
+from sqlalchemy import event
+from werkzeug.serving import make_server
+import config
+
+
+class TestApiConcurrency(unittest.TestCase):
+    """Many parallel requests against a local server must see consistent, isolated sessions"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.previous_db_path = os.environ.get('CODETIDE_DB_PATH')
+        os.environ['CODETIDE_DB_PATH'] = os.path.join(cls.temp_dir, 'commit_tracker.db')
+        importlib.reload(config)
+
+        import app as app_module
+        cls.app_module = importlib.reload(app_module)
+        cls._seed()
+
+        cls.server = make_server('127.0.0.1', 0, cls.app_module.app, threaded=True)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server_thread.join()
+        cls.app_module.job_manager.shutdown()
+        cls.app_module.engine.dispose()
+        cls.app_module.read_engine.dispose()
+        if cls.previous_db_path is None:
+            os.environ.pop('CODETIDE_DB_PATH', None)
+        else:
+            os.environ['CODETIDE_DB_PATH'] = cls.previous_db_path
+        importlib.reload(config)
+        shutil.rmtree(cls.temp_dir)
+
+    @classmethod
+    def _seed(cls):
+        from git_analyzer import GitAnalyzer
+        from models import Repository, Contributor
+
+        session = cls.app_module.Session()
+        session.add_all([
+            Repository(id=1, name='api', path=cls.temp_dir),
+            Repository(id=2, name='web', path=cls.temp_dir),
+            Contributor(id=1, name='Alice', email='alice@example.com', team='Backend', role='Developer'),
+            Contributor(id=2, name='Bob', email='bob@example.com', team='QA', role='Tester')
+        ])
+        session.commit()
+
+        now = datetime.utcnow()
+        batch = []
+        for index in range(300):
+            batch.append(({
+                'sha': f'{index:040d}',
+                'repository_id': 1 + index % 2,
+                'contributor_id': 1 + (index // 2) % 2,
+                'message': 'feat: change',
+                'commit_date': now - timedelta(hours=index * 7),
+                'files_changed': 1,
+                'lines_added': index % 13,
+                'lines_deleted': index % 5,
+                'commit_type': random.choice(['feature', 'bugfix', 'test'])
+            }, [(f'src/file_{index % 9}.py', '.py', index % 13, index % 5, index % 4 == 0)]))
+        GitAnalyzer(session)._process_commit_batch(batch)
+        session.close()
+
+    def _urls(self):
+        urls = []
+        for repository_id in (1, 2):
+            for days in (0, 30, 365):
+                query = f'repository_id={repository_id}&days={days}'
+                urls += [
+                    f'/api/metrics/velocity?{query}',
+                    f'/api/metrics/churn?{query}',
+                    f'/api/metrics/test-coverage?{query}',
+                    f'/api/metrics/contributors?{query}',
+                    f'/api/charts/daily-activity?{query}',
+                    f'/api/charts/commit-types?{query}',
+                    f'/api/charts/team-comparison?{query}',
+                    f'/api/contributors/1/metrics?{query}',
+                    f'/api/contributors/2/activity-timeline?{query}',
+                    f'/api/dashboard?{query}',
+                    f'/api/dashboard?{query}&panels=velocity,commit_types'
+                ]
+            urls.append(f'/api/contributors?repository_id={repository_id}')
+        urls.append('/api/repositories')
+        return urls
+
+    def _get(self, http, url):
+        response = http.get(self.base_url + url, timeout=30)
+        return response.status_code, response.json()
+
+    def test_parallel_requests_match_sequential_results(self):
+        """Test that parallel reads and writes return the same data as sequential requests"""
+        urls = self._urls()
+        with requests.Session() as http:
+            expected = {url: self._get(http, url) for url in urls}
+
+        workload = urls * 6
+        random.Random(7).shuffle(workload)
+
+        shared_sessions = []
+
+        def record_thread(session, transaction, connection):
+            # A session must never be used by more than one thread
+            owner = session.info.setdefault('thread', threading.get_ident())
+            if owner != threading.get_ident():
+                shared_sessions.append(session)
+
+        event.listen(self.app_module.Session, 'after_begin', record_thread)
+        self.addCleanup(event.remove, self.app_module.Session, 'after_begin', record_thread)
+
+        def run(index_and_url):
+            index, url = index_and_url
+            if index % 10 == 0:
+                # Interleave writes; same values, but they invalidate cached metrics
+                contributor_id = 1 + (index // 10) % 2
+                team = 'Backend' if contributor_id == 1 else 'QA'
+                response = requests.put(
+                    f'{self.base_url}/api/contributors/{contributor_id}', json={'team': team}, timeout=30
+                )
+                self.assertEqual(response.status_code, 200)
+            return url, self._get(requests, url)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(run, enumerate(workload)))
+
+        self.assertEqual(shared_sessions, [])
+        for url, result in results:
+            with self.subTest(url=url):
+                self.assertEqual(result, expected[url])
+
+    def test_synchronous_analysis_respects_active_job(self):
+        """Test that /analyze refuses to run next to a queued or running job"""
+        from models import AnalysisJob
+
+        session = self.app_module.Session()
+        job = AnalysisJob(repository_id=2, status='running')
+        session.add(job)
+        session.commit()
+        try:
+            response = requests.post(f'{self.base_url}/api/repositories/2/analyze', json={}, timeout=30)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.json()['job']['id'], job.id)
+        finally:
+            session.delete(job)
+            session.commit()
+            session.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
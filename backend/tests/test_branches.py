@@ -0,0 +1,147 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import branches
+from branches import branch_tips, encode_members, decode_members, get_branch_members
+from frames import FrameMetricsCalculator, FrameStore
+from git_analyzer import GitAnalyzer
+from models import Commit, BranchBitmap, create_database
+
+
+class TestBitmaps(unittest.TestCase):
+    def test_encode_decode_round_trip(self):
+        """Test that bitsets give back exactly the encoded ids, sorted"""
+        for ids in ([], [0], [7, 3, 1000000], list(range(5, 5000, 3))):
+            with self.subTest(count=len(ids)):
+                self.assertEqual(decode_members(encode_members(ids)).tolist(), sorted(ids))
+
+    def test_long_runs_compress(self):
+        """Test that a contiguous run of a million ids takes a few KiB at most"""
+        self.assertLess(len(encode_members(np.arange(10, 1000010))), 4096)
+
+    def test_branch_tips_keeps_branches_only(self):
+        """Test that tags, HEAD and remote HEAD aliases are not branches"""
+        tips = branch_tips({
+            'HEAD': 'a', 'refs/heads/main': 'a', 'refs/tags/v1': 'b',
+            'refs/remotes/origin/HEAD': 'a', 'refs/remotes/origin/feature': 'c'
+        })
+        self.assertEqual(tips, {'main': ('refs/heads/main', 'a'), 'origin/feature': ('refs/remotes/origin/feature', 'c')})
+
+
+class TestBranchMembership(unittest.TestCase):
+    """Branch bitmaps and labels of an analyzed repository, kept up to date as refs move"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self._git('init', '-q')
+        self._git('symbolic-ref', 'HEAD', 'refs/heads/main')
+        self._git('config', 'user.email', 'dev@example.com')
+        self._git('config', 'user.name', 'Dev')
+        self._commit('feat: one')
+        self._commit('feat: two')
+        self._git('checkout', '-qb', 'feature')
+        self._commit('feat: on feature')
+        self._commit('test: on feature')
+        self._git('checkout', '-q', 'main')
+        self._commit('fix: on main')
+
+        self.engine, Session = create_database(':memory:')
+        self.session = Session()
+        self.analyzer = GitAnalyzer(self.session)
+        self.analyzer.analyze_repository(self.temp_dir, 1)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, *args):
+        subprocess.run(['git'] + list(args), cwd=self.temp_dir, check=True, capture_output=True)
+
+    def _commit(self, message):
+        with open(os.path.join(self.temp_dir, 'file.txt'), 'a') as handle:
+            handle.write(message + '\n')
+        self._git('add', '.')
+        self._git('commit', '-qm', message)
+
+    def _messages(self, branch_name):
+        ids = get_branch_members(self.session, 1, branch_name).tolist()
+        return sorted(message for (message,) in self.session.query(Commit.message).filter(Commit.id.in_(ids)))
+
+    def _labels(self):
+        return {message: branch_name for message, branch_name in self.session.query(Commit.message, Commit.branch_name)}
+
+    def test_membership_of_every_branch(self):
+        """Test that each branch holds exactly the commits reachable from its tip"""
+        self.assertEqual(self._messages('main'), ['feat: one', 'feat: two', 'fix: on main'])
+        self.assertEqual(self._messages('feature'), ['feat: on feature', 'feat: one', 'feat: two', 'test: on feature'])
+        self.assertIsNone(get_branch_members(self.session, 1, 'missing'))
+
+    def test_commits_are_labelled_with_their_branch(self):
+        """Test that commits only on a feature branch are no longer labelled with the default branch"""
+        self.assertEqual(self._labels(), {
+            'feat: one': 'main', 'feat: two': 'main', 'fix: on main': 'main',
+            'feat: on feature': 'feature', 'test: on feature': 'feature'
+        })
+
+    def test_initial_pass_walks_once_for_all_branches(self):
+        """Test that building every bitmap takes a single rev-list walk"""
+        self.session.query(BranchBitmap).delete()
+        with patch.object(branches, 'iter_rev_list_parents', wraps=branches.iter_rev_list_parents) as walk:
+            self.analyzer.analyze_repository(self.temp_dir, 1)
+        self.assertEqual(walk.call_count, 1)
+        self.assertEqual(self.session.query(BranchBitmap).count(), 2)
+
+    def test_fast_forward_only_walks_new_commits(self):
+        """Test that a moved branch gets its new commits without a full reachability walk"""
+        self._git('checkout', '-q', 'feature')
+        self._commit('docs: on feature')
+
+        with patch.object(branches, 'reachable_ids') as full_walk:
+            self.analyzer.analyze_repository(self.temp_dir, 1)
+
+        full_walk.assert_not_called()
+        self.assertIn('docs: on feature', self._messages('feature'))
+        self.assertNotIn('docs: on feature', self._messages('main'))
+        self.assertEqual(self._labels()['docs: on feature'], 'feature')
+
+    def test_merged_branch_commits_join_default_branch(self):
+        """Test that merging a branch adds its commits to the default branch and relabels them"""
+        self._git('merge', '-q', '--no-edit', '-s', 'ours', 'feature')
+        self.analyzer.analyze_repository(self.temp_dir, 1)
+
+        self.assertIn('feat: on feature', self._messages('main'))
+        self.assertEqual(self._labels()['test: on feature'], 'main')
+
+    def test_rewritten_and_deleted_branches(self):
+        """Test that a force-moved branch is rebuilt and a deleted one dropped"""
+        self._git('branch', '-qf', 'feature', 'main~1')
+        self._git('branch', '-q', 'other', 'main')
+        self.analyzer.analyze_repository(self.temp_dir, 1)
+        self.assertEqual(self._messages('feature'), ['feat: one', 'feat: two'])
+
+        self._git('branch', '-qD', 'other')
+        self.analyzer.analyze_repository(self.temp_dir, 1)
+        self.assertEqual(
+            [name for (name,) in self.session.query(BranchBitmap.branch_name).order_by(BranchBitmap.branch_name)],
+            ['feature', 'main']
+        )
+
+    def test_branch_filtered_metrics(self):
+        """Test that a branch calculator only counts commits reachable from the branch"""
+        frames = FrameStore()
+        calculator = FrameMetricsCalculator(self.session, frames=frames, branch='feature')
+
+        self.assertEqual(calculator.get_commit_type_distribution(1, 0), {'feature': 3, 'test': 1})
+        self.assertEqual(calculator.get_contributor_stats(1, 0)[0]['commit_count'], 4)
+        self.assertEqual(FrameMetricsCalculator(self.session, frames=frames).get_contributor_stats(1, 0)[0]['commit_count'], 5)
+        with self.assertRaises(ValueError):
+            FrameMetricsCalculator(self.session, frames=frames, branch='missing').get_code_churn(1, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
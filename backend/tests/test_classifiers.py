@@ -0,0 +1,106 @@
+import re
+import unittest
+import classifiers
+from classifiers import (
+    KeywordMatcher, COMMIT_TYPE_KEYWORDS, DEFAULT_COMMIT_TYPE, DEFAULT_RULES, Classifier,
+    classify_message, classify_path, is_test_path, parse_rules, rules_to_dict
+)
+
+MESSAGES = [
+    'feat: add new dashboard component', 'fix: resolve authentication bug', 'docs: update API documentation',
+    'random commit message', 'Refactor the parser', 'HOTFIX for prod', 'Add unit tests', 'addoc',
+    'prefixed', 'specification of the feature', 'Implement cleanup of README', 'optimize queries',
+    'Merge branch \'main\'', '', 'Bump version', 'comment typo', 'feature flag', 'patched patches',
+    'İstanbul release', 'tested the docs'
+]
+
+PATHS = [
+    'src/app.test.js', 'src/app.spec.ts', 'project/test/helper.py', 'project/tests/conftest.py', 'pkg/util_test.go',
+    'test_models.py', 'src/test_models.py.bak', 'src/UserServiceTest.java', 'src/usertest.JAVA', 'README.md',
+    'src/app.js', 'tests', 'latest/file.py', 'contest_entry.py', 'TEST/x', 'a/Tests/b', 'x.SPEC.y', ''
+]
+
+
+def legacy_commit_type(message):
+    message_lower = message.lower()
+    if any(keyword in message_lower for keyword in ['test', 'spec', 'unit test', 'integration test']):
+        return 'test'
+    elif any(keyword in message_lower for keyword in ['fix', 'bug', 'hotfix', 'patch']):
+        return 'bugfix'
+    elif any(keyword in message_lower for keyword in ['refactor', 'cleanup', 'optimize']):
+        return 'refactor'
+    elif any(keyword in message_lower for keyword in ['doc', 'readme', 'comment']):
+        return 'documentation'
+    elif any(keyword in message_lower for keyword in ['feat', 'feature', 'add', 'implement']):
+        return 'feature'
+    return 'other'
+
+
+def legacy_is_test_file(file_path):
+    patterns = [r'\.test\.', r'\.spec\.', r'/test/', r'/tests/', r'_test\.', r'test_.*\.py$',
+                r'.*Test\.java$', r'.*\.test\.js$', r'.*\.spec\.ts$']
+    return any(re.search(pattern, file_path, re.IGNORECASE) for pattern in patterns)
+
+
+class TestClassifiers(unittest.TestCase):
+    def test_regex_matcher_matches_keyword_lists(self):
+        """Test that the keyword tuple fallback classifies like the original keyword scans"""
+        matcher = KeywordMatcher(COMMIT_TYPE_KEYWORDS, DEFAULT_COMMIT_TYPE, use_automaton=False)
+        for message in MESSAGES:
+            with self.subTest(message=message):
+                self.assertEqual(matcher.match(message.lower()), legacy_commit_type(message))
+
+    @unittest.skipUnless(classifiers.ahocorasick, 'pyahocorasick not installed')
+    def test_automaton_matches_keyword_lists(self):
+        """Test that the Aho-Corasick matcher finds overlapping keywords and honours type priority"""
+        matcher = KeywordMatcher(COMMIT_TYPE_KEYWORDS, DEFAULT_COMMIT_TYPE, use_automaton=True)
+        for message in MESSAGES:
+            with self.subTest(message=message):
+                self.assertEqual(matcher.match(message.lower()), legacy_commit_type(message))
+
+    def test_classify_message(self):
+        """Test that the shared matcher lowercases messages before matching"""
+        self.assertEqual(classify_message('FEAT: Add Login'), 'feature')
+        self.assertEqual(classify_message('Fix flaky Test'), 'test')
+
+    def test_test_path_alternation_matches_patterns(self):
+        """Test that the single compiled alternation agrees with the nine separate patterns"""
+        for path in PATHS:
+            with self.subTest(path=path):
+                self.assertEqual(is_test_path(path), legacy_is_test_file(path))
+
+    def test_classify_path_is_memoized(self):
+        """Test that repeated paths are answered from the LRU memo"""
+        classify_path.cache_clear()
+        for _ in range(3):
+            self.assertEqual(classify_path('tests/test_app.py'), ('.py', True))
+        self.assertEqual(classify_path('src/app.js'), ('.js', False))
+
+        info = classify_path.cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 2))
+        self.assertGreater(info.maxsize, 0)
+
+    def test_parse_rules(self):
+        """Test that parsed rule sets keep priority order, lowercase keywords and default omitted parts"""
+        self.assertEqual(parse_rules(rules_to_dict(DEFAULT_RULES)), (DEFAULT_RULES, None))
+        self.assertEqual(parse_rules({}), (DEFAULT_RULES, None))
+
+        rules, error = parse_rules({'commit_types': [{'type': 'chore', 'keywords': ['Bump']}], 'default_commit_type': 'misc'})
+        self.assertIsNone(error)
+        classifier = Classifier(rules)
+        self.assertEqual(classifier.classify_message('BUMP deps'), 'chore')
+        self.assertEqual(classifier.classify_message('fix bug'), 'misc')
+        self.assertTrue(classifier.is_test_path('src/app.test.js'))
+
+    def test_parse_rules_rejects_invalid_rules(self):
+        """Test that malformed rule sets and broken patterns are reported"""
+        for data in ([], {'commit_types': {}}, {'commit_types': [{'type': 'x', 'keywords': ['']}]},
+                     {'default_commit_type': ''}, {'test_path_patterns': ['(']}):
+            with self.subTest(data=data):
+                rules, error = parse_rules(data)
+                self.assertIsNone(rules)
+                self.assertTrue(error)
+
+
+if __name__ == '__main__':
+    unittest.main()
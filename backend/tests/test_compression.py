@@ -0,0 +1,64 @@
+import gzip
+import unittest
+from unittest.mock import patch
+from flask import Flask, jsonify
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+import compression
+from compression import init_compression, choose_encoding
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        init_compression(app, min_bytes=500)
+
+        @app.after_request
+        def tag(response):
+            response.set_etag('abc')
+            return response
+
+        @app.route('/large')
+        def large():
+            return jsonify([{'date': f'2024-01-{day:02d}', 'commit_count': day} for day in range(1, 29)] * 10)
+
+        @app.route('/small')
+        def small():
+            return jsonify({'velocity': 1.5})
+
+        self.client = app.test_client()
+
+    def test_gzip_above_threshold(self):
+        """Test that large responses are gzipped for clients that only accept gzip"""
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertEqual(response.get_etag(), ('abc-gzip', False))
+        self.assertEqual(gzip.decompress(response.get_data())[:2], b'[{')
+
+    @unittest.skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        """Test that brotli is used when the client accepts it"""
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip, deflate, br'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.get_data())[:2], b'[{')
+
+    def test_small_or_unaccepted_responses_are_not_compressed(self):
+        """Test that responses below the threshold or without Accept-Encoding stay as they are"""
+        for url, headers in (('/small', {'Accept-Encoding': 'gzip'}), ('/large', {})):
+            with self.subTest(url=url, headers=headers):
+                response = self.client.get(url, headers=headers)
+                self.assertNotIn('Content-Encoding', response.headers)
+                self.assertEqual(response.get_etag(), ('abc', False))
+
+    def test_choose_encoding(self):
+        """Test negotiation honours q-values and available codings"""
+        self.assertEqual(choose_encoding(parse_accept_header('gzip;q=0, identity', Accept)), None)
+        with patch.object(compression, 'brotli', None):
+            self.assertEqual(choose_encoding(parse_accept_header('br, gzip', Accept)), 'gzip')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import importlib
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import config
+
+
+class TestConditionalGet(unittest.TestCase):
+    """Read endpoints carry validators and answer unchanged data with 304"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.previous_db_path = os.environ.get('CODETIDE_DB_PATH')
+        os.environ['CODETIDE_DB_PATH'] = os.path.join(cls.temp_dir, 'commit_tracker.db')
+        importlib.reload(config)
+
+        import app as app_module
+        cls.app_module = importlib.reload(app_module)
+
+        from git_analyzer import GitAnalyzer
+        from models import Repository, Contributor
+
+        session = cls.app_module.Session()
+        session.add_all([
+            Repository(id=1, name='api', path=cls.temp_dir),
+            Repository(id=2, name='web', path=cls.temp_dir),
+            Contributor(id=1, name='Alice', email='alice@example.com', team='Backend')
+        ])
+        session.commit()
+        now = datetime.utcnow()
+        GitAnalyzer(session)._process_commit_batch([({
+            'sha': f'{index:040d}',
+            'repository_id': 1 + index % 2,
+            'contributor_id': 1,
+            'message': 'feat: change',
+            'commit_date': now - timedelta(hours=index * 5),
+            'files_changed': 1,
+            'lines_added': 3,
+            'lines_deleted': 1,
+            'commit_type': 'feature'
+        }, [('src/app.py', '.py', 3, 1, False)]) for index in range(200)])
+        session.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_module.job_manager.shutdown()
+        cls.app_module.engine.dispose()
+        cls.app_module.read_engine.dispose()
+        if cls.previous_db_path is None:
+            os.environ.pop('CODETIDE_DB_PATH', None)
+        else:
+            os.environ['CODETIDE_DB_PATH'] = cls.previous_db_path
+        importlib.reload(config)
+        shutil.rmtree(cls.temp_dir)
+
+    def setUp(self):
+        self.client = self.app_module.app.test_client()
+
+    def test_read_endpoints_carry_validators(self):
+        """Test that metrics, charts and contributor reads get an ETag and Last-Modified"""
+        for url in ('/api/metrics/velocity?repository_id=1&days=30',
+                    '/api/charts/commit-types?repository_id=1&days=0',
+                    '/api/contributors?repository_id=1',
+                    '/api/contributors/1/metrics?repository_id=1',
+                    '/api/dashboard?repository_id=1'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIsNotNone(response.get_etag()[0])
+                self.assertFalse(response.get_etag()[1])  # strong
+                self.assertIsNotNone(response.last_modified)
+                self.assertTrue(response.cache_control.no_cache)
+
+    def test_if_none_match_skips_metrics_calculator(self):
+        """Test that a matching If-None-Match returns 304 without computing metrics"""
+        url = '/api/metrics/churn?repository_id=1&days=30'
+        etag = self.client.get(url).get_etag()[0]
+
+        with patch.object(self.app_module, 'metrics_calculator') as calculator:
+            response = self.client.get(url, headers={'If-None-Match': f'"{etag}"'})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.get_etag()[0], etag)
+        self.assertEqual(calculator.mock_calls, [])
+
+    def test_compressed_etag_variant_matches(self):
+        """Test that the ETag of a compressed response also revalidates to 304"""
+        url = '/api/charts/daily-activity?repository_id=1&days=0'
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        etag = response.get_etag()[0]
+        self.assertTrue(etag.endswith('-gzip'))
+
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_etag()[0], etag)
+
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since at or after Last-Modified returns 304"""
+        url = '/api/charts/daily-activity?repository_id=1&days=30'
+        last_modified = self.client.get(url).headers['Last-Modified']
+
+        response = self.client.get(url, headers={'If-Modified-Since': last_modified})
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_data_version_bump_changes_etag_of_that_repository_only(self):
+        """Test that ingest-style version bumps invalidate only the affected repository"""
+        url_1 = '/api/metrics/velocity?repository_id=1&days=0'
+        url_2 = '/api/metrics/velocity?repository_id=2&days=0'
+        etag_1 = self.client.get(url_1).get_etag()[0]
+        etag_2 = self.client.get(url_2).get_etag()[0]
+
+        self.app_module.data_versions.bump(1)
+
+        self.assertEqual(self.client.get(url_1, headers={'If-None-Match': f'"{etag_1}"'}).status_code, 200)
+        self.assertEqual(self.client.get(url_2, headers={'If-None-Match': f'"{etag_2}"'}).status_code, 304)
+
+    def test_contributor_update_changes_etag(self):
+        """Test that updating a contributor invalidates the repositories they committed to"""
+        url = '/api/metrics/contributors?repository_id=2&days=0'
+        etag = self.client.get(url).get_etag()[0]
+
+        self.assertEqual(self.client.put('/api/contributors/1', json={'team': 'Platform'}).status_code, 200)
+
+        response = self.client.get(url, headers={'If-None-Match': f'"{etag}"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()[0]['team'], 'Platform')
+
+    def test_other_requests_are_not_tagged(self):
+        """Test that writes, repository listing and requests without a repository get no ETag"""
+        self.assertIsNone(self.client.get('/api/repositories').get_etag()[0])
+        self.assertIsNone(self.client.get('/api/metrics/velocity').get_etag()[0])
+        response = self.client.post('/api/contributors/compare', json={'contributor_ids': [1], 'repository_id': 1})
+        self.assertIsNone(response.get_etag()[0])
+
+    def test_query_is_part_of_etag(self):
+        """Test that different windows of the same endpoint get different ETags"""
+        etag_30 = self.client.get('/api/metrics/velocity?repository_id=1&days=30').get_etag()[0]
+        etag_0 = self.client.get('/api/metrics/velocity?repository_id=1&days=0').get_etag()[0]
+
+        self.assertNotEqual(etag_30, etag_0)
+
+
+if __name__ == '__main__':
+    unittest.main()
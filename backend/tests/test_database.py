@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from sqlalchemy.exc import OperationalError
+from models import create_database, create_read_only_database, Repository
+
+
+class TestDatabaseSetup(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'commit_tracker.db')
+        self.engine, self.Session = create_database(self.db_path)
+        self.read_engine, self.ReadSession = create_read_only_database(self.db_path)
+
+    def tearDown(self):
+        self.read_engine.dispose()
+        self.engine.dispose()
+        shutil.rmtree(self.temp_dir)
+
+    def _pragma(self, engine, name):
+        with engine.connect() as connection:
+            return connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+    def test_pragmas_applied(self):
+        """Test that connections run in WAL mode with the tuned settings"""
+        self.assertEqual(self._pragma(self.engine, 'journal_mode'), 'wal')
+        self.assertEqual(self._pragma(self.engine, 'synchronous'), 1)  # NORMAL
+        self.assertGreater(self._pragma(self.engine, 'busy_timeout'), 0)
+        self.assertGreater(self._pragma(self.engine, 'mmap_size'), 0)
+        self.assertEqual(self._pragma(self.read_engine, 'query_only'), 1)
+
+    def test_read_only_pool_rejects_writes(self):
+        """Test that the read-only pool can't modify the database"""
+        session = self.ReadSession()
+        session.add(Repository(name='repo', path='/tmp/repo'))
+        with self.assertRaises(OperationalError):
+            session.commit()
+        session.close()
+
+    def test_reads_continue_during_open_write_transaction(self):
+        """Test that metric reads neither block on nor see an uncommitted ingestion batch"""
+        writer = self.Session()
+        writer.add(Repository(name='committed', path='/tmp/committed'))
+        writer.commit()
+        writer.add(Repository(name='pending', path='/tmp/pending'))
+        writer.flush()  # holds the write lock until commit
+
+        names = []
+        reader_thread = threading.Thread(target=lambda: names.extend(
+            name for (name,) in self.ReadSession().query(Repository.name)
+        ))
+        reader_thread.start()
+        reader_thread.join(timeout=2)
+
+        self.assertFalse(reader_thread.is_alive())
+        self.assertEqual(names, ['committed'])
+        writer.commit()
+        writer.close()
+
+        reader = self.ReadSession()
+        self.assertEqual(sorted(name for (name,) in reader.query(Repository.name)), ['committed', 'pending'])
+        reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from datetime import date
+from downsampling import bucket_starts, choose_granularity, zero_filled, lttb
+
+
+class TestBuckets(unittest.TestCase):
+    def test_week_buckets_start_on_monday(self):
+        """Test that week buckets start on Mondays and cover both ends"""
+        starts = bucket_starts(date(2023, 12, 31), date(2024, 1, 15), 'week')
+
+        self.assertEqual(starts, [date(2023, 12, 25), date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15)])
+
+    def test_month_buckets_cross_year(self):
+        """Test that month buckets roll over the year"""
+        starts = bucket_starts(date(2023, 11, 30), date(2024, 2, 1), 'month')
+
+        self.assertEqual(starts, [date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)])
+
+    def test_choose_granularity(self):
+        """Test that auto picks the finest granularity within the point budget"""
+        self.assertEqual(choose_granularity(date(2024, 1, 1), date(2024, 3, 31)), 'day')
+        self.assertEqual(choose_granularity(date(2020, 1, 1), date(2024, 12, 31)), 'week')
+        self.assertEqual(choose_granularity(date(2000, 1, 1), date(2024, 12, 31)), 'month')
+        self.assertEqual(choose_granularity(date(2024, 1, 1), date(2024, 3, 31), max_points=20), 'week')
+        self.assertEqual(choose_granularity(None, date(2024, 3, 31)), 'day')
+
+    def test_zero_filled(self):
+        """Test that missing buckets are filled with zero points"""
+        points = {'2024-01-02': {'date': '2024-01-02', 'commits': 4}}
+
+        series = zero_filled(points, date(2024, 1, 1), date(2024, 1, 3), 'day', {'commits': 0})
+
+        self.assertEqual(series, [
+            {'date': '2024-01-01', 'commits': 0},
+            {'date': '2024-01-02', 'commits': 4},
+            {'date': '2024-01-03', 'commits': 0}
+        ])
+        self.assertEqual(zero_filled({}, None, date(2024, 1, 3), 'day', {'commits': 0}), [])
+
+
+class TestLttb(unittest.TestCase):
+    def test_keeps_ends_and_peaks(self):
+        """Test that downsampling keeps the first and last points and the spikes"""
+        points = [{'date': str(index), 'commits': 0} for index in range(1000)]
+        for spike in (137, 512, 881):
+            points[spike]['commits'] = 50
+
+        sampled = lttb(points, 20, 'commits')
+
+        self.assertEqual(len(sampled), 20)
+        self.assertIs(sampled[0], points[0])
+        self.assertIs(sampled[-1], points[-1])
+        self.assertEqual([point['date'] for point in sampled if point['commits']], ['137', '512', '881'])
+        self.assertEqual(sampled, sorted(sampled, key=lambda point: int(point['date'])))
+
+    def test_short_series_unchanged(self):
+        """Test that series within the budget, or without one, are returned as they are"""
+        points = [{'commits': value} for value in range(10)]
+
+        self.assertEqual(lttb(points, 10, 'commits'), points)
+        self.assertEqual(lttb(points, None, 'commits'), points)
+
+
+if __name__ == '__main__':
+    unittest.main()
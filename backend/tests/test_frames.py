@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from git_analyzer import GitAnalyzer
+from metrics_calculator import MetricsCalculator
+from metrics_cache import data_versions
+from models import Commit, Contributor, create_database
+from frames import FrameMetricsCalculator, FrameStore
+
+
+class TestFrameMetricsCalculator(unittest.TestCase):
+    """The frames engine gives the SQL engine's results"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.engine, self.Session = create_database(os.path.join(self.temp_dir, 'frames.db'))
+        self.session = self.Session()
+        self.session.add_all([
+            Contributor(id=1, name='Alice', email='alice@example.com', team='Backend'),
+            Contributor(id=2, name='Bob', email='bob@example.com', team='QA'),
+            Contributor(id=3, name='Carol', email='carol@example.com', team=None)
+        ])
+        self.session.commit()
+        self.now = datetime.utcnow()
+        self._ingest(range(400))
+
+        self.sql = MetricsCalculator(self.session)
+        self.frames = FrameStore()
+        self.calculator = FrameMetricsCalculator(self.session, frames=self.frames)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        shutil.rmtree(self.temp_dir)
+
+    def _ingest(self, indexes):
+        GitAnalyzer(self.session)._process_commit_batch([({
+            'sha': f'{index:040d}',
+            'repository_id': 1 + (index % 7 == 0),
+            'contributor_id': 1 + index % 3,
+            'message': 'feat: change',
+            'commit_date': self.now - timedelta(hours=index * 19),
+            'files_changed': 2,
+            'lines_added': index % 17,
+            'lines_deleted': index % 6,
+            'commit_type': ['feature', 'bugfix', 'test', None][index % 4]
+        }, [('src/app.py', '.py' if index % 5 else None, index % 17, index % 6, False),
+            ('tests/test_app.py', '.py', 0, 0, index % 4 == 0)]) for index in indexes])
+        data_versions.bump(1)
+        data_versions.bump(2)
+
+    def _assert_same(self, method, *args, **kwargs):
+        self.assertEqual(getattr(self.calculator, method)(*args, **kwargs), getattr(self.sql, method)(*args, **kwargs))
+
+    def test_repository_metrics_match_sql(self):
+        """Test that velocity, churn, coverage, stats, types, teams and the dashboard match SQL"""
+        for repository_id in (1, 2, 3):
+            for days in (0, 7, 30, 365):
+                with self.subTest(repository_id=repository_id, days=days):
+                    for method in ('get_commit_velocity', 'get_code_churn', 'get_test_coverage_impact'):
+                        self._assert_same(method, repository_id, days)
+                        self._assert_same(method, repository_id, days, contributor_id=2)
+                    for method in ('get_contributor_stats', 'get_commit_type_distribution',
+                                   'get_team_comparison', 'get_dashboard'):
+                        self._assert_same(method, repository_id, days)
+
+    def test_series_match_sql(self):
+        """Test that daily activity and timelines match SQL for every granularity and max_points"""
+        for days in (0, 30, 365):
+            for granularity in ('day', 'week', 'month', 'auto'):
+                for max_points in (None, 20):
+                    with self.subTest(days=days, granularity=granularity, max_points=max_points):
+                        self._assert_same('get_daily_activity', 1, days, granularity, max_points)
+                        self._assert_same('get_dashboard', 1, days, granularity=granularity, max_points=max_points)
+                        self._assert_same('get_contributor_activity_timeline', 2, 1, days, granularity, max_points)
+
+    def test_contributor_metrics_match_sql(self):
+        """Test that detailed, compared and bulk contributor metrics match SQL"""
+        for days in (0, 30, 365):
+            with self.subTest(days=days):
+                self._assert_same('get_contributor_detailed_metrics', 1, 1, days)
+                self._assert_same('compare_contributors', [1, 2, 3, 99], 1, days)
+                self._assert_same('get_contributors_bulk_metrics', [3, 1, 99], 1, days, 'auto', 30)
+
+    def test_invalid_series_args_raise(self):
+        """Test that unknown granularities and too small max_points are rejected like in SQL"""
+        with self.assertRaises(ValueError):
+            self.calculator.get_daily_activity(1, 30, granularity='hour')
+        with self.assertRaises(ValueError):
+            self.calculator.get_contributor_activity_timeline(1, 1, 30, max_points=2)
+
+    def test_ingest_refreshes_frame_incrementally(self):
+        """Test that new commits are merged into the frame without a full reload"""
+        self.calculator.get_code_churn(1, 0)
+        self._ingest(range(400, 450))
+
+        self._assert_same('get_code_churn', 1, 0)
+        self._assert_same('get_contributor_detailed_metrics', 2, 1, 0)
+        self.assertEqual(self.frames.stats()['loads'], 1)
+        self.assertEqual(self.frames.stats()['refreshes'], 1)
+
+    def test_deleted_commits_reload_frame(self):
+        """Test that a commit count that no longer adds up triggers a full reload"""
+        self.calculator.get_commit_velocity(1, 0)
+        commit = self.session.query(Commit).filter(Commit.repository_id == 1).first()
+        self.session.delete(commit)
+        self.session.commit()
+        data_versions.bump(1)
+
+        self.assertEqual(len(self.frames.get(self.session, 1)),
+                         self.session.query(Commit).filter(Commit.repository_id == 1).count())
+        self.assertEqual(self.frames.stats()['loads'], 2)
+
+    def test_unchanged_version_reuses_frame(self):
+        """Test that frames are only read from the database when the data version changes"""
+        frame = self.frames.get(self.session, 1)
+
+        self.assertIs(self.frames.get(self.session, 1), frame)
+        self.frames.invalidate(1)
+        self.assertIsNot(self.frames.get(self.session, 1), frame)
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        """Test that frames beyond the memory budget are dropped oldest first"""
+        frames = FrameStore(max_bytes=self.frames.get(self.session, 1).nbytes + 1)
+        frames.get(self.session, 1)
+        frames.get(self.session, 2)
+
+        self.assertEqual(frames.stats()['repositories'], [2])
+        self.assertEqual(frames.stats()['evictions'], 1)
+        self.assertLessEqual(frames.stats()['bytes'], frames.max_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,10 @@ from unittest.mock import Mock, MagicMock, patch, call
 import tempfile
 import os
 import shutil
-from git_analyzer import GitAnalyzer, CloneProgress
-from models import Repository, Commit, Contributor, CommitFile
+from datetime import datetime
+from git_analyzer import GitAnalyzer, CloneProgress, is_git_repository
+from models import Repository, Commit, Contributor, CommitFile, FilePath, RefWatermark, create_database
+from metrics_cache import data_versions
 
 
 class TestCloneProgress(unittest.TestCase):
@@ -290,5 +292,232 @@ class TestGitAnalyzer(unittest.TestCase):
         self.assertIn('error', result)
 
 
+class TestProcessCommitBatch(unittest.TestCase):
+    def setUp(self):
+        self.engine, Session = create_database(':memory:')
+        self.session = Session()
+        self.analyzer = GitAnalyzer(self.session)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def _row(self, sha):
+        return ({
+            'sha': sha,
+            'repository_id': 1,
+            'contributor_id': 1,
+            'message': 'feat: change',
+            'commit_date': datetime(2024, 1, 1),
+            'files_changed': 1,
+            'lines_added': 1,
+            'lines_deleted': 0,
+            'commit_type': 'feature'
+        }, [(f'src/{sha}.py', '.py', 1, 0, False)])
+
+    def test_bulk_insert_links_files_to_commit_ids(self):
+        """Test that files are attached to the ids returned for their commits"""
+        stored = self.analyzer._process_commit_batch([self._row(f'{i:040d}') for i in range(5)])
+        
+        self.assertEqual(stored, 5)
+        pairs = self.session.query(Commit.sha, FilePath.path).join(
+            CommitFile, CommitFile.commit_id == Commit.id
+        ).join(
+            FilePath, FilePath.id == CommitFile.path_id
+        ).all()
+        self.assertEqual(sorted(pairs), [(f'{i:040d}', f'src/{i:040d}.py') for i in range(5)])
+
+    def test_commit_dates_are_stored_in_utc(self):
+        """Test that the stored date, day and hour don't depend on the server's time zone"""
+        from git_analyzer import ClassifiedCommit
+        from git_log_reader import LogCommit
+        import time
+        
+        log_commit = LogCommit('a' * 40, [], 'Dev', 'dev@example.com', 1704144600, 'feat: x', [])
+        previous_tz = os.environ.get('TZ')
+        rows = []
+        try:
+            for tz in ('UTC', 'Asia/Tokyo', 'America/Los_Angeles'):
+                os.environ['TZ'] = tz
+                time.tzset()
+                rows.append(self.analyzer.build_commit_row(ClassifiedCommit(log_commit, 'feature', []), 1, 1, 'main'))
+        finally:
+            if previous_tz is None:
+                os.environ.pop('TZ')
+            else:
+                os.environ['TZ'] = previous_tz
+            time.tzset()
+        
+        self.assertEqual({row['commit_date'] for row in rows}, {datetime(2024, 1, 1, 21, 30)})
+
+    def test_bad_row_is_isolated(self):
+        """Test that a failing row is skipped without losing the rest of the batch"""
+        self.analyzer._process_commit_batch([self._row('0' * 40)])
+        
+        batch = [self._row(f'{i:040d}') for i in range(1, 6)]
+        batch.insert(2, self._row('0' * 40))  # duplicate SHA violates the unique constraint
+        stored = self.analyzer._process_commit_batch(batch)
+        
+        self.assertEqual(stored, 5)
+        self.assertEqual(self.session.query(Commit).count(), 6)
+        self.assertEqual(self.session.query(CommitFile).count(), 6)
+
+
+class TestIncrementalAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self._git('init', '-q')
+        self._git('config', 'user.email', 'dev@example.com')
+        self._git('config', 'user.name', 'Dev')
+        for index in range(3):
+            self._commit(f'feat: change {index}')
+        
+        self.engine, Session = create_database(':memory:')
+        self.session = Session()
+        self.analyzer = GitAnalyzer(self.session)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, *args):
+        import subprocess
+        subprocess.run(['git'] + list(args), cwd=self.temp_dir, check=True, capture_output=True)
+
+    def _commit(self, message):
+        with open(os.path.join(self.temp_dir, 'file.txt'), 'a') as handle:
+            handle.write(message + '\n')
+        self._git('add', '.')
+        self._git('commit', '-qm', message)
+
+    def test_reanalysis_walks_only_new_commits(self):
+        """Test that watermarks limit re-analysis to commits added since the last run"""
+        self.assertEqual(self.analyzer.analyze_repository(self.temp_dir, 1), 3)
+        self.assertEqual(self.analyzer.analyze_repository(self.temp_dir, 1), 0)
+        
+        self._commit('fix: new bug')
+        self._git('checkout', '-qb', 'feature')
+        self._commit('feat: on branch')
+        
+        with patch.object(self.analyzer, '_prepare_commit_batch', wraps=self.analyzer._prepare_commit_batch) as prepare:
+            self.assertEqual(self.analyzer.analyze_repository(self.temp_dir, 1), 2)
+        
+        walked = [classified.log_commit.message.strip() for call_args in prepare.call_args_list for classified in call_args[0][0]]
+        self.assertEqual(sorted(walked), ['feat: on branch', 'fix: new bug'])
+        self.assertEqual(self.session.query(Commit).count(), 5)
+        
+        watermarks = {w.ref_name for w in self.session.query(RefWatermark).filter_by(repository_id=1)}
+        self.assertIn('refs/heads/feature', watermarks)
+
+    def test_truncated_walk_keeps_watermarks(self):
+        """Test that a max_commits run does not advance the watermarks"""
+        self.assertEqual(self.analyzer.analyze_repository(self.temp_dir, 1, max_commits=1), 1)
+        self.assertEqual(self.session.query(RefWatermark).count(), 0)
+        
+        # Full run picks up the rest, skipping the commit already stored
+        self.assertEqual(self.analyzer.analyze_repository(self.temp_dir, 1), 2)
+
+    def test_analysis_bumps_data_version(self):
+        """Test that storing commits invalidates cached metrics of the repository"""
+        version = data_versions.get(1)
+        self.analyzer.analyze_repository(self.temp_dir, 1)
+        self.assertGreater(data_versions.get(1), version)
+
+    def test_parallel_ingestion_matches_serial(self):
+        """Test that sharded multi-process ingestion writes the same rows in the same order"""
+        for index in range(7):
+            self._commit(f'test: more {index}')
+        
+        def snapshot(session):
+            commits = session.query(
+                Commit.id, Commit.sha, Commit.contributor_id, Commit.commit_type, Commit.lines_added
+            ).order_by(Commit.id).all()
+            files = session.query(
+                CommitFile.commit_id, FilePath.path, FilePath.is_test_file
+            ).join(FilePath, FilePath.id == CommitFile.path_id).order_by(CommitFile.id).all()
+            return commits, files
+        
+        self.analyzer.analyze_repository(self.temp_dir, 1, workers=1)
+        
+        engine, Session = create_database(':memory:')
+        parallel_session = Session()
+        with patch('git_analyzer.config.INGEST_SHARD_SIZE', 3):
+            processed = GitAnalyzer(parallel_session).analyze_repository(self.temp_dir, 1, workers=2)
+        
+        self.assertEqual(processed, 10)
+        self.assertEqual(snapshot(parallel_session), snapshot(self.session))
+        parallel_session.close()
+        engine.dispose()
+
+
+class TestMirrorClone(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.temp_dir, 'source')
+        self.mirror = os.path.join(self.temp_dir, 'mirror.git')
+        os.makedirs(self.source)
+        self._git('init', '-q', '-b', 'main')
+        self._git('config', 'user.email', 'dev@example.com')
+        self._git('config', 'user.name', 'Dev')
+        self._commit('feat: first')
+        self._git('checkout', '-qb', 'feature')
+        self._commit('feat: on branch')
+        self._git('checkout', '-q', 'main')
+        self._commit('fix: second')
+        
+        self.engine, Session = create_database(':memory:')
+        self.session = Session()
+        self.analyzer = GitAnalyzer(self.session)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, *args):
+        import subprocess
+        subprocess.run(['git'] + list(args), cwd=self.source, check=True, capture_output=True)
+
+    def _commit(self, message):
+        with open(os.path.join(self.source, 'file.txt'), 'a') as handle:
+            handle.write(message + '\n')
+        self._git('add', '.')
+        self._git('commit', '-qm', message)
+
+    def _heads(self):
+        from git_log_reader import list_ref_tips
+        return {name: sha for name, sha in list_ref_tips(self.mirror).items() if name.startswith('refs/heads/')}
+
+    def test_mirror_clone_is_bare(self):
+        """Test that a mirror clone has the remote's branches and no working tree"""
+        success, _ = self.analyzer.clone_repository(self.source, self.mirror, mirror=True)
+        
+        self.assertTrue(success)
+        self.assertTrue(is_git_repository(self.mirror))
+        self.assertFalse(os.path.exists(os.path.join(self.mirror, 'file.txt')))
+        self.assertEqual(set(self._heads()), {'refs/heads/main', 'refs/heads/feature'})
+        self.assertEqual(self.analyzer.analyze_repository(self.mirror, 1), 3)
+
+    def test_refresh_fetches_and_prunes(self):
+        """Test that refreshing a mirror applies new, rewritten and deleted branches without a merge"""
+        self.analyzer.clone_repository(self.source, self.mirror, mirror=True)
+        self.assertEqual(self.analyzer.pull_repository(self.mirror), (True, 'Repository is already up to date', 0))
+        
+        self._commit('feat: third')
+        self._git('commit', '-q', '--amend', '-m', 'feat: third, rewritten')
+        self._git('branch', '-qD', 'feature')
+        self._git('checkout', '-qb', 'release')
+        self._commit('docs: notes')
+        
+        success, _, commits_fetched = self.analyzer.pull_repository(self.mirror)
+        
+        self.assertTrue(success)
+        self.assertEqual(commits_fetched, 2)
+        self.assertEqual(set(self._heads()), {'refs/heads/main', 'refs/heads/release'})
+        # The pruned branch's commit is unreachable now, the amended one was never fetched
+        self.assertEqual(self.analyzer.analyze_repository(self.mirror, 1), 4)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+import tempfile
+import shutil
+import subprocess
+import os
+import sys
+import threading
+from unittest.mock import patch
+import git
+from git_log_reader import (
+    LogCommit, parse_log_stream, parse_record, iter_log_commits, iter_gitpython_commits,
+    build_walk_revisions, list_ref_tips, count_commits
+)
+
+
+def _record(sha, parents, name, email, timestamp, message, numstat):
+    """Build a raw record the way git log -z emits it"""
+    header = '\x1e' + '\x1f'.join([sha, parents, name, email, str(timestamp), message]) + '\x1f\x00'
+    body = ''.join(f'\n{entry}\x00' if index == 0 else f'{entry}\x00' for index, entry in enumerate(numstat))
+    return (header + body).encode('utf-8')
+
+
+class TestParseLogStream(unittest.TestCase):
+    def test_parse_record_with_files(self):
+        """Test parsing a commit record with numstat entries"""
+        raw = _record('a' * 40, 'b' * 40, 'Jane', 'jane@example.com', 1700000000,
+                      'feat: add\n\nbody\n', ['3\t1\tsrc/app.py', '-\t-\tlogo.png'])
+        result = parse_record(raw[1:])
+
+        self.assertEqual(result, LogCommit(
+            sha='a' * 40,
+            parents=['b' * 40],
+            author_name='Jane',
+            author_email='jane@example.com',
+            committed_date=1700000000,
+            message='feat: add\n\nbody\n',
+            files=[('src/app.py', 3, 1), ('logo.png', 0, 0)]
+        ))
+
+    def test_parse_record_without_files(self):
+        """Test parsing an empty commit and a root commit"""
+        raw = _record('c' * 40, '', 'Jane', 'jane@example.com', 1700000000, 'empty\n', [])
+        result = parse_record(raw[1:])
+
+        self.assertEqual(result.parents, [])
+        self.assertEqual(result.files, [])
+        self.assertEqual(result.message, 'empty\n')
+
+    def test_parse_stream_across_chunk_boundaries(self):
+        """Test that records split over arbitrary chunks are reassembled"""
+        raw = b''.join([
+            _record('a' * 40, 'b' * 40, 'Jane', 'jane@example.com', 1, 'one\n', ['1\t0\ta.py']),
+            _record('b' * 40, '', 'John', 'john@example.com', 2, 'two\n', ['2\t2\tpath with\ttab.py']),
+            _record('d' * 40, 'a' * 40 + ' ' + 'b' * 40, 'Jane', 'jane@example.com', 3, 'merge\n', [])
+        ])
+        chunks = [raw[i:i + 7] for i in range(0, len(raw), 7)]
+
+        commits = list(parse_log_stream(chunks))
+
+        self.assertEqual([c.sha[0] for c in commits], ['a', 'b', 'd'])
+        self.assertEqual(commits[1].files, [('path with\ttab.py', 2, 2)])
+        self.assertEqual(len(commits[2].parents), 2)
+
+
+class TestBuildWalkRevisions(unittest.TestCase):
+    def test_first_analysis_walks_all_tips(self):
+        """Test that without watermarks every tip is walked"""
+        self.assertEqual(build_walk_revisions(['b', 'a', 'a'], []), ['a', 'b'])
+
+    def test_moved_refs_exclude_previous_tips(self):
+        """Test that only new tips are walked and old tips are excluded"""
+        self.assertEqual(build_walk_revisions(['c', 'b'], ['a', 'b']), ['c', '^a', '^b'])
+
+    def test_unchanged_refs_walk_nothing(self):
+        """Test that nothing is walked when no ref moved"""
+        self.assertEqual(build_walk_revisions(['a', 'b'], ['a', 'b', 'c']), [])
+
+
+class TestIterLogCommits(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self._git('init', '-q')
+        self._git('config', 'user.email', 'dev@example.com')
+        self._git('config', 'user.name', 'Dev')
+
+        self._write('app.py', 'a\nb\n')
+        self._write('logo.bin', '\x00binary')
+        self._git('add', '.')
+        self._git('commit', '-qm', 'feat: initial\n\nwith body')
+        self._git('mv', 'app.py', 'main.py')
+        self._write('main.py', 'a\nb\nc\n')
+        self._git('commit', '-qam', 'refactor: rename')
+        self._git('checkout', '-qb', 'feature')
+        self._write('tests/test_main.py', 'x\n')
+        self._git('add', '.')
+        self._git('commit', '-qm', 'test: add tests')
+        self._git('checkout', '-q', '-')
+        self._write('README.md', 'readme\n')
+        self._git('add', '.')
+        self._git('commit', '-qm', 'docs: readme')
+        self._git('merge', '-q', '--no-edit', 'feature')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, *args):
+        subprocess.run(['git'] + list(args), cwd=self.temp_dir, check=True, capture_output=True)
+
+    def _write(self, path, content):
+        full_path = os.path.join(self.temp_dir, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w') as handle:
+            handle.write(content)
+
+    def test_matches_gitpython_stats(self):
+        """Test that the streaming reader yields the same data as GitPython commit.stats"""
+        streamed = list(iter_log_commits(self.temp_dir))
+        legacy = list(iter_gitpython_commits(git.Repo(self.temp_dir)))
+
+        self.assertEqual(len(streamed), 5)
+        self.assertEqual(streamed, legacy)
+
+    def test_max_count_and_skip(self):
+        """Test limiting and offsetting the walk"""
+        all_shas = [c.sha for c in iter_log_commits(self.temp_dir)]
+
+        self.assertEqual([c.sha for c in iter_log_commits(self.temp_dir, max_count=2)], all_shas[:2])
+        self.assertEqual([c.sha for c in iter_log_commits(self.temp_dir, skip=3)], all_shas[3:])
+
+    def test_stdin_revisions_limit_walk(self):
+        """Test walking old_tip..new_tip ranges passed on stdin"""
+        ref_tips = list_ref_tips(self.temp_dir)
+        all_shas = [c.sha for c in iter_log_commits(self.temp_dir)]
+        feature_tip = ref_tips['refs/heads/feature']
+
+        revisions = build_walk_revisions(ref_tips.values(), [feature_tip])
+        walked = [c.sha for c in iter_log_commits(self.temp_dir, stdin_revs=revisions)]
+
+        self.assertIn('HEAD', ref_tips)
+        self.assertEqual(count_commits(self.temp_dir, revisions), len(walked))
+        self.assertEqual(set(walked), set(all_shas) - {feature_tip} - set(
+            c.sha for c in iter_log_commits(self.temp_dir, revs=[feature_tip])
+        ))
+
+    def test_invalid_revision_raises(self):
+        """Test that git errors are surfaced"""
+        with self.assertRaises(RuntimeError):
+            list(iter_log_commits(self.temp_dir, revs=['does-not-exist']))
+
+    def test_large_stderr_does_not_block(self):
+        """Test that more stderr than a pipe buffer holds neither hangs the reader nor gets lost"""
+        noisy = [sys.executable, '-c', 'import sys; sys.stderr.write("warning: noise\\n" * 50000); sys.exit(1)']
+        results = []
+
+        def read():
+            try:
+                list(iter_log_commits(self.temp_dir))
+            except RuntimeError as e:
+                results.append(str(e))
+
+        with patch('git_log_reader.build_log_command', return_value=noisy):
+            reader = threading.Thread(target=read, daemon=True)
+            reader.start()
+            reader.join(30)
+
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0].endswith('warning: noise'))
+
+
+if __name__ == '__main__':
+    unittest.main()
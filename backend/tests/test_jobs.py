@@ -0,0 +1,285 @@
+import unittest
+from unittest.mock import Mock, patch
+import tempfile
+import shutil
+import subprocess
+import os
+import json
+import time
+import threading
+from sqlalchemy.exc import IntegrityError
+from models import create_database, Repository, Commit, AnalysisJob, RefWatermark, ClassificationRuleSet
+from git_analyzer import GitAnalyzer
+from jobs import JobManager
+
+
+def create_repository(path, commit_count):
+    """Create a linear repository quickly with git fast-import"""
+    subprocess.run(['git', 'init', '-q', path], check=True)
+    stream = []
+    for index in range(commit_count):
+        message = f'feat: change {index}\n'.encode()
+        content = f'line {index}\n'.encode()
+        stream.append(b'commit refs/heads/main\n')
+        stream.append(f'mark :{index + 1}\n'.encode())
+        stream.append(f'committer Dev <dev@example.com> {1600000000 + index * 60} +0000\n'.encode())
+        stream.append(f'data {len(message)}\n'.encode() + message)
+        if index > 0:
+            stream.append(f'from :{index}\n'.encode())
+        stream.append(f'M 100644 inline file_{index % 7}.py\n'.encode())
+        stream.append(f'data {len(content)}\n'.encode() + content)
+        stream.append(b'\n')
+    subprocess.run(['git', 'fast-import', '--quiet'], cwd=path, input=b''.join(stream), check=True)
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo_path = os.path.join(self.temp_dir, 'repo')
+        create_repository(self.repo_path, 250)
+
+        # File database: job threads need to see the same data as the test thread
+        self.engine, self.Session = create_database(os.path.join(self.temp_dir, 'jobs.db'))
+        session = self.Session()
+        repo = Repository(name='repo', path=self.repo_path)
+        session.add(repo)
+        session.commit()
+        self.repository_id = repo.id
+        session.close()
+
+        self.socketio = Mock()
+        self.manager = JobManager(self.Session, self.socketio, max_workers=1)
+
+    def tearDown(self):
+        self.manager.shutdown()
+        self.engine.dispose()
+        shutil.rmtree(self.temp_dir)
+
+    def _wait(self, job_id, timeout=30):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = self.manager.get(job_id)
+            if job['status'] not in ('queued', 'running'):
+                return job
+            time.sleep(0.05)
+        self.fail(f'Job {job_id} did not finish')
+
+    def _commit_count(self):
+        session = self.Session()
+        try:
+            return session.query(Commit).filter_by(repository_id=self.repository_id).count()
+        finally:
+            session.close()
+
+    def test_submit_runs_job_to_completion(self):
+        """Test that a submitted job analyzes the repository in the background"""
+        job, created = self.manager.submit(self.repository_id)
+        self.assertTrue(created)
+
+        finished = self._wait(job['id'])
+
+        self.assertEqual(finished['status'], 'completed')
+        self.assertEqual(finished['commits_processed'], 250)
+        self.assertEqual(finished['progress'], 100)
+        self.assertEqual(self._commit_count(), 250)
+        events = [call_args[0][0] for call_args in self.socketio.emit.call_args_list]
+        self.assertIn('analysis_started', events)
+        self.assertIn('analysis_completed', events)
+
+    def test_cancel_queued_job(self):
+        """Test that a job cancelled before it starts never runs"""
+        session = self.Session()
+        job = AnalysisJob(repository_id=self.repository_id, status='queued')
+        session.add(job)
+        session.commit()
+        job_id = job.id
+        session.close()
+
+        cancelled = self.manager.cancel(job_id)
+        self.assertEqual(cancelled['status'], 'cancelled')
+
+        # Even if it is picked up later it stays cancelled
+        self.manager.resume_incomplete()
+        self.manager.shutdown()
+        self.assertEqual(self.manager.get(job_id)['status'], 'cancelled')
+        self.assertEqual(self._commit_count(), 0)
+
+    def test_cancel_running_job_stops_after_batch(self):
+        """Test that a running job stops at the next checkpoint and keeps stored batches"""
+        original = GitAnalyzer._process_commit_batch
+        job_ids = []
+
+        def process_then_cancel(analyzer, commit_batch):
+            stored = original(analyzer, commit_batch)
+            self.manager.cancel(job_ids[0])
+            return stored
+
+        with patch.object(GitAnalyzer, '_process_commit_batch', process_then_cancel):
+            job, _ = self.manager.submit(self.repository_id)
+            job_ids.append(job['id'])
+            finished = self._wait(job['id'])
+
+        self.assertEqual(finished['status'], 'cancelled')
+        self.assertEqual(finished['commits_walked'], 100)
+        self.assertEqual(self._commit_count(), 100)
+        completed = [args[1] for args, _ in self.socketio.emit.call_args_list if args[0] == 'analysis_completed']
+        self.assertEqual(completed[-1]['kind'], 'analysis')
+        self.assertEqual(completed[-1]['error'], 'Analysis cancelled')
+
+    def test_resume_interrupted_job_from_checkpoint(self):
+        """Test that a job left running by a crash continues after its last checkpoint"""
+        session = self.Session()
+        analyzer = GitAnalyzer(session)
+        ref_tips, revisions = analyzer.plan_commit_walk(self.repo_path, self.repository_id)
+        # Simulate a crash after the first batch was stored and checkpointed
+        analyzer.ingest_commits(self.repo_path, self.repository_id, ref_tips, revisions, max_commits=100)
+        job = AnalysisJob(
+            repository_id=self.repository_id,
+            status='running',
+            ref_tips=json.dumps(ref_tips),
+            revisions=json.dumps(revisions),
+            total_commits=250,
+            commits_walked=100,
+            commits_processed=100
+        )
+        session.add(job)
+        session.commit()
+        job_id = job.id
+        session.close()
+
+        with patch.object(GitAnalyzer, '_prepare_commit_batch', autospec=True,
+                          side_effect=GitAnalyzer._prepare_commit_batch) as prepare:
+            self.assertEqual(self.manager.resume_incomplete(), 1)
+            finished = self._wait(job_id)
+
+        walked = sum(len(call_args[0][1]) for call_args in prepare.call_args_list)
+        self.assertEqual(finished['status'], 'completed')
+        self.assertEqual(walked, 150)
+        self.assertEqual(finished['commits_processed'], 250)
+        self.assertEqual(self._commit_count(), 250)
+
+        session = self.Session()
+        watermarks = session.query(RefWatermark.ref_name).filter_by(repository_id=self.repository_id).all()
+        self.assertEqual([ref_name for (ref_name,) in watermarks], ['refs/heads/main'])
+        session.close()
+
+    def test_one_active_job_per_repository(self):
+        """Test that submitting while a job is active returns the active job"""
+        session = self.Session()
+        job = AnalysisJob(repository_id=self.repository_id, status='running')
+        session.add(job)
+        session.commit()
+        job_id = job.id
+        session.close()
+
+        active, created = self.manager.submit(self.repository_id)
+
+        self.assertFalse(created)
+        self.assertEqual(active['id'], job_id)
+
+    def test_concurrent_submits_create_one_job(self):
+        """Test that racing submits for a repository share a single job"""
+        barrier = threading.Barrier(8)
+        results = []
+        errors = []
+        original = JobManager._active_job
+        checked = threading.local()
+
+        def active_job_after_first_check(manager, session, repository_id):
+            # Every submit misses the pre-check, only the database constraint can stop them
+            if not getattr(checked, 'done', False):
+                checked.done = True
+                return None
+            return original(manager, session, repository_id)
+
+        def submit():
+            barrier.wait()
+            try:
+                results.append(self.manager.submit(self.repository_id))
+            except Exception as e:
+                errors.append(e)
+
+        with patch.object(JobManager, '_active_job', active_job_after_first_check):
+            threads = [threading.Thread(target=submit) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sum(created for _, created in results), 1)
+        self.assertEqual(len({job['id'] for job, _ in results}), 1)
+        self._wait(results[0][0]['id'])
+
+    def test_database_rejects_second_active_job(self):
+        """Test that the database allows one queued or running job per repository"""
+        session = self.Session()
+        session.add_all([
+            AnalysisJob(repository_id=self.repository_id, status='completed'),
+            AnalysisJob(repository_id=self.repository_id, status='running')
+        ])
+        session.commit()
+        session.add(AnalysisJob(repository_id=self.repository_id, status='queued'))
+        with self.assertRaises(IntegrityError):
+            session.commit()
+        session.close()
+
+    def _commit_types(self):
+        session = self.Session()
+        try:
+            return {commit_type for (commit_type,) in session.query(Commit.commit_type).filter_by(
+                repository_id=self.repository_id
+            ).distinct()}
+        finally:
+            session.close()
+
+    def _store_rules(self, commit_types):
+        session = self.Session()
+        session.query(ClassificationRuleSet).filter_by(repository_id=self.repository_id).delete()
+        session.add(ClassificationRuleSet(
+            repository_id=self.repository_id,
+            commit_types=json.dumps(commit_types),
+            default_commit_type='other',
+            test_path_patterns=json.dumps([r'^file_0\.py$'])
+        ))
+        session.commit()
+        session.close()
+
+    def test_reclassify_job_applies_updated_rules(self):
+        """Test that analysis uses the stored rules and a reclassify job applies changed ones without git"""
+        self._store_rules([{'type': 'chore', 'keywords': ['change']}])
+        self.assertEqual(self._wait(self.manager.submit(self.repository_id)[0]['id'])['status'], 'completed')
+        self.assertEqual(self._commit_types(), {'chore'})
+
+        self._store_rules([{'type': 'feature', 'keywords': ['feat']}])
+        frames = Mock()
+        self.manager.frames = frames
+        shutil.rmtree(os.path.join(self.repo_path, '.git'))
+        job, created = self.manager.submit(self.repository_id, kind='reclassify')
+        self.assertTrue(created)
+        self.assertEqual(job['kind'], 'reclassify')
+
+        finished = self._wait(job['id'])
+
+        self.assertEqual(finished['status'], 'completed')
+        self.assertEqual(finished['commits_processed'], 250)
+        self.assertEqual(finished['progress'], 100)
+        self.assertEqual(self._commit_types(), {'feature'})
+        frames.invalidate.assert_called_once_with(self.repository_id)
+
+    def test_failed_reclassify_job_reports_its_kind(self):
+        """Test that a failing reclassify job is reported as a reclassification on every event"""
+        with patch('jobs.reclassify_repository', side_effect=RuntimeError('rules broke')):
+            job, _ = self.manager.submit(self.repository_id, kind='reclassify')
+            finished = self._wait(job['id'])
+
+        self.assertEqual(finished['status'], 'failed')
+        self.assertEqual(finished['error'], 'Error reclassifying repository: rules broke')
+        events = [args for args, _ in self.socketio.emit.call_args_list]
+        self.assertEqual([event for event, _ in events], ['analysis_started', 'analysis_completed'])
+        self.assertTrue(all(payload['kind'] == 'reclassify' for _, payload in events))
+        self.assertEqual(events[-1][1]['error'], 'Error reclassifying repository: rules broke')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import Mock, patch
+from datetime import datetime
+from metrics_cache import MetricsCache, CachedMetricsCalculator, DataVersions, estimate_size
+from metrics_calculator import MetricsCalculator
+
+
+class TestMetricsCache(unittest.TestCase):
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted"""
+        cache = MetricsCache(max_bytes=10000)
+        cache.put('a', {'value': 1})
+
+        self.assertEqual(cache.get('a'), (True, {'value': 1}))
+        self.assertEqual(cache.get('b'), (False, None))
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_evicts_least_recently_used_over_budget(self):
+        """Test that the byte budget evicts the least recently used entry"""
+        value = list(range(20))
+        cache = MetricsCache(max_bytes=estimate_size(value) * 2)
+        cache.put('a', value)
+        cache.put('b', value)
+        cache.get('a')
+        cache.put('c', value)
+
+        self.assertTrue(cache.get('a')[0])
+        self.assertFalse(cache.get('b')[0])
+        self.assertTrue(cache.get('c')[0])
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertLessEqual(cache.stats()['bytes'], cache.max_bytes)
+
+    def test_oversized_result_is_not_cached(self):
+        """Test that a result larger than the whole budget is skipped"""
+        cache = MetricsCache(max_bytes=100)
+        self.assertFalse(cache.put('a', 'x' * 1000))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+
+class TestDataVersions(unittest.TestCase):
+    def test_bump_records_last_modified(self):
+        """Test that bumps advance the version and last modified time of one repository"""
+        versions = DataVersions()
+        self.assertEqual(versions.last_modified(1), versions.started_at)
+
+        self.assertEqual(versions.bump(1), 1)
+
+        self.assertGreaterEqual(versions.last_modified(1), versions.started_at)
+        self.assertEqual(versions.last_modified(1).microsecond, 0)
+        self.assertEqual(versions.get(2), 0)
+
+    def test_instance_token_is_unique_per_instance(self):
+        """Test that a restarted process cannot reuse validators of the previous one"""
+        self.assertNotEqual(DataVersions().instance, DataVersions().instance)
+
+
+class TestCachedMetricsCalculator(unittest.TestCase):
+    def setUp(self):
+        self.calculator = MetricsCalculator(Mock())
+        self.versions = DataVersions()
+        self.cached = CachedMetricsCalculator(self.calculator, MetricsCache(max_bytes=100000), self.versions)
+
+    def test_repeated_call_is_served_from_cache(self):
+        """Test that equal calls compute once, however the arguments are passed"""
+        with patch.object(self.calculator, 'get_code_churn', return_value={'lines_added': 1}) as churn:
+            self.cached.get_code_churn(1, 30)
+            self.cached.get_code_churn(1, days=30, contributor_id=None)
+            self.cached.get_code_churn(repository_id=1)
+
+        self.assertEqual(churn.call_count, 1)
+        self.assertEqual(self.cached.stats()['hits'], 2)
+
+    def test_version_bump_invalidates_repository(self):
+        """Test that bumping a repository's version only recomputes that repository"""
+        with patch.object(self.calculator, 'get_daily_activity', return_value=[]) as activity:
+            self.cached.get_daily_activity(1, 30)
+            self.cached.get_daily_activity(2, 30)
+            self.versions.bump(1)
+            self.cached.get_daily_activity(1, 30)
+            self.cached.get_daily_activity(2, 30)
+
+        self.assertEqual(activity.call_count, 3)
+
+    def test_keys_roll_over_with_the_day(self):
+        """Test that a new UTC day computes fresh results"""
+        with patch.object(self.calculator, 'get_team_comparison', return_value=[]) as teams, \
+                patch('metrics_cache.datetime') as mock_datetime:
+            mock_datetime.utcnow.return_value = datetime(2024, 6, 15, 9)
+            self.cached.get_team_comparison(1, 30)
+            mock_datetime.utcnow.return_value = datetime(2024, 6, 15, 23)
+            self.cached.get_team_comparison(1, 30)
+            mock_datetime.utcnow.return_value = datetime(2024, 6, 16, 0, 5)
+            self.cached.get_team_comparison(1, 30)
+
+        self.assertEqual(teams.call_count, 2)
+
+    def test_list_arguments_are_part_of_the_key(self):
+        """Test that compare_contributors keys on the contributor list"""
+        with patch.object(self.calculator, 'compare_contributors', return_value=[]) as compare:
+            self.cached.compare_contributors([1, 2], 1, 30)
+            self.cached.compare_contributors([1, 2], 1, 30)
+            self.cached.compare_contributors([1, 3], 1, 30)
+
+        self.assertEqual(compare.call_count, 2)
+
+    def test_other_attributes_pass_through(self):
+        """Test that non-metric attributes come from the wrapped calculator"""
+        self.assertIs(self.cached.session, self.calculator.session)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,15 @@
+import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import Mock, MagicMock, patch
 from datetime import datetime, timedelta
-from metrics_calculator import MetricsCalculator
-from models import Commit, Contributor, CommitFile
+from sqlalchemy import insert, event
+from sqlalchemy.orm import scoped_session
+from git_analyzer import GitAnalyzer
+from metrics_calculator import MetricsCalculator, DASHBOARD_PANELS
+from models import Commit, Contributor, CommitFile, FilePath, create_database
+from path_index import intern_paths
 
 
 class TestMetricsCalculator(unittest.TestCase):
@@ -14,9 +21,9 @@ class TestMetricsCalculator(unittest.TestCase):
 
     def test_get_commit_velocity_regular_days(self):
         """Test commit velocity calculation for regular days"""
-        # Mock commits
-        mock_commits = [Mock() for _ in range(5)]
-        self.mock_session.query.return_value.filter.return_value.all.return_value = mock_commits
+        # Mock rollup totals
+        mock_result = Mock(commit_count=5, first_day=None)
+        self.mock_session.query.return_value.filter.return_value.first.return_value = mock_result
         
         velocity = self.calculator.get_commit_velocity(self.repository_id, days=30)
         
@@ -25,21 +32,20 @@ class TestMetricsCalculator(unittest.TestCase):
 
     def test_get_commit_velocity_lifetime(self):
         """Test commit velocity calculation for lifetime (days=0)"""
-        # Mock commits with dates
-        mock_commits = []
-        base_date = datetime.utcnow() - timedelta(days=100)
-        for i in range(10):
-            commit = Mock()
-            commit.commit_date = base_date + timedelta(days=i*10)
-            mock_commits.append(commit)
-        
-        self.mock_session.query.return_value.filter.return_value.all.return_value = mock_commits
+        # Mock rollup totals and the first commit, 100 days ago
+        first_commit_date = datetime.utcnow() - timedelta(days=100)
+        mock_result = Mock(commit_count=10, first_day=first_commit_date.date())
+        self.mock_session.query.return_value.filter.return_value.first.return_value = mock_result
+        self.mock_session.query.return_value.filter.return_value.group_by.return_value.all.return_value = [
+            (self.contributor_id, first_commit_date)
+        ]
         
         with patch('metrics_calculator.datetime') as mock_datetime:
             mock_datetime.utcnow.return_value = datetime.utcnow()
             velocity = self.calculator.get_commit_velocity(self.repository_id, days=0)
             
         self.assertGreater(velocity, 0)
+        self.assertAlmostEqual(velocity, 10/100, places=3)
 
     def test_get_code_churn_normal_case(self):
         """Test code churn calculation with normal values"""
@@ -95,12 +101,9 @@ class TestMetricsCalculator(unittest.TestCase):
 
     def test_get_test_coverage_impact_with_files(self):
         """Test test coverage impact calculation"""
-        # Mock commit IDs
-        mock_commit_ids = [Mock(id=1), Mock(id=2), Mock(id=3)]
-        self.mock_session.query.return_value.filter.return_value.all.return_value = mock_commit_ids
-        
-        # Mock file counts
-        self.mock_session.query.return_value.filter.return_value.count.side_effect = [2, 10]  # test_files, total_files
+        # Mock rollup file counts
+        mock_result = Mock(test_files=2, production_files=8)
+        self.mock_session.query.return_value.filter.return_value.first.return_value = mock_result
         
         result = self.calculator.get_test_coverage_impact(self.repository_id, days=30)
         
@@ -113,7 +116,8 @@ class TestMetricsCalculator(unittest.TestCase):
 
     def test_get_test_coverage_impact_no_commits(self):
         """Test test coverage impact with no commits"""
-        self.mock_session.query.return_value.filter.return_value.all.return_value = []
+        mock_result = Mock(test_files=None, production_files=None)
+        self.mock_session.query.return_value.filter.return_value.first.return_value = mock_result
         
         result = self.calculator.get_test_coverage_impact(self.repository_id, days=30)
         
@@ -178,19 +182,21 @@ class TestMetricsCalculator(unittest.TestCase):
 
     def test_get_daily_activity(self):
         """Test daily activity calculation"""
-        # Mock daily activity data
+        # Mock daily activity data for yesterday and today
+        today = datetime.utcnow().date()
+        yesterday = today - timedelta(days=1)
         mock_items = [
-            Mock(date="2024-01-01", commit_count=5, lines_added=100, lines_deleted=20),
-            Mock(date="2024-01-02", commit_count=3, lines_added=50, lines_deleted=10)
+            Mock(date=str(yesterday), commit_count=5, lines_added=100, lines_deleted=20),
+            Mock(date=str(today), commit_count=3, lines_added=50, lines_deleted=10)
         ]
         
-        self.mock_session.query.return_value.filter.return_value.group_by.return_value.all.return_value = mock_items
+        self.mock_session.query.return_value.filter.return_value.group_by.return_value.order_by.return_value.all.return_value = mock_items
         
-        result = self.calculator.get_daily_activity(self.repository_id, days=30)
+        result = self.calculator.get_daily_activity(self.repository_id, days=0)
         
         expected = [
-            {'date': '2024-01-01', 'commit_count': 5, 'lines_added': 100, 'lines_deleted': 20},
-            {'date': '2024-01-02', 'commit_count': 3, 'lines_added': 50, 'lines_deleted': 10}
+            {'date': str(yesterday), 'commit_count': 5, 'lines_added': 100, 'lines_deleted': 20},
+            {'date': str(today), 'commit_count': 3, 'lines_added': 50, 'lines_deleted': 10}
         ]
         self.assertEqual(result, expected)
 
@@ -240,5 +246,408 @@ class TestMetricsCalculator(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+
+class TestContributorDetailedMetricsQueries(unittest.TestCase):
+    def setUp(self):
+        self.engine, Session = create_database(':memory:')
+        self.session = Session()
+        self.calculator = MetricsCalculator(self.session)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def test_file_expertise_beyond_sqlite_variable_limit(self):
+        """Test that file expertise over more commits than SQLite allows bound variables still works"""
+        commit_count = 33000  # SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 32766
+        now = datetime.utcnow()
+        self.session.execute(insert(Commit.__table__), [{
+            'id': index + 1,
+            'sha': f'{index:040x}',
+            'repository_id': 1,
+            'contributor_id': 1,
+            'commit_date': now - timedelta(minutes=index),
+            'files_changed': 1,
+            'lines_added': 2,
+            'lines_deleted': 1,
+            'commit_type': 'feature'
+        } for index in range(commit_count)])
+        path_ids = intern_paths(self.session, 1, [
+            (f'src/file_{index}.py', '.py', False) for index in range(7)
+        ] + [(f'tests/test_{index}.js', '.js', True) for index in range(7)])
+        self.session.execute(insert(CommitFile.__table__), [{
+            'commit_id': index + 1,
+            'path_id': path_ids[f'src/file_{index % 7}.py' if index % 3 else f'tests/test_{index % 7}.js'],
+            'lines_added': 2,
+            'lines_deleted': 1
+        } for index in range(commit_count)])
+        self.session.commit()
+
+        metrics = self.calculator.get_contributor_detailed_metrics(1, 1, days=0)
+
+        self.assertEqual(metrics['total_commits'], commit_count)
+        self.assertEqual(metrics['file_expertise'], {
+            '.js': {'files_modified': 11000, 'total_changes': 33000},
+            '.py': {'files_modified': 22000, 'total_changes': 66000}
+        })
+
+
+    def _add_team(self, size):
+        now = datetime.utcnow()
+        self.session.add_all([
+            Contributor(id=index, name=f'Dev {index}', email=f'dev{index}@example.com', team='Core')
+            for index in range(1, size + 1)
+        ])
+        self.session.execute(insert(Commit.__table__), [{
+            'id': index + 1,
+            'sha': f'{index:040x}',
+            'repository_id': 1,
+            'contributor_id': 1 + index % (size - 1),  # the last contributor has no commits
+            'commit_date': now - timedelta(hours=index * 5),
+            'files_changed': 1,
+            'lines_added': index % 11,
+            'lines_deleted': index % 4,
+            'commit_type': ['feature', 'bugfix', None][index % 3]
+        } for index in range(size * 20)])
+        # One path per file type, the type is a property of the path now
+        path_ids = intern_paths(self.session, 1, [
+            ('src/file.py', '.py', False), ('src/file.js', '.js', False), ('src/file', None, False)
+        ])
+        self.session.execute(insert(CommitFile.__table__), [{
+            'commit_id': index + 1,
+            'path_id': path_ids[['src/file.py', 'src/file.js', 'src/file'][index % 3]],
+            'lines_added': index % 11,
+            'lines_deleted': index % 4
+        } for index in range(size * 20)])
+        self.session.commit()
+
+    def test_compare_contributors_matches_individual_metrics(self):
+        """Test that batched comparison returns each contributor's detailed metrics plus profile"""
+        self._add_team(6)
+        requested = [3, 999, 1, 6]
+
+        comparison = self.calculator.compare_contributors(requested, 1, days=0)
+
+        self.assertEqual([item['contributor_id'] for item in comparison], [3, 1, 6])
+        for item in comparison:
+            expected = self.calculator.get_contributor_detailed_metrics(item['contributor_id'], 1, days=0)
+            self.assertEqual({key: item[key] for key in expected}, expected)
+            self.assertEqual(item['name'], f"Dev {item['contributor_id']}")
+        self.assertEqual(comparison[-1]['total_commits'], 0)
+
+    def test_bulk_metrics_match_individual_metrics_and_timelines(self):
+        """Test that bulk metrics hold each contributor's detailed metrics, profile and timeline"""
+        self._add_team(6)
+
+        bulk = self.calculator.get_contributors_bulk_metrics([4, 2, 999, 4, 6], 1, days=30)
+
+        self.assertEqual(list(bulk['metrics']), [4, 2, 6])
+        self.assertEqual(list(bulk['timelines']), [4, 2, 6])
+        for contributor_id in (4, 2, 6):
+            expected = self.calculator.get_contributor_detailed_metrics(contributor_id, 1, days=30)
+            metrics = bulk['metrics'][contributor_id]
+            self.assertEqual({key: metrics[key] for key in expected}, expected)
+            self.assertEqual(metrics['email'], f'dev{contributor_id}@example.com')
+            self.assertEqual(
+                bulk['timelines'][contributor_id],
+                self.calculator.get_contributor_activity_timeline(contributor_id, 1, days=30)
+            )
+        self.assertEqual({day['commits'] for day in bulk['timelines'][6]}, {0})
+        self.assertEqual(self.calculator.get_contributors_bulk_metrics([999], 1), {'metrics': {}, 'timelines': {}})
+
+    def test_compare_contributors_query_count_is_constant(self):
+        """Test that comparing more contributors does not issue more queries"""
+        self._add_team(120)
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(self.engine, 'before_cursor_execute', listener)
+        self.addCleanup(event.remove, self.engine, 'before_cursor_execute', listener)
+
+        self.calculator.compare_contributors([1, 2], 1, days=30)
+        few = len(statements)
+        statements.clear()
+        self.calculator.compare_contributors(list(range(1, 121)), 1, days=30)
+        self.assertEqual(len(statements), few)
+
+        statements.clear()
+        self.calculator.get_contributors_bulk_metrics([1, 2], 1, days=30)
+        few = len(statements)
+        statements.clear()
+        self.calculator.get_contributors_bulk_metrics(list(range(1, 121)), 1, days=30)
+        self.assertEqual(len(statements), few)
+
+
+class TestDetailedMetricsMatchPerRow(unittest.TestCase):
+    """The aggregate queries must give what a walk over the stored rows gives"""
+
+    def setUp(self):
+        self.engine, Session = create_database(':memory:')
+        self.session = Session()
+        self.calculator = MetricsCalculator(self.session)
+        self.session.add_all([
+            Contributor(id=contributor_id, name=f'Dev {contributor_id}', email=f'dev{contributor_id}@example.com')
+            for contributor_id in (1, 2, 3)
+        ])
+        self.session.commit()
+
+        now = datetime.utcnow()
+        paths = [('src/app.py', '.py', False), ('tests/test_app.py', '.py', True), ('web/App.test.js', '.js', True),
+                 ('web/index.js', '.js', False), ('Makefile', '', False)]
+        batch = []
+        for index in range(300):
+            files = [paths[(index + offset) % len(paths)] for offset in range(1 + index % 3)]
+            batch.append(({
+                'sha': f'{index:040d}',
+                'repository_id': 1 + (index % 7 == 0),
+                'contributor_id': 1 + index % 3,
+                'message': 'change',
+                'commit_date': now - timedelta(hours=index * 11 + 1),
+                'files_changed': len(files),
+                'lines_added': index % 23,
+                'lines_deleted': index % 9,
+                'commit_type': [None, 'feature', 'bugfix', 'test', 'other'][index % 5]
+            }, [(path, file_type, index % 5, index % 4, is_test) for path, file_type, is_test in files]))
+        GitAnalyzer(self.session)._process_commit_batch(batch)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def _window_rows(self, contributor_id, days):
+        end_date = datetime.utcnow()
+        if days == 0:
+            start_date = None
+        elif days == 365:
+            start_date = datetime(end_date.year, 1, 1)
+        else:
+            start_date = (end_date - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        commits = [commit for commit in self.session.query(Commit).filter_by(repository_id=1, contributor_id=contributor_id)
+                   if start_date is None or start_date <= commit.commit_date <= end_date]
+        files = [(commit_file, path) for commit_file, path in self.session.query(CommitFile, FilePath).join(
+            FilePath, FilePath.id == CommitFile.path_id
+        ).filter(CommitFile.commit_id.in_([commit.id for commit in commits]))]
+        return commits, files, start_date, end_date
+
+    def _per_row_metrics(self, contributor_id, days):
+        """What the implementation loading Commit rows computed"""
+        commits, files, start_date, end_date = self._window_rows(contributor_id, days)
+        if days == 0:
+            velocity_days = max((end_date - min(commit.commit_date for commit in commits)).days, 1)
+        elif days == 365:
+            velocity_days = (end_date - start_date).days + 1
+        else:
+            velocity_days = days
+        commit_types, activity_pattern, file_expertise = {}, {}, {}
+        for commit in commits:
+            commit_types[commit.commit_type or 'other'] = commit_types.get(commit.commit_type or 'other', 0) + 1
+            activity_pattern[commit.commit_date.hour] = activity_pattern.get(commit.commit_date.hour, 0) + 1
+        for commit_file, path in files:
+            expertise = file_expertise.setdefault(path.file_type or 'unknown', {'files_modified': 0, 'total_changes': 0})
+            expertise['files_modified'] += 1
+            expertise['total_changes'] += commit_file.lines_added + commit_file.lines_deleted
+
+        lines_added = sum(commit.lines_added for commit in commits)
+        lines_deleted = sum(commit.lines_deleted for commit in commits)
+        files_modified = sum(commit.files_changed for commit in commits)
+        return {
+            'contributor_id': contributor_id,
+            'total_commits': len(commits),
+            'lines_added': lines_added,
+            'lines_deleted': lines_deleted,
+            'files_modified': files_modified,
+            'avg_files_per_commit': round(files_modified / len(commits), 2),
+            'commit_velocity': round(len(commits) / velocity_days, 3),
+            'code_churn_ratio': round(lines_added / max(lines_deleted, 1), 2),
+            'commit_types': commit_types,
+            'activity_pattern': activity_pattern,
+            'file_expertise': file_expertise
+        }
+
+    def test_detailed_metrics_match_per_row_values(self):
+        """Test counts, type, hour and file type breakdowns and totals per contributor and window"""
+        for days in (0, 30, 90, 365):
+            for contributor_id in (1, 2, 3):
+                with self.subTest(days=days, contributor_id=contributor_id):
+                    self.assertEqual(
+                        self.calculator.get_contributor_detailed_metrics(contributor_id, 1, days),
+                        self._per_row_metrics(contributor_id, days)
+                    )
+
+    def test_bulk_detailed_metrics_match_single_contributor(self):
+        """Test that the grouped queries for several contributors give each one's own metrics"""
+        metrics = self.calculator._detailed_metrics_by_contributor([1, 2, 3, 4], 1, 30)
+
+        for contributor_id in (1, 2, 3):
+            self.assertEqual(metrics[contributor_id], self._per_row_metrics(contributor_id, 30))
+        self.assertEqual(metrics[4]['total_commits'], 0)
+
+    def test_test_file_breakdown_matches_per_row_counts(self):
+        """Test the per-contributor test and production file counts"""
+        for days in (0, 30):
+            for contributor_id in (1, 2, 3):
+                _, files, _, _ = self._window_rows(contributor_id, days)
+                test_files = sum(1 for _, path in files if path.is_test_file)
+                with self.subTest(days=days, contributor_id=contributor_id):
+                    self.assertEqual(self.calculator.get_test_coverage_impact(1, days, contributor_id), {
+                        'test_files': test_files,
+                        'production_files': len(files) - test_files,
+                        'test_ratio': test_files / len(files)
+                    })
+
+
+class TestDashboard(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.engine, self.Session = create_database(os.path.join(self.temp_dir, 'dashboard.db'))
+        self.session = self.Session()
+        self.session.add_all([
+            Contributor(id=1, name='Alice', email='alice@example.com', team='Backend'),
+            Contributor(id=2, name='Bob', email='bob@example.com', team='QA')
+        ])
+        self.session.commit()
+
+        now = datetime.utcnow()
+        batch = [({
+            'sha': f'{index:040d}',
+            'repository_id': 1,
+            'contributor_id': 1 + index % 2,
+            'message': 'feat: change',
+            'commit_date': now - timedelta(hours=index * 19),
+            'files_changed': 2,
+            'lines_added': index % 17,
+            'lines_deleted': index % 6,
+            'commit_type': ['feature', 'bugfix', 'test'][index % 3]
+        }, [('src/app.py', '.py', index % 17, index % 6, False),
+            ('tests/test_app.py', '.py', 0, 0, index % 4 == 0)]) for index in range(400)]
+        GitAnalyzer(self.session)._process_commit_batch(batch)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        shutil.rmtree(self.temp_dir)
+
+    def _expected(self, calculator, days):
+        return {
+            'period_days': days,
+            'velocity': calculator.get_commit_velocity(1, days),
+            'churn': calculator.get_code_churn(1, days),
+            'test_coverage': calculator.get_test_coverage_impact(1, days),
+            'contributors': calculator.get_contributor_stats(1, days),
+            'daily_activity': calculator.get_daily_activity(1, days),
+            'commit_types': calculator.get_commit_type_distribution(1, days)
+        }
+
+    def test_dashboard_matches_individual_metrics(self):
+        """Test that every dashboard panel equals the result of its own metric method"""
+        calculator = MetricsCalculator(self.session)
+        for days in (0, 30, 365):
+            with self.subTest(days=days):
+                self.assertEqual(calculator.get_dashboard(1, days), self._expected(calculator, days))
+
+    def test_dashboard_with_session_factory_runs_parts_on_own_sessions(self):
+        """Test that concurrent dashboard parts give the same result and return their connections"""
+        factory = scoped_session(self.Session)
+        calculator = MetricsCalculator(session_factory=factory)
+        expected = self._expected(MetricsCalculator(self.session), 30)
+        self.session.close()
+
+        self.assertEqual(calculator.get_dashboard(1, 30), expected)
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+    def test_dashboard_selected_panels(self):
+        """Test that only the requested panels are computed and returned"""
+        calculator = MetricsCalculator(self.session)
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(self.engine, 'before_cursor_execute', listener)
+        self.addCleanup(event.remove, self.engine, 'before_cursor_execute', listener)
+
+        dashboard = calculator.get_dashboard(1, 30, panels=['churn', 'velocity'])
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(set(dashboard), {'period_days', 'velocity', 'churn'})
+        self.assertEqual(dashboard['churn'], calculator.get_code_churn(1, 30))
+
+    def test_activity_granularity_buckets_in_sql(self):
+        """Test that week and month buckets sum the daily series and are zero-filled"""
+        calculator = MetricsCalculator(self.session)
+        daily = calculator.get_daily_activity(1, 365)
+        total = sum(day['commit_count'] for day in daily)
+
+        for granularity in ('week', 'month'):
+            with self.subTest(granularity=granularity):
+                series = calculator.get_daily_activity(1, 365, granularity=granularity)
+                self.assertEqual(sum(point['commit_count'] for point in series), total)
+                dates = [datetime.strptime(point['date'], '%Y-%m-%d').date() for point in series]
+                self.assertEqual(dates, sorted(set(dates)))
+                if granularity == 'week':
+                    self.assertEqual({day.weekday() for day in dates}, {0})
+                    self.assertTrue(all((later - earlier).days == 7 for earlier, later in zip(dates, dates[1:])))
+                else:
+                    self.assertEqual({day.day for day in dates}, {1})
+                    self.assertEqual(len(dates), datetime.utcnow().month)
+
+        timeline = calculator.get_contributor_activity_timeline(2, 1, 0, granularity='month')
+        self.assertEqual(
+            sum(point['commits'] for point in timeline),
+            sum(point['commits'] for point in calculator.get_contributor_activity_timeline(2, 1, 0))
+        )
+
+    def test_activity_is_zero_filled(self):
+        """Test that days without commits are present with zero counts"""
+        calculator = MetricsCalculator(self.session)
+        timeline = calculator.get_contributor_activity_timeline(1, 1, 30)
+
+        self.assertEqual(len(timeline), 31)
+        self.assertIn({'commits': 0, 'lines_added': 0, 'lines_deleted': 0, 'files_changed': 0},
+                      [{key: value for key, value in day.items() if key != 'date'} for day in timeline])
+        self.assertEqual(len(calculator.get_daily_activity(2, 30)), 31)
+        self.assertEqual(calculator.get_daily_activity(2, 0), [])
+
+    def test_auto_granularity_and_max_points(self):
+        """Test that auto picks a coarser granularity for long spans and max_points caps the series"""
+        calculator = MetricsCalculator(self.session)
+
+        self.assertEqual(len(calculator.get_daily_activity(1, 30, granularity='auto')), 31)
+        lifetime = calculator.get_daily_activity(1, 0, granularity='auto', max_points=60)
+        self.assertLessEqual(len(lifetime), 60)
+        self.assertEqual(lifetime, calculator.get_daily_activity(1, 0, granularity='week'))
+
+        sampled = calculator.get_daily_activity(1, 0, max_points=25)
+        daily = calculator.get_daily_activity(1, 0)
+        self.assertEqual(len(sampled), 25)
+        self.assertEqual((sampled[0], sampled[-1]), (daily[0], daily[-1]))
+
+    def test_dashboard_activity_matches_daily_activity(self):
+        """Test that the dashboard buckets daily activity like get_daily_activity"""
+        calculator = MetricsCalculator(self.session)
+        for granularity, max_points in (('week', None), ('month', None), ('auto', 40), ('day', 50)):
+            with self.subTest(granularity=granularity, max_points=max_points):
+                dashboard = calculator.get_dashboard(1, 0, ['daily_activity'], granularity, max_points)
+                self.assertEqual(
+                    dashboard['daily_activity'],
+                    calculator.get_daily_activity(1, 0, granularity=granularity, max_points=max_points)
+                )
+
+    def test_invalid_series_arguments(self):
+        """Test that unknown granularities and tiny point budgets are rejected"""
+        calculator = MetricsCalculator(self.session)
+
+        with self.assertRaises(ValueError):
+            calculator.get_daily_activity(1, 30, granularity='year')
+        with self.assertRaises(ValueError):
+            calculator.get_contributor_activity_timeline(1, 1, 30, max_points=2)
+
+    def test_dashboard_empty_repository(self):
+        """Test that a repository without commits gets zeroed panels"""
+        dashboard = MetricsCalculator(self.session).get_dashboard(2, 0)
+
+        self.assertEqual(set(dashboard) - {'period_days'}, set(DASHBOARD_PANELS))
+        self.assertEqual(dashboard['velocity'], 0)
+        self.assertEqual(dashboard['test_coverage'], {'test_files': 0, 'production_files': 0, 'test_ratio': 0})
+        self.assertEqual(dashboard['contributors'], [])
+        self.assertEqual(dashboard['daily_activity'], [])
+
+
 if __name__ == '__main__':
     unittest.main()
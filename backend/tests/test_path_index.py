@@ -0,0 +1,86 @@
+import unittest
+from datetime import datetime
+from sqlalchemy import event
+from git_analyzer import GitAnalyzer
+from models import create_database, Repository, Contributor, CommitFile, FilePath, DailyRollup
+from path_index import PathIndex, intern_paths
+
+
+class TestPathIndex(unittest.TestCase):
+    def setUp(self):
+        self.engine, Session = create_database(':memory:')
+        self.session = Session()
+        self.session.add_all([
+            Repository(id=1, name='repo', path='/tmp/repo'),
+            Repository(id=2, name='other', path='/tmp/other'),
+            Contributor(id=1, name='Alice', email='alice@example.com')
+        ])
+        self.session.commit()
+        self.sequence = 0
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def _row(self, repository_id, files):
+        self.sequence += 1
+        return ({
+            'sha': f'{self.sequence:040d}',
+            'repository_id': repository_id,
+            'contributor_id': 1,
+            'message': 'feat: change',
+            'commit_date': datetime(2024, 1, 1),
+            'files_changed': len(files),
+            'lines_added': 1,
+            'lines_deleted': 0,
+            'commit_type': 'feature'
+        }, [(path, '.py', 1, 0, is_test_file) for path, is_test_file in files])
+
+    def test_paths_are_stored_once_per_repository(self):
+        """Test that repeated paths share one paths row per repository, with their directory"""
+        analyzer = GitAnalyzer(self.session)
+        analyzer._process_commit_batch([
+            self._row(1, [('src/app.py', False), ('tests/test_app.py', True)]),
+            self._row(1, [('src/app.py', False)]),
+            self._row(2, [('src/app.py', False)])
+        ])
+        analyzer._process_commit_batch([self._row(1, [('src/app.py', False), ('setup.py', False)])])
+
+        paths = sorted(
+            (row.repository_id, row.path, row.directory, row.is_test_file) for row in self.session.query(FilePath)
+        )
+        self.assertEqual(paths, [
+            (1, 'setup.py', '', False), (1, 'src/app.py', 'src', False),
+            (1, 'tests/test_app.py', 'tests', True), (2, 'src/app.py', 'src', False)
+        ])
+        self.assertEqual(self.session.query(CommitFile).count(), 6)
+
+    def test_stored_classification_wins(self):
+        """Test that known paths keep their stored test flag, in the rollups too, until reclassified"""
+        intern_paths(self.session, 1, [('spec/app_spec.rb', '.rb', True)])
+        self.session.commit()
+
+        GitAnalyzer(self.session)._process_commit_batch([self._row(1, [('spec/app_spec.rb', False)])])
+
+        self.assertTrue(self.session.query(FilePath.is_test_file).filter_by(path='spec/app_spec.rb').scalar())
+        rollup = self.session.query(DailyRollup).one()
+        self.assertEqual((rollup.test_files, rollup.production_files), (1, 0))
+
+    def test_known_paths_are_served_from_memory(self):
+        """Test that a path resolved once is not looked up again"""
+        index = PathIndex()
+        first = dict(index.resolve(self.session, 1, [('a.py', '.py', False), ('b.py', '.py', False)]))
+        self.session.commit()
+
+        statements = []
+        capture = lambda connection, cursor, statement, *args: statements.append(statement)
+        event.listen(self.engine, 'before_cursor_execute', capture)
+        again = index.resolve(self.session, 1, [('a.py', '.py', False), ('b.py', '.py', False)])
+        event.remove(self.engine, 'before_cursor_execute', capture)
+
+        self.assertEqual(again, first)
+        self.assertEqual(statements, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
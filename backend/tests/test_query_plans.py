@@ -0,0 +1,281 @@
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from git_analyzer import GitAnalyzer
+from metrics_calculator import MetricsCalculator
+from models import create_database, migrate_database, commit_day_number, DailyRollup, Repository, Contributor, Commit, CommitFile, FilePath, AnalysisJob
+from rollups import rebuild_daily_rollups
+
+
+def _full_scans(connection, statement, parameters):
+    """Return the EXPLAIN QUERY PLAN lines that read a whole table"""
+    plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    return [row[3] for row in plan if row[3].startswith('SCAN ') and row[3] != 'SCAN CONSTANT ROW']
+
+
+class TestMetricQueryPlans(unittest.TestCase):
+    """Every MetricsCalculator query must be answered through an index"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine, Session = create_database(':memory:')
+        cls.session = Session()
+        cls.session.add_all([
+            Repository(id=1, name='repo', path='/tmp/repo'),
+            Contributor(id=1, name='Alice', email='alice@example.com', team='Backend'),
+            Contributor(id=2, name='Bob', email='bob@example.com', team='QA')
+        ])
+        cls.session.commit()
+
+        now = datetime.utcnow()
+        batch = []
+        for index in range(40):
+            batch.append(({
+                'sha': f'{index:040d}',
+                'repository_id': 1,
+                'contributor_id': 1 + index % 2,
+                'message': 'feat: change',
+                'commit_date': now - timedelta(days=index * 3),
+                'files_changed': 2,
+                'lines_added': 10,
+                'lines_deleted': 2,
+                'commit_type': 'feature'
+            }, [('src/app.py', '.py', 5, 1, False), ('tests/test_app.py', '.py', 5, 1, True)]))
+        GitAnalyzer(cls.session)._process_commit_batch(batch)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.close()
+        cls.engine.dispose()
+
+    def setUp(self):
+        self.calculator = MetricsCalculator(self.session)
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._capture)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._capture)
+
+    def _capture(self, connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            self.statements.append((statement, parameters))
+
+    def _assert_no_scans(self, method, *args, **kwargs):
+        for days in (0, 30, 365):
+            self.statements = []
+            method(*args, days=days, **kwargs)
+            self.assertTrue(self.statements, f'{method.__name__} ran no queries')
+
+            with self.engine.connect() as connection:
+                for statement, parameters in self.statements:
+                    with self.subTest(method=method.__name__, days=days, statement=statement):
+                        self.assertEqual(_full_scans(connection, statement, parameters), [])
+
+    def test_velocity(self):
+        """Test that velocity queries use indexes"""
+        self._assert_no_scans(self.calculator.get_commit_velocity, 1)
+        self._assert_no_scans(self.calculator.get_commit_velocity, 1, contributor_id=1)
+
+    def test_code_churn(self):
+        """Test that code churn queries use indexes"""
+        self._assert_no_scans(self.calculator.get_code_churn, 1)
+        self._assert_no_scans(self.calculator.get_code_churn, 1, contributor_id=1)
+
+    def test_test_coverage_impact(self):
+        """Test that test coverage impact queries use indexes"""
+        self._assert_no_scans(self.calculator.get_test_coverage_impact, 1)
+        self._assert_no_scans(self.calculator.get_test_coverage_impact, 1, contributor_id=1)
+
+    def test_contributor_stats(self):
+        """Test that contributor stats queries use indexes"""
+        self._assert_no_scans(self.calculator.get_contributor_stats, 1)
+
+    def test_commit_type_distribution(self):
+        """Test that commit type distribution queries use indexes"""
+        self._assert_no_scans(self.calculator.get_commit_type_distribution, 1)
+
+    def test_daily_activity(self):
+        """Test that daily activity queries use indexes"""
+        self._assert_no_scans(self.calculator.get_daily_activity, 1)
+        self._assert_no_scans(self.calculator.get_daily_activity, 1, granularity='auto')
+
+    def test_team_comparison(self):
+        """Test that team comparison queries use indexes"""
+        self._assert_no_scans(self.calculator.get_team_comparison, 1)
+
+    def test_contributor_detailed_metrics(self):
+        """Test that detailed contributor metrics queries use indexes"""
+        self._assert_no_scans(self.calculator.get_contributor_detailed_metrics, 1, 1)
+
+    def test_contributor_activity_timeline(self):
+        """Test that contributor activity timeline queries use indexes"""
+        self._assert_no_scans(self.calculator.get_contributor_activity_timeline, 1, 1)
+        self._assert_no_scans(self.calculator.get_contributor_activity_timeline, 1, 1, granularity='week')
+
+    def test_compare_contributors(self):
+        """Test that contributor comparison queries use indexes"""
+        self._assert_no_scans(self.calculator.compare_contributors, [1, 2], 1)
+
+    def test_contributors_bulk_metrics(self):
+        """Test that bulk contributor metrics queries use indexes"""
+        self._assert_no_scans(self.calculator.get_contributors_bulk_metrics, [1, 2], 1)
+
+
+class TestRollupQueryPlans(unittest.TestCase):
+    def test_rebuild_groups_in_day_index_order(self):
+        """Test that rebuilding rollups reads commits through the day index without sorting"""
+        engine, Session = create_database(':memory:')
+        session = Session()
+        statements = []
+        capture = lambda connection, cursor, statement, parameters, context, executemany: (
+            statements.append((statement, parameters)) if statement.startswith('INSERT') else None
+        )
+        event.listen(engine, 'before_cursor_execute', capture)
+        rebuild_daily_rollups(session, 1)
+        event.remove(engine, 'before_cursor_execute', capture)
+
+        with engine.connect() as connection:
+            statement, parameters = statements[0]
+            plan = [row[3] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+        self.assertIn('SEARCH commits USING INDEX ix_commits_repository_day (repository_id=?)', plan)
+        self.assertNotIn('USE TEMP B-TREE FOR GROUP BY', plan)
+        session.close()
+        engine.dispose()
+
+
+class TestMigrateDatabase(unittest.TestCase):
+    def test_adds_missing_indexes_to_existing_database(self):
+        """Test that a database created before the indexes existed gets them"""
+        engine, _ = create_database(':memory:')
+        with engine.begin() as connection:
+            connection.exec_driver_sql('DROP INDEX ix_commits_repository_date')
+            connection.exec_driver_sql('DROP INDEX ix_commit_files_commit')
+
+        created = migrate_database(engine)
+
+        self.assertEqual(sorted(created), ['ix_commit_files_commit', 'ix_commits_repository_date'])
+        self.assertEqual(migrate_database(engine), [])
+        engine.dispose()
+
+    def test_keeps_oldest_active_job_per_repository(self):
+        """Test that duplicate active jobs are cancelled before the one-active-job index is built"""
+        engine, Session = create_database(':memory:')
+        with engine.begin() as connection:
+            connection.exec_driver_sql('DROP INDEX ux_analysis_jobs_active_repository')
+        session = Session()
+        for repository_id, status in ((1, 'running'), (1, 'queued'), (2, 'queued'), (1, 'completed')):
+            session.add(AnalysisJob(repository_id=repository_id, status=status))
+        session.commit()
+
+        self.assertEqual(migrate_database(engine), ['ux_analysis_jobs_active_repository'])
+
+        session.expire_all()
+        statuses = [job.status for job in session.query(AnalysisJob).order_by(AnalysisJob.id)]
+        self.assertEqual(statuses, ['running', 'cancelled', 'queued', 'completed'])
+        session.close()
+        engine.dispose()
+
+    def test_converts_local_commit_dates_to_utc(self):
+        """Test that commit dates stored in server local time move to UTC once, with their day and hour"""
+        previous_tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            engine, Session = create_database(':memory:')
+            session = Session()
+            session.add(Commit(sha='0' * 40, repository_id=1, contributor_id=1,
+                               commit_date=datetime(2024, 1, 1, 21, 30)))
+            session.add(DailyRollup(repository_id=1, contributor_id=1, day=datetime(2024, 1, 1).date()))
+            session.commit()
+            with engine.begin() as connection:
+                connection.exec_driver_sql('PRAGMA user_version = 0')
+
+            migrate_database(engine)
+            migrate_database(engine)
+
+            session.expire_all()
+            commit = session.query(Commit).one()
+            self.assertEqual(commit.commit_date, datetime(2024, 1, 2, 2, 30))
+            self.assertEqual((commit.commit_day, commit.commit_hour), (commit_day_number(commit.commit_date), 2))
+            self.assertEqual(session.query(DailyRollup).count(), 0)
+            session.close()
+            engine.dispose()
+        finally:
+            if previous_tz is None:
+                os.environ.pop('TZ')
+            else:
+                os.environ['TZ'] = previous_tz
+            time.tzset()
+
+    def test_adds_and_backfills_day_columns(self):
+        """Test that commits stored before the day/hour columns existed get them filled"""
+        engine, Session = create_database(':memory:')
+        session = Session()
+        commit_dates = [datetime(2023, 12, 31, 23, 59, 59), datetime(2024, 2, 29, 0, 0, 1), datetime(1999, 7, 4, 13, 30)]
+        for index, commit_date in enumerate(commit_dates):
+            session.add(Commit(sha=f'{index:040d}', repository_id=1, contributor_id=1, commit_date=commit_date))
+        session.commit()
+        with engine.begin() as connection:
+            connection.exec_driver_sql('DROP INDEX ix_commits_repository_day')
+            connection.exec_driver_sql('ALTER TABLE commits DROP COLUMN commit_day')
+            connection.exec_driver_sql('ALTER TABLE commits DROP COLUMN commit_hour')
+
+        added = migrate_database(engine)
+
+        self.assertEqual(added, ['commits.commit_day', 'commits.commit_hour', 'ix_commits_repository_day'])
+        session.expire_all()
+        for commit in session.query(Commit).order_by(Commit.id):
+            self.assertEqual(commit.commit_day, commit_day_number(commit.commit_date))
+            self.assertEqual(commit.commit_hour, commit.commit_date.hour)
+        session.close()
+        engine.dispose()
+
+    def test_moves_file_paths_to_paths_table(self):
+        """Test that commit_files stored with a path per row are rebuilt onto interned paths"""
+        engine, Session = create_database(':memory:')
+        session = Session()
+        for index, repository_id in enumerate((1, 1, 2)):
+            session.add(Commit(id=index + 1, sha=f'{index:040d}', repository_id=repository_id, contributor_id=1,
+                               commit_date=datetime(2024, 1, 1)))
+        session.commit()
+        legacy_files = [
+            (1, 'src/app.py', '.py', 0), (1, 'tests/test_app.py', '.py', 1),
+            (2, 'src/app.py', '.py', 0), (3, 'src/app.py', '.py', 0), (3, 'README.md', '.md', 0)
+        ]
+        with engine.begin() as connection:
+            connection.exec_driver_sql('DROP TABLE commit_files')
+            connection.exec_driver_sql(
+                'CREATE TABLE commit_files (id INTEGER PRIMARY KEY, commit_id INTEGER NOT NULL, '
+                'file_path VARCHAR(500) NOT NULL, file_type VARCHAR(50), lines_added INTEGER, '
+                'lines_deleted INTEGER, is_test_file BOOLEAN, created_at DATETIME)'
+            )
+            connection.exec_driver_sql('CREATE INDEX ix_commit_files_commit ON commit_files (commit_id)')
+            for commit_id, file_path, file_type, is_test_file in legacy_files:
+                connection.exec_driver_sql(
+                    'INSERT INTO commit_files (commit_id, file_path, file_type, lines_added, lines_deleted, is_test_file) '
+                    'VALUES (?, ?, ?, 3, 1, ?)', (commit_id, file_path, file_type, is_test_file)
+                )
+
+        migrate_database(engine)
+
+        paths = sorted(
+            (row.repository_id, row.path, row.directory, row.file_type, row.is_test_file)
+            for row in session.query(FilePath)
+        )
+        self.assertEqual(paths, [
+            (1, 'src/app.py', 'src', '.py', False), (1, 'tests/test_app.py', 'tests', '.py', True),
+            (2, 'README.md', '', '.md', False), (2, 'src/app.py', 'src', '.py', False)
+        ])
+        files = session.query(CommitFile.commit_id, FilePath.path, CommitFile.lines_added).join(
+            FilePath, FilePath.id == CommitFile.path_id
+        ).order_by(CommitFile.id).all()
+        self.assertEqual(files, [(commit_id, path, 3) for commit_id, path, _, _ in legacy_files])
+        self.assertEqual(migrate_database(engine), [])
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
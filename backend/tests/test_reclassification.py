@@ -0,0 +1,171 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from git_analyzer import GitAnalyzer
+from models import create_database, Repository, Contributor, Commit, CommitFile, FilePath, DailyRollup, ClassificationRuleSet
+from classifiers import Classifier, DEFAULT_RULES, load_rules, parse_rules, classifier_for
+from reclassification import reclassify_repository
+from rollups import rebuild_daily_rollups
+
+CUSTOM_RULES = {
+    'commit_types': [
+        {'type': 'chore', 'keywords': ['Bump', 'release']},
+        {'type': 'bugfix', 'keywords': ['fix']}
+    ],
+    'default_commit_type': 'feature',
+    'test_path_patterns': [r'^spec/', r'_spec\.rb$']
+}
+
+
+class TestReclassification(unittest.TestCase):
+    def setUp(self):
+        self.engine, Session = create_database(':memory:')
+        self.session = Session()
+        self.session.add_all([
+            Repository(id=1, name='repo', path='/tmp/repo'),
+            Repository(id=2, name='other', path='/tmp/other'),
+            Contributor(id=1, name='Alice', email='alice@example.com')
+        ])
+        self.session.commit()
+        self.analyzer = GitAnalyzer(self.session)
+        self.now = datetime.utcnow().replace(hour=12)
+        self.sequence = 0
+
+        # Interleaved ids, so every chunk also holds commits of the other repository
+        messages = ['Bump version', 'fix crash', 'Add spec runner', 'docs: release notes', 'random', 'fix tests']
+        paths = [['spec/models/user_spec.rb'], ['src/app.py', 'tests/test_app.py'], ['spec/helper.rb'],
+                 ['README.md'], ['lib/thing_spec.rb', 'lib/thing.rb'], ['tests/test_b.py']]
+        rows = []
+        for index, (message, files) in enumerate(zip(messages, paths)):
+            for repository_id in (1, 2):
+                rows.append(self._row(repository_id, message, files, self.now - timedelta(days=index)))
+        self.analyzer._process_commit_batch(rows)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def _row(self, repository_id, message, files, commit_date):
+        self.sequence += 1
+        classifier = classifier_for(DEFAULT_RULES)
+        file_stats = []
+        for path in files:
+            file_type, is_test_file = classifier.classify_path(path)
+            file_stats.append((path, file_type, 5, 1, is_test_file))
+        return ({
+            'sha': f'{self.sequence:040d}',
+            'repository_id': repository_id,
+            'contributor_id': 1,
+            'message': message,
+            'commit_date': commit_date,
+            'files_changed': len(files),
+            'lines_added': 10,
+            'lines_deleted': 2,
+            'commit_type': classifier.classify_message(message)
+        }, file_stats)
+
+    def _store_rules(self, repository_id, data):
+        rules, error = parse_rules(data)
+        self.assertIsNone(error)
+        self.session.add(ClassificationRuleSet(
+            repository_id=repository_id,
+            commit_types=json.dumps(data['commit_types']),
+            default_commit_type=rules.default_commit_type,
+            test_path_patterns=json.dumps(data['test_path_patterns'])
+        ))
+        self.session.commit()
+        return rules
+
+    def _classes(self, repository_id):
+        commits = sorted(
+            (commit.message, commit.commit_type)
+            for commit in self.session.query(Commit).filter_by(repository_id=repository_id)
+        )
+        files = sorted(
+            (path, bool(is_test_file))
+            for path, is_test_file in self.session.query(FilePath.path, FilePath.is_test_file).join(
+                CommitFile, CommitFile.path_id == FilePath.id
+            ).join(
+                Commit, Commit.id == CommitFile.commit_id
+            ).filter(Commit.repository_id == repository_id)
+        )
+        return commits, files
+
+    def _rollups(self, repository_id):
+        return sorted(
+            (row.day, row.test_files, row.production_files)
+            for row in self.session.query(DailyRollup).filter_by(repository_id=repository_id)
+        )
+
+    def test_reclassify_applies_stored_rules(self):
+        """Test that stored messages and paths are reclassified under the repository's rules"""
+        rules = self._store_rules(1, CUSTOM_RULES)
+        self.assertEqual(load_rules(self.session, 1), rules)
+        self.assertEqual(load_rules(self.session, 2), DEFAULT_RULES)
+        expected = Classifier(rules)
+
+        result = reclassify_repository(self.session, 1, classifier_for(rules), chunk_size=3)
+
+        commits, files = self._classes(1)
+        self.assertEqual(commits, sorted((message, expected.classify_message(message)) for message, _ in commits))
+        self.assertEqual(files, sorted((path, expected.is_test_path(path)) for path, _ in files))
+        self.assertIn(('Bump version', 'chore'), commits)
+        self.assertIn(('docs: release notes', 'chore'), commits)
+        self.assertIn(('random', 'feature'), commits)
+        self.assertEqual(result['commits_total'], 6)
+        self.assertEqual(result['commits_scanned'], 6)
+        self.assertEqual(result['commits_reclassified'], 5)
+        self.assertEqual(result['paths_reclassified'], 5)
+        self.assertFalse(result['cancelled'])
+
+    def test_reclassify_leaves_other_repositories_alone(self):
+        """Test that commits of other repositories in the same id ranges keep their classification"""
+        before = self._classes(2)
+        rollups_before = self._rollups(2)
+        rules = self._store_rules(1, CUSTOM_RULES)
+
+        reclassify_repository(self.session, 1, classifier_for(rules), chunk_size=2)
+
+        self.assertEqual(self._classes(2), before)
+        self.assertEqual(self._rollups(2), rollups_before)
+
+    def test_rollups_follow_test_file_flags(self):
+        """Test that the daily rollups are rebuilt from the new test file flags"""
+        rules = self._store_rules(1, CUSTOM_RULES)
+        reclassify_repository(self.session, 1, classifier_for(rules), chunk_size=4)
+        refreshed = self._rollups(1)
+
+        rebuild_daily_rollups(self.session, 1)
+        self.session.commit()
+        self.assertEqual(refreshed, self._rollups(1))
+        self.assertEqual(sum(test_files for _, test_files, _ in refreshed), 3)
+
+    def test_second_run_changes_nothing(self):
+        """Test that only rows whose classification differs are written"""
+        rules = self._store_rules(1, CUSTOM_RULES)
+        reclassify_repository(self.session, 1, classifier_for(rules))
+
+        result = reclassify_repository(self.session, 1, classifier_for(rules))
+        self.assertEqual((result['commits_reclassified'], result['paths_reclassified']), (0, 0))
+
+    def test_cancel_stops_after_chunk(self):
+        """Test that a cancelled run stops between chunks with its aggregates refreshed"""
+        rules = self._store_rules(1, CUSTOM_RULES)
+        progress = []
+
+        result = reclassify_repository(
+            self.session, 1, classifier_for(rules), chunk_size=4,
+            on_chunk=lambda scanned, total: progress.append((scanned, total)),
+            should_cancel=lambda: True
+        )
+
+        self.assertTrue(result['cancelled'])
+        self.assertEqual(progress, [(2, 6)])
+        refreshed = self._rollups(1)
+        rebuild_daily_rollups(self.session, 1)
+        self.session.commit()
+        self.assertEqual(refreshed, self._rollups(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+from datetime import datetime, timedelta
+from git_analyzer import GitAnalyzer
+from metrics_calculator import MetricsCalculator
+from models import create_database, commit_day_number, Repository, Contributor, Commit, DailyRollup
+from rollups import rebuild_daily_rollups, backfill_daily_rollups
+
+
+class TestDailyRollups(unittest.TestCase):
+    def setUp(self):
+        self.engine, Session = create_database(':memory:')
+        self.session = Session()
+        self.session.add_all([
+            Repository(id=1, name='repo', path='/tmp/repo'),
+            Contributor(id=1, name='Alice', email='alice@example.com', team='Backend'),
+            Contributor(id=2, name='Bob', email='bob@example.com', team='QA')
+        ])
+        self.session.commit()
+        self.analyzer = GitAnalyzer(self.session)
+        self.calculator = MetricsCalculator(self.session)
+        self.now = datetime.utcnow().replace(hour=12)
+        self.sequence = 0
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def _row(self, contributor_id, commit_date, files, sha=None):
+        self.sequence += 1
+        return ({
+            'sha': sha or f'{self.sequence:040d}',
+            'repository_id': 1,
+            'contributor_id': contributor_id,
+            'message': 'feat: change',
+            'commit_date': commit_date,
+            'files_changed': len(files),
+            'lines_added': 10 * len(files),
+            'lines_deleted': 2 * len(files),
+            'commit_type': 'feature'
+        }, [(path, '.py', 10, 2, path.startswith('tests/')) for path in files])
+
+    def _ingest_sample(self):
+        self.analyzer._process_commit_batch([
+            self._row(1, self.now - timedelta(days=40), ['src/a.py']),
+            self._row(1, self.now - timedelta(days=2), ['src/a.py', 'tests/test_a.py']),
+            self._row(1, self.now - timedelta(days=2, hours=3), ['src/b.py']),
+            self._row(2, self.now - timedelta(days=1), ['tests/test_b.py'])
+        ])
+
+    def _rollup_rows(self):
+        return sorted(
+            (row.contributor_id, row.day, row.commit_count, row.lines_added, row.lines_deleted,
+             row.files_changed, row.test_files, row.production_files)
+            for row in self.session.query(DailyRollup).all()
+        )
+
+    def test_ingest_groups_commits_per_contributor_day(self):
+        """Test that commits of one contributor on one day share a rollup row"""
+        self._ingest_sample()
+
+        rows = self._rollup_rows()
+        self.assertEqual(len(rows), 3)
+        two_days_ago = (self.now - timedelta(days=2)).date()
+        self.assertIn((1, two_days_ago, 2, 30, 6, 3, 1, 2), rows)
+
+    def test_later_batches_add_to_existing_rows(self):
+        """Test that a second batch on the same day increments the row"""
+        self._ingest_sample()
+        self.analyzer._process_commit_batch([self._row(2, self.now - timedelta(days=1), ['src/c.py'])])
+
+        yesterday = self.session.query(DailyRollup).filter_by(contributor_id=2).one()
+        self.assertEqual(yesterday.commit_count, 2)
+        self.assertEqual(yesterday.test_files, 1)
+        self.assertEqual(yesterday.production_files, 1)
+
+    def test_skipped_commit_is_not_counted(self):
+        """Test that a commit rejected by the database never reaches the rollup"""
+        self._ingest_sample()
+        duplicate = self._row(1, self.now, ['src/a.py'], sha=f'{1:040d}')
+        self.analyzer._process_commit_batch([duplicate, self._row(1, self.now, ['src/d.py'])])
+
+        today = self.session.query(DailyRollup).filter_by(day=self.now.date()).one()
+        self.assertEqual(today.commit_count, 1)
+
+    def test_rebuild_matches_incremental_rollup(self):
+        """Test that rebuilding from commits reproduces the ingest-time rollup"""
+        self._ingest_sample()
+        incremental = self._rollup_rows()
+
+        rebuild_daily_rollups(self.session, 1)
+        self.session.expire_all()
+        self.assertEqual(self._rollup_rows(), incremental)
+
+    def test_backfill_only_repositories_without_rollups(self):
+        """Test that backfill builds missing rollups and leaves existing ones alone"""
+        self._ingest_sample()
+        expected = self._rollup_rows()
+        self.session.query(DailyRollup).delete()
+        self.session.commit()
+
+        self.assertEqual(backfill_daily_rollups(self.session), 1)
+        self.assertEqual(self._rollup_rows(), expected)
+        self.assertEqual(backfill_daily_rollups(self.session), 0)
+
+    def test_ingested_commits_store_day_and_hour(self):
+        """Test that stored day and hour columns are derived from the commit date"""
+        self._ingest_sample()
+
+        for commit in self.session.query(Commit).all():
+            self.assertEqual(commit.commit_day, (commit.commit_date.date() - datetime(1970, 1, 1).date()).days)
+            self.assertEqual(commit.commit_day, commit_day_number(commit.commit_date))
+            self.assertEqual(commit.commit_hour, commit.commit_date.hour)
+
+    def test_metrics_read_from_rollup(self):
+        """Test metric methods against rollup rows"""
+        self._ingest_sample()
+
+        self.assertEqual(self.calculator.get_code_churn(1, days=0)['lines_added'], 50)
+        self.assertEqual(self.calculator.get_code_churn(1, days=30)['lines_added'], 40)
+        self.assertEqual(self.calculator.get_test_coverage_impact(1, days=0), {
+            'test_files': 2, 'production_files': 3, 'test_ratio': 0.4
+        })
+        self.assertAlmostEqual(self.calculator.get_commit_velocity(1, days=30, contributor_id=1), 2 / 30)
+
+        activity = self.calculator.get_daily_activity(1, days=30)
+        self.assertEqual([day['commit_count'] for day in activity if day['commit_count']], [2, 1])
+        self.assertEqual(len(activity), 31)  # zero-filled from midnight 30 days ago through today
+
+        stats = {stat['name']: stat for stat in self.calculator.get_contributor_stats(1, days=0)}
+        self.assertEqual(stats['Alice']['commit_count'], 3)
+        self.assertEqual(stats['Alice']['avg_files_per_commit'], 1.33)
+
+        teams = {team['team']: team for team in self.calculator.get_team_comparison(1, days=30)}
+        self.assertEqual(teams['Backend']['total_commits'], 2)
+        self.assertEqual(teams['QA']['team_size'], 1)
+
+        timeline = self.calculator.get_contributor_activity_timeline(1, 1, days=0)
+        self.assertEqual([day['commits'] for day in timeline if day['commits']], [1, 2])
+
+    def test_lifetime_velocity_runs_from_first_commit_time(self):
+        """Test that lifetime velocity divides by the full days since the first commit, not its rollup day"""
+        self._ingest_sample()
+        # self.now is noon today, so the first commit can be 39 or 40 whole days back
+        alice_days = (datetime.utcnow() - (self.now - timedelta(days=40))).days
+        bob_days = max((datetime.utcnow() - (self.now - timedelta(days=1))).days, 1)
+
+        self.assertAlmostEqual(self.calculator.get_commit_velocity(1, days=0), 4 / alice_days)
+        self.assertAlmostEqual(self.calculator.get_commit_velocity(1, days=0, contributor_id=1), 3 / alice_days)
+        stats = {stat['name']: stat for stat in self.calculator.get_contributor_stats(1, days=0)}
+        self.assertAlmostEqual(stats['Alice']['velocity'], 3 / alice_days)
+        self.assertAlmostEqual(stats['Bob']['velocity'], 1 / bob_days)
+        self.assertAlmostEqual(self.calculator.get_dashboard(1, days=0, panels=['velocity'])['velocity'], 4 / alice_days)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import unittest
+from datetime import datetime, date
+from unittest.mock import patch
+import numpy as np
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+import serialization
+from serialization import OrjsonProvider, create_json_provider
+
+
+@unittest.skipUnless(serialization.orjson, 'orjson is not installed')
+class TestOrjsonProvider(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.json = OrjsonProvider(self.app)
+        self.reference = DefaultJSONProvider(Flask(__name__))
+
+    def test_output_matches_default_provider(self):
+        """Test that orjson output decodes to the same value as Flask's default serializer"""
+        payload = {
+            'metrics': {4: {'total_commits': 3, 'commit_types': {'feature': 2, 'other': 1}}},
+            'timelines': {4: [{'date': '2024-01-02', 'commits': 3, 'lines_added': 0}]},
+            'velocity': 0.125,
+            'when': datetime(2024, 1, 2, 3, 4, 5),
+            'day': date(2024, 1, 2),
+            'missing': None
+        }
+
+        with self.app.app_context():
+            body = jsonify(payload).get_data()
+
+        self.assertEqual(json.loads(body), json.loads(self.reference.dumps(payload)))
+        self.assertEqual(json.loads(body)['when'], 'Tue, 02 Jan 2024 03:04:05 GMT')
+
+    def test_numpy_values(self):
+        """Test that numpy scalars and arrays serialize"""
+        self.assertEqual(
+            json.loads(self.app.json.dumps({'count': np.int64(3), 'values': np.array([1.5, 2.0])})),
+            {'count': 3, 'values': [1.5, 2.0]}
+        )
+
+    def test_loads_request_body(self):
+        """Test that request JSON is parsed with the provider"""
+        with self.app.test_request_context(json={'contributor_ids': [1, 2]}):
+            from flask import request
+            self.assertEqual(request.get_json(), {'contributor_ids': [1, 2]})
+
+
+class TestCreateJsonProvider(unittest.TestCase):
+    def test_json_setting_uses_default_provider(self):
+        """Test that the standard library serializer can be forced"""
+        provider = create_json_provider(Flask(__name__), 'json')
+        self.assertIs(type(provider), DefaultJSONProvider)
+
+    def test_falls_back_without_orjson(self):
+        """Test that auto falls back to the default provider when orjson is missing"""
+        with patch.object(serialization, 'orjson', None):
+            self.assertIs(type(create_json_provider(Flask(__name__), 'auto')), DefaultJSONProvider)
+            with self.assertRaises(ImportError):
+                create_json_provider(Flask(__name__), 'orjson')
+
+
+if __name__ == '__main__':
+    unittest.main()
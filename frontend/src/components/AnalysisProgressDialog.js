@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Dialog,
   DialogTitle,
@@ -12,6 +12,9 @@ import {
 } from '@mui/material';
 import { io } from 'socket.io-client';
 
+const API_URL = 'http://localhost:5000';
+const JOB_POLL_INTERVAL_MS = 2000;
+
 const AnalysisProgressDialog = ({ 
   open, 
   repositoryName, 
@@ -25,12 +28,47 @@ const AnalysisProgressDialog = ({
   const [error, setError] = useState(null);
   const [completed, setCompleted] = useState(false);
   const [socket, setSocket] = useState(null);
+  // Analysis runs as a background job; the id scopes socket events and status polling to it
+  const jobIdRef = useRef(null);
+  const finishedRef = useRef(false);
+
+  const finish = (success, count, message) => {
+    if (finishedRef.current) return;
+    finishedRef.current = true;
+    setCompleted(true);
+    if (success) {
+      setStage('Analysis completed successfully!');
+      setProgress(100);
+      setCommitsProcessed(count || 0);
+      setTimeout(() => {
+        onComplete(true, count || 0);
+      }, 1500);
+    } else {
+      setError(message || 'Analysis failed');
+    }
+  };
+
+  const applyJobStatus = (job) => {
+    if (job.status === 'completed') {
+      finish(true, job.commits_processed);
+    } else if (job.status === 'failed') {
+      finish(false, 0, job.error);
+    } else if (job.status === 'cancelled') {
+      finish(false, 0, 'Analysis cancelled');
+    } else {
+      setStage(job.status === 'queued' ? 'Waiting for a free analysis worker...' : 'Processing commits...');
+      setProgress((current) => Math.max(current, job.progress || 0));
+      setCommitsProcessed(job.commits_processed || 0);
+    }
+  };
 
   useEffect(() => {
     if (open && repositoryId) {
       // Initialize socket connection
-      const newSocket = io('http://localhost:5000');
+      const newSocket = io(API_URL);
       setSocket(newSocket);
+      jobIdRef.current = null;
+      finishedRef.current = false;
 
       // Reset state
       setProgress(0);
@@ -39,15 +77,15 @@ const AnalysisProgressDialog = ({
       setError(null);
       setCompleted(false);
 
-      // Set up socket listeners
+      // Set up socket listeners, other repositories' jobs share the socket
       newSocket.on('analysis_started', (data) => {
-        console.log('Analysis started:', data);
+        if (data.job_id !== jobIdRef.current) return;
         setStage('Starting repository analysis...');
-        setProgress(5);
+        setProgress((current) => Math.max(current, 5));
       });
 
       newSocket.on('analysis_progress', (data) => {
-        console.log('Analysis progress:', data);
+        if (data.repository_id !== repositoryId) return;
         setStage(data.stage || 'Processing commits...');
         setProgress(data.progress || 0);
         if (data.commits_processed !== undefined) {
@@ -56,30 +94,35 @@ const AnalysisProgressDialog = ({
       });
 
       newSocket.on('analysis_completed', (data) => {
-        console.log('Analysis completed:', data);
+        if (data.job_id !== jobIdRef.current) return;
         if (data.success) {
-          setStage('Analysis completed successfully!');
-          setProgress(100);
-          setCommitsProcessed(data.commits_processed || 0);
-          setCompleted(true);
-          setTimeout(() => {
-            onComplete(true, data.commits_processed || 0);
-          }, 1500);
+          finish(true, data.commits_processed);
         } else {
-          setError(data.error || 'Analysis failed');
-          setCompleted(true);
+          finish(false, 0, data.error);
         }
       });
 
       newSocket.on('connect_error', (error) => {
+        // Status polling below keeps the dialog up to date without the socket
         console.error('Socket connection error:', error);
-        setError('Failed to connect to server for progress updates');
       });
 
-      // Start the analysis
+      // Queue the analysis, then poll the job in case socket events are missed
       startAnalysis();
+      const poll = setInterval(async () => {
+        if (!jobIdRef.current || finishedRef.current) return;
+        try {
+          const response = await fetch(`${API_URL}/api/jobs/${jobIdRef.current}`);
+          if (response.ok) {
+            applyJobStatus(await response.json());
+          }
+        } catch (err) {
+          console.error('Failed to fetch analysis job status:', err);
+        }
+      }, JOB_POLL_INTERVAL_MS);
 
       return () => {
+        clearInterval(poll);
         newSocket.disconnect();
       };
     }
@@ -88,48 +131,28 @@ const AnalysisProgressDialog = ({
   const startAnalysis = async () => {
     try {
       setStage('Starting analysis...');
-      setProgress(10);
+      setProgress(2);
 
-      const response = await fetch(`http://localhost:5000/api/repositories/${repositoryId}/analyze`, {
+      const response = await fetch(`${API_URL}/api/repositories/${repositoryId}/jobs`, {
         method: 'POST'
       });
+      const data = await response.json();
 
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.error || 'Analysis failed');
+      if (response.status === 409 && data.job) {
+        // An analysis of this repository is already running, follow that one
+        jobIdRef.current = data.job.id;
+        applyJobStatus(data.job);
+        return;
       }
-
-      // If no socket events are received, simulate progress
-      setTimeout(() => {
-        if (progress < 50) {
-          setStage('Processing commits...');
-          setProgress(50);
-        }
-      }, 2000);
-
-      setTimeout(() => {
-        if (progress < 80 && !completed) {
-          setStage('Analyzing commit patterns...');
-          setProgress(80);
-        }
-      }, 4000);
-
-      // Handle response if socket events don't work
-      const result = await response.json();
-      if (!completed) {
-        setStage('Analysis completed successfully!');
-        setProgress(100);
-        setCommitsProcessed(result.commits_processed || 0);
-        setCompleted(true);
-        setTimeout(() => {
-          onComplete(true, result.commits_processed || 0);
-        }, 1500);
+      if (!response.ok) {
+        throw new Error(data.error || 'Analysis failed');
       }
 
+      jobIdRef.current = data.id;
+      applyJobStatus(data);
     } catch (err) {
       console.error('Analysis error:', err);
-      setError(err.message);
-      setCompleted(true);
+      finish(false, 0, err.message);
     }
   };
 
@@ -140,6 +163,18 @@ const AnalysisProgressDialog = ({
     onClose();
   };
 
+  const handleCancel = async () => {
+    if (jobIdRef.current) {
+      try {
+        // A running job stops after the batch it is writing, stored commits are kept
+        await fetch(`${API_URL}/api/jobs/${jobIdRef.current}/cancel`, { method: 'POST' });
+      } catch (err) {
+        console.error('Failed to cancel analysis job:', err);
+      }
+    }
+    handleClose();
+  };
+
   const handleComplete = () => {
     if (error) {
       onComplete(false, 0);
@@ -200,7 +235,7 @@ const AnalysisProgressDialog = ({
           <Box sx={{ mt: 2, p: 2, bgcolor: 'info.light', borderRadius: 1 }}>
             <Typography variant="body2" color="info.contrastText">
               <strong>Note:</strong> This process may take several minutes for large repositories. 
-              The analysis will now process all commits without any limit.
+              Cancelling stops it after the batch being written, commits stored so far are kept.
             </Typography>
           </Box>
         )}
@@ -212,7 +247,7 @@ const AnalysisProgressDialog = ({
             {error ? 'Close' : 'Done'}
           </Button>
         ) : (
-          <Button onClick={handleClose} disabled={!completed}>
+          <Button onClick={handleCancel}>
             Cancel
           </Button>
         )}
@@ -149,14 +149,12 @@ const formatActivityData = (data, granularity = 'daily') => {
   };
 };
 
+// timeRange is the days value of the range selector (0 = lifetime, 365 = year to date)
 const getActivityGranularity = (timeRange) => {
   switch (timeRange) {
-    case '7d':
-    case '30d':
-      return 'daily';
-    case '3m':
-    case 'ytd':
-    case 'all':
+    case 365:
+    case 730:
+    case 0:
       return 'monthly';
     default:
       return 'daily';
@@ -316,52 +314,22 @@ function CommitterAnalysis() {
 
     setIsAnalyzing(true);
     try {
-      const metricsPromises = selectedContributors.map(async (contributorId) => {
-        try {
-          const response = await fetch(`http://localhost:5000/api/contributors/${contributorId}/metrics?repository_id=${selectedRepository.id}&days=${timeRange}`);
-          if (!response.ok) {
-            console.warn(`Failed to fetch metrics for contributor ${contributorId}`);
-            return null;
-          }
-          const data = await response.json();
-          return { contributorId, data };
-        } catch (error) {
-          console.warn(`Error fetching metrics for contributor ${contributorId}:`, error);
-          return null;
-        }
-      });
-
-      const timelinePromises = selectedContributors.map(async (contributorId) => {
-        try {
-          const response = await fetch(`http://localhost:5000/api/contributors/${contributorId}/activity-timeline?repository_id=${selectedRepository.id}&days=${timeRange}`);
-          if (!response.ok) {
-            console.warn(`Failed to fetch timeline for contributor ${contributorId}`);
-            return null;
-          }
-          const data = await response.json();
-          return { contributorId, data };
-        } catch (error) {
-          console.warn(`Error fetching timeline for contributor ${contributorId}:`, error);
-          return null;
-        }
-      });
-
-      const [metricsResults, timelineResults] = await Promise.all([Promise.all(metricsPromises), Promise.all(timelinePromises)]);
-      
-      const metrics = {};
-      const timelines = {};
-      
-      metricsResults.forEach(result => {
-        if (result) {
-          metrics[result.contributorId] = result.data;
-        }
-      });
-
-      timelineResults.forEach(result => {
-        if (result) {
-          timelines[result.contributorId] = result.data;
-        }
+      // One request returns metrics and timelines for every selected contributor
+      const response = await fetch('http://localhost:5000/api/contributors/bulk-metrics', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          contributor_ids: selectedContributors,
+          repository_id: selectedRepository.id,
+          days: timeRange,
+          // Timelines come back already bucketed (and zero-filled) at the chart's granularity
+          granularity: getActivityGranularity(timeRange) === 'monthly' ? 'month' : 'day'
+        })
       });
+      if (!response.ok) throw new Error('Failed to fetch contributor metrics');
+      const { metrics, timelines } = await response.json();
       
       console.log('Final contributor metrics:', metrics);
       console.log('Final contributor timelines:', timelines);
@@ -975,7 +943,7 @@ function CommitterAnalysis() {
                                     x: {
                                       title: {
                                         display: true,
-                                        text: getActivityAxisLabel(timeRange)
+                                        text: getActivityAxisLabel(getActivityGranularity(timeRange))
                                       }
                                     }
                                   }
@@ -1200,7 +1168,7 @@ function CommitterAnalysis() {
                                   x: {
                                     title: {
                                       display: true,
-                                      text: getActivityAxisLabel(timeRange)
+                                      text: getActivityAxisLabel(getActivityGranularity(timeRange))
                                     }
                                   }
                                 }
@@ -47,6 +47,9 @@ ChartJS.register(
   ArcElement
 );
 
+// Upper bound on points in the daily activity chart
+const MAX_CHART_POINTS = 180;
+
 const Dashboard = ({ repositories, selectedRepository, onRepositoryChange }) => {
   const theme = useTheme();
   const isMobile = useMediaQuery(theme.breakpoints.down('sm'));
@@ -105,78 +108,36 @@ const Dashboard = ({ repositories, selectedRepository, onRepositoryChange }) =>
     
     setLoading(true);
     setError(null);
+    setLoadingStates({ metrics: true, contributors: true, dailyActivity: true, commitTypes: true });
     
-    // Start all calls in parallel but track individual progress
-    const promises = [
-      fetchMetrics(),
-      fetchContributors(),
-      fetchDailyActivity(),
-      fetchCommitTypes()
-    ];
-    
+    // Every panel comes back from one request, computed by the backend in a single pass
     try {
-      await Promise.all(promises);
-    } catch (err) {
-      setError(err.message);
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  const fetchMetrics = async () => {
-    setLoadingStates(prev => ({ ...prev, metrics: true }));
-    try {
-      const [velocityRes, churnRes, testCoverageRes] = await Promise.all([
-        fetch(`http://localhost:5000/api/metrics/velocity?repository_id=${selectedRepository.id}&days=${timePeriod}`),
-        fetch(`http://localhost:5000/api/metrics/churn?repository_id=${selectedRepository.id}&days=${timePeriod}`),
-        fetch(`http://localhost:5000/api/metrics/test-coverage?repository_id=${selectedRepository.id}&days=${timePeriod}`)
-      ]);
-
-      const velocity = await velocityRes.json();
-      const churn = await churnRes.json();
-      const testCoverage = await testCoverageRes.json();
+      const panels = 'velocity,churn,test_coverage,contributors,daily_activity,commit_types';
+      // Long periods come back as weekly/monthly buckets, downsampled to what the chart can show
+      const response = await fetch(`http://localhost:5000/api/dashboard?repository_id=${selectedRepository.id}&days=${timePeriod}&panels=${panels}&granularity=auto&max_points=${MAX_CHART_POINTS}`);
+      const data = await response.json();
+      if (!response.ok) {
+        throw new Error(data.error || 'Failed to fetch dashboard');
+      }
 
-      const metricsData = { velocity, churn, testCoverage };
+      const metricsData = {
+        velocity: { velocity: data.velocity, period_days: data.period_days },
+        churn: data.churn,
+        testCoverage: data.test_coverage
+      };
       setMetrics(metricsData);
       setStoredState('metrics', metricsData);
+      setContributors(data.contributors);
+      setStoredState('contributors', data.contributors);
+      setDailyActivity(data.daily_activity);
+      setStoredState('dailyActivity', data.daily_activity);
+      setCommitTypes(data.commit_types);
+      setStoredState('commitTypes', data.commit_types);
+    } catch (err) {
+      setError(err.message);
     } finally {
-      setLoadingStates(prev => ({ ...prev, metrics: false }));
-    }
-  };
-
-  const fetchContributors = async () => {
-    setLoadingStates(prev => ({ ...prev, contributors: true }));
-    try {
-      const response = await fetch(`http://localhost:5000/api/metrics/contributors?repository_id=${selectedRepository.id}&days=${timePeriod}`);
-      const data = await response.json();
-      setContributors(data);
-      setStoredState('contributors', data);
-    } finally {
-      setLoadingStates(prev => ({ ...prev, contributors: false }));
-    }
-  };
-
-  const fetchDailyActivity = async () => {
-    setLoadingStates(prev => ({ ...prev, dailyActivity: true }));
-    try {
-      const response = await fetch(`http://localhost:5000/api/charts/daily-activity?repository_id=${selectedRepository.id}&days=${timePeriod}`);
-      const data = await response.json();
-      setDailyActivity(data);
-      setStoredState('dailyActivity', data);
-    } finally {
-      setLoadingStates(prev => ({ ...prev, dailyActivity: false }));
-    }
-  };
-
-  const fetchCommitTypes = async () => {
-    setLoadingStates(prev => ({ ...prev, commitTypes: true }));
-    try {
-      const response = await fetch(`http://localhost:5000/api/charts/commit-types?repository_id=${selectedRepository.id}&days=${timePeriod}`);
-      const data = await response.json();
-      setCommitTypes(data);
-      setStoredState('commitTypes', data);
-    } finally {
-      setLoadingStates(prev => ({ ...prev, commitTypes: false }));
+      setLoading(false);
+      setLoadingStates({ metrics: false, contributors: false, dailyActivity: false, commitTypes: false });
     }
   };
 